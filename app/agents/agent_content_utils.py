@@ -1,13 +1,21 @@
 import json
 import re
-import html
 import string
 import random
 import hashlib
+import threading
 import markdown as markdown_lib
-from typing import Dict, Any, List, Optional
+from html.parser import HTMLParser
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
 import unicodedata
 
+from .llm_client import create_chat_completion
+from .model_routing import resolve_model_route
+from .prompt_budget import BLOCK_PRIORITIES, PromptBlock, apply_token_budget, read_prompt_token_budget
+from .token_utils import count_tokens
+from .trends_snapshot import get_trends_snapshot
+
 # LISTA DE PATRONES TEMÁTICOS A EXCLUIR (contextuales, triviales, sin valor investigativo)
 EXCLUDED_TOPIC_PATTERNS = {
     # Efemérides y "noches temáticas"
@@ -86,6 +94,9 @@ MIN_REQUIRED_ANALYSIS_SECTIONS = 4
 MIN_REQUIRED_SUBSTANTIVE_PARAGRAPHS = 4
 MIN_PARAGRAPH_WORDS = 70
 
+# Fuentes compactas para prompts que no llevan el skeleton completo (reintento dirigido, rechequeo).
+SOURCE_CONTEXT_TOKEN_BUDGET = 1500
+
 
 def _build_profile_directives(writing_style: str, tone: str, target_audience: str) -> str:
     """Convierte campos editoriales en reglas concretas de redacción."""
@@ -393,55 +404,97 @@ def _validate_article_depth(article_content: str) -> Dict[str, Any]:
         'forbidden_phrase_hits': forbidden_phrase_hits,
     }
 
-def _convert_html_to_markdown(html_content: str) -> str:
+# Los agentes pueden correr en paralelo (modo batched): la evicción FIFO de los caches va con lock.
+_CACHE_EVICTION_LOCK = threading.Lock()
+_FORMAT_MARKDOWN_CACHE: Dict[Any, str] = {}
+_FORMAT_MARKDOWN_CACHE_MAX_ENTRIES = 256
+
+_HEADING_PREFIXES = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "#### "}
+_EMPHASIS_MARKERS = {"strong": "**", "b": "**", "em": "*", "i": "*"}
+
+
+class _HTMLToMarkdownParser(HTMLParser):
+    """Máquina de estados de una sola pasada para convertir HTML de editores a Markdown.
+
+    Los marcadores de apertura se reservan como huecos vacíos y solo se completan
+    cuando aparece el cierre correspondiente, igual que hacían los `re.sub`
+    anteriores con etiquetas sin cerrar."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._open_tags: List[Any] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Any]) -> None:
+        if tag == "br":
+            self.parts.append("\n")
+            return
+
+        if tag in _HEADING_PREFIXES or tag in _EMPHASIS_MARKERS or tag == "li":
+            self._open_tags.append((tag, len(self.parts), None))
+            self.parts.append("")
+        elif tag == "a":
+            href = next((value for name, value in attrs if name == "href"), None)
+            self._open_tags.append((tag, len(self.parts), href))
+            self.parts.append("")
+
+    def handle_startendtag(self, tag: str, attrs: List[Any]) -> None:
+        if tag == "br":
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self._open_tags) - 1, -1, -1):
+            if self._open_tags[index][0] == tag:
+                _, slot, href = self._open_tags.pop(index)
+                break
+        else:
+            return
+
+        if tag in _HEADING_PREFIXES:
+            self.parts[slot] = _HEADING_PREFIXES[tag]
+        elif tag in _EMPHASIS_MARKERS:
+            self.parts[slot] = _EMPHASIS_MARKERS[tag]
+            self.parts.append(_EMPHASIS_MARKERS[tag])
+        elif tag == "li":
+            self.parts[slot] = "- "
+        elif tag == "a" and href is not None:
+            self.parts[slot] = "["
+            self.parts.append(f"]({href})")
+
+    def handle_data(self, data: str) -> None:
+        self.parts.append(data)
+
+    def get_markdown(self) -> str:
+        return "".join(self.parts)
+
+
+def _convert_html_to_markdown(html_content: str, agent_id: Any = None) -> str:
     """Convierte HTML a Markdown para el format_markdown del agente.
-    Maneja etiquetas comunes de editors HTML (Quill, DraftJS, etc.)"""
+    Maneja etiquetas comunes de editors HTML (Quill, DraftJS, etc.), incluso con atributos.
+    El resultado se cachea por agente y hash del contenido."""
     
     if not html_content:
         return ""
-    
-    # Unescape HTML entities
-    md = html.unescape(html_content)
-    
-    # Convertir tags HTML a Markdown
-    conversions = [
-        # Párrafos
-        (r'<p>(.*?)</p>', r'\1'),
-        
-        # Títulos
-        (r'<h1>(.*?)</h1>', r'# \1'),
-        (r'<h2>(.*?)</h2>', r'## \1'),
-        (r'<h3>(.*?)</h3>', r'### \1'),
-        (r'<h4>(.*?)</h4>', r'#### \1'),
-        
-        # Énfasis
-        (r'<strong>(.*?)</strong>', r'**\1**'),
-        (r'<b>(.*?)</b>', r'**\1**'),
-        (r'<em>(.*?)</em>', r'*\1*'),
-        (r'<i>(.*?)</i>', r'*\1*'),
-        
-        # Listas
-        (r'<li>(.*?)</li>', r'- \1'),
-        (r'<ul>(.*?)</ul>', r'\1'),
-        (r'<ol>(.*?)</ol>', r'\1'),
-        
-        # Saltos de línea
-        (r'<br\s*/?>', r'\n'),
-        (r'<br/>', r'\n'),
-        
-        # Enlaces (si existen)
-        (r'<a\s+href=["\']([^"\']*)["\']>(.*?)</a>', r'[\2](\1)'),
-    ]
-    
-    for pattern, replacement in conversions:
-        md = re.sub(pattern, replacement, md, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Limpiar tags residuales
-    md = re.sub(r'<[^>]+>', '', md)
+
+    content_hash = hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+    cache_key = (agent_id, content_hash)
+    cached = _FORMAT_MARKDOWN_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    parser = _HTMLToMarkdownParser()
+    parser.feed(html_content)
+    parser.close()
+    md = parser.get_markdown()
     
     # Limpiar espacios excesivos
     md = re.sub(r'\n{3,}', '\n\n', md)
     md = md.strip()
+
+    with _CACHE_EVICTION_LOCK:
+        if len(_FORMAT_MARKDOWN_CACHE) >= _FORMAT_MARKDOWN_CACHE_MAX_ENTRIES:
+            _FORMAT_MARKDOWN_CACHE.pop(next(iter(_FORMAT_MARKDOWN_CACHE)), None)
+        _FORMAT_MARKDOWN_CACHE[cache_key] = md
     
     return md
 
@@ -564,93 +617,127 @@ def _build_internal_links_block(search_results: Dict[str, Any]) -> str:
     )
     return "\n".join(lines)
 
-def create_prompt(agent, trends_data: Dict[str, Any], search_results: Dict[str, Any], selected_trend: str, topic_position: int = None) -> str:
-    """Crea el prompt para ChatGPT basado en las tendencias y búsquedas"""
-    trends_data = _validate_and_parse_data(trends_data, "trends_data")
-    search_results = _validate_and_parse_data(search_results, "search_results")
-    
-    trends_text = ""
-    trending_topics = trends_data.get("trending_topics", [])
-    if isinstance(trending_topics, list) and trending_topics:
-        for i, topic in enumerate(trending_topics, 1):
-            title = ""
-            categories_text = ""
-            search_volume = ""
-            
-            if isinstance(topic, dict):
-                title = topic.get('title', '')
-                if isinstance(title, dict):
-                    title = title.get('query', str(title))
-                
-                categories = topic.get('categories', [])
-                if isinstance(categories, list) and categories:
-                    category_names = []
-                    for cat in categories:
-                        if isinstance(cat, dict):
-                            cat_name = cat.get('name', '')
-                            if cat_name:
-                                category_names.append(cat_name)
-                        elif isinstance(cat, str):
-                            category_names.append(cat)
-                    
-                    if category_names:
-                        categories_text = f" [Categorías: {', '.join(category_names)} ]"
-                
-                volume = topic.get('search_volume')
-                if volume:
-                    search_volume = f" (Vol: {volume:,})"
-                    
-            elif isinstance(topic, str):
-                title = topic
-            
-            if title:
-                trends_text += f"{i}. {title}{categories_text}{search_volume}\n"
-    
+
+_PROMPT_SKELETON_CACHE: Dict[Any, "PromptSkeleton"] = {}
+_PROMPT_SKELETON_CACHE_MAX_ENTRIES = 128
+_PROMPT_SLOT_PATTERN = re.compile("\x00SLOT:(\\w+)\x00")
+
+
+def _prompt_slot(name: str) -> str:
+    return f"\x00SLOT:{name}\x00"
+
+
+@dataclass(frozen=True)
+class PromptSkeleton:
+    """Partes invariantes del prompt de un agente, precompiladas con huecos para los bloques dinámicos."""
+
+    cache_key: Tuple[Any, ...]
+    literals: Tuple[str, ...]
+    slots: Tuple[str, ...]
+    static_blocks: Dict[str, str]
+    literal_token_count: int
+    token_count: int
+
+    def render(self, blocks: Dict[str, str]) -> str:
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(blocks.get(slot, ""))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _build_trends_text(trends_data: Dict[str, Any]) -> str:
+    return get_trends_snapshot(trends_data).base_text
+
+
+def _build_top_stories_block(search_results: Dict[str, Any]) -> str:
+    if not isinstance(search_results, dict) or "top_stories" not in search_results:
+        return ""
+    top_stories = search_results["top_stories"]
+    if not isinstance(top_stories, list) or not top_stories:
+        return ""
+
+    lines = ["NOTICIAS DESTACADAS:"]
+    for i, story in enumerate(top_stories[:3], 1):
+        if isinstance(story, dict):
+            title = story.get('title', 'Sin título')
+            source = story.get('source', 'Sin fuente')
+            date = story.get('date', 'Sin fecha')
+            lines.append(f"{i}. {title}")
+            lines.append(f"   Fuente: {source} - {date}")
+    return "\n".join(lines)
+
+
+def _build_organic_results_block(search_results: Dict[str, Any]) -> str:
+    if not isinstance(search_results, dict) or "organic_results" not in search_results:
+        return ""
+    organic_results = search_results["organic_results"]
+    if not isinstance(organic_results, list) or not organic_results:
+        return ""
+
+    organic_sorted = [result for result in organic_results if isinstance(result, dict)]
+    organic_sorted = sorted(organic_sorted, key=lambda x: x.get('position', 999))[:3]
+
+    lines = ["INFORMACIÓN ADICIONAL:"]
+    for i, result in enumerate(organic_sorted, 1):
+        title = result.get('title', 'Sin título')
+        snippet = result.get('snippet', 'Sin descripción')
+        position = result.get('position', 'N/A')
+        if len(snippet) > 100:
+            snippet = snippet[:97] + "..."
+        lines.append(f"{i}. [Pos. {position}] {title}")
+        lines.append(f"   {snippet}")
+    return "\n".join(lines)
+
+
+def _build_outline_block(outline_text: Optional[str]) -> str:
+    if not isinstance(outline_text, str) or not outline_text.strip():
+        return ""
+    return f"OUTLINE EDITORIAL PREVIO (OBLIGATORIO RESPETAR):\n{outline_text}"
+
+
+def _build_additional_info(blocks: Dict[str, str]) -> str:
+    """Compone el contexto editorial (noticias, búsquedas, contexto, mercado, enlaces) con el formato histórico."""
     additional_info = ""
-    
-    if isinstance(search_results, dict) and "top_stories" in search_results:
-        top_stories = search_results["top_stories"]
-        if isinstance(top_stories, list) and top_stories:
-            additional_info += "NOTICIAS DESTACADAS:\n"
-            for i, story in enumerate(top_stories[:3], 1):
-                if isinstance(story, dict):
-                    title = story.get('title', 'Sin título')
-                    source = story.get('source', 'Sin fuente')
-                    date = story.get('date', 'Sin fecha')
-                    additional_info += f"{i}. {title}\n   Fuente: {source} - {date}\n"
-            additional_info += "\n"
-    
-    if isinstance(search_results, dict) and "organic_results" in search_results:
-        organic_results = search_results["organic_results"]
-        if isinstance(organic_results, list) and organic_results:
-            additional_info += "INFORMACIÓN ADICIONAL:\n"
-            organic_sorted = []
-            for result in organic_results:
-                if isinstance(result, dict):
-                    organic_sorted.append(result)
-            
-            organic_sorted = sorted(organic_sorted, key=lambda x: x.get('position', 999))[:3]
-            
-            for i, result in enumerate(organic_sorted, 1):
-                title = result.get('title', 'Sin título')
-                snippet = result.get('snippet', 'Sin descripción')
-                position = result.get('position', 'N/A')
-                if len(snippet) > 100:
-                    snippet = snippet[:97] + "..."
-                additional_info += f"{i}. [Pos. {position}] {title}\n   {snippet}\n"
-
-    related_context_block = _build_related_context_block(search_results)
-    if related_context_block:
-        additional_info += "\n" + related_context_block + "\n"
-
-    market_data_block = _build_market_data_block(search_results)
-    if market_data_block:
-        additional_info += "\n" + market_data_block + "\n"
-
-    internal_links_block = _build_internal_links_block(search_results)
-    if internal_links_block:
-        additional_info += "\n" + internal_links_block + "\n"
-    
+    if blocks.get("top_stories"):
+        additional_info += blocks["top_stories"] + "\n\n"
+    if blocks.get("organic_results"):
+        additional_info += blocks["organic_results"] + "\n"
+    for name in ("related_context", "market_data", "internal_links"):
+        if blocks.get(name):
+            additional_info += "\n" + blocks[name] + "\n"
+    return additional_info
+
+
+def _prompt_skeleton_cache_key(agent) -> Tuple[Any, ...]:
+    """Clave de caché: id del agente + updatedAt del CMS; sin updatedAt se usa hash del perfil."""
+    agent_id = getattr(agent, "agent_id", None)
+    agent_config = getattr(agent, "agent_config", None)
+    updated_at = agent_config.get("updatedAt") if isinstance(agent_config, dict) else None
+    if agent_id is not None and updated_at:
+        return (agent_id, updated_at)
+
+    profile_source = json.dumps(
+        [
+            getattr(agent, "personality", ""),
+            getattr(agent, "trending_prompt", ""),
+            getattr(agent, "format_markdown", ""),
+            getattr(agent, "writing_style", ""),
+            getattr(agent, "tone", ""),
+            getattr(agent, "target_audience", ""),
+            getattr(agent, "preferred_categories", []),
+            getattr(agent, "forbidden_topics", []),
+            getattr(agent, "example_article", ""),
+        ],
+        ensure_ascii=False,
+        default=str,
+    )
+    return (agent_id, "profile:" + hashlib.sha256(profile_source.encode("utf-8")).hexdigest())
+
+
+def _compile_prompt_skeleton(agent, cache_key: Tuple[Any, ...]) -> PromptSkeleton:
+    """Arma el prompt completo con marcadores en lugar de los bloques dinámicos y lo parte en segmentos."""
+    agent_id = getattr(agent, "agent_id", None)
     personality = agent.personality
     trending_instructions = agent.trending_prompt
     format_template = agent.format_markdown
@@ -688,7 +775,7 @@ def create_prompt(agent, trends_data: Dict[str, Any], search_results: Dict[str,
     
     # Mejorada conversión de formato_markdown (HTML → Markdown)
     if format_template and format_template.strip():
-        format_template = _convert_html_to_markdown(format_template)
+        format_template = _convert_html_to_markdown(format_template, agent_id)
     else:
         # Template por defecto si no está disponible
         format_template = """
@@ -714,13 +801,13 @@ def create_prompt(agent, trends_data: Dict[str, Any], search_results: Dict[str,
     prompt = f"""{personality}
 
 📊 CONTEXTO DE TENDENCIAS (últimas 24h):
-{trends_text}
+{_prompt_slot("trends")}
 
-{additional_info}
+{_prompt_slot("additional_info")}
 
 ═══════════════════════════════════════════════════════════════════════════
 
-TÓPICO ASIGNADO PARA ANÁLISIS: "{selected_trend}"
+TÓPICO ASIGNADO PARA ANÁLISIS: "{_prompt_slot("selected_trend")}"
 
 PERFIL EDITORIAL DEL AGENTE (OBLIGATORIO RESPETAR):
 - Estilo de escritura: {writing_style}
@@ -971,7 +1058,7 @@ FORMATO FINAL:
 
 🚀 INSTRUCCIONES FINALES:
 
-1. Lee cuidadosamente el tópico: "{selected_trend}"
+1. Lee cuidadosamente el tópico: "{_prompt_slot("selected_trend")}"
 2. Elige la CATEGORÍA que mejor se ajuste
 3. Analiza profundamente: ¿por qué importa? ¿contexto? ¿comparación? ¿impacto?
 4. Busca datos, cifras, precedentes internacionales
@@ -983,7 +1070,7 @@ FORMATO FINAL:
 RECUERDA: FinGuru requiere ANÁLISIS RIGUROSO, no noticias. Tu trabajo es explicar 
 POR QUÉ algo importa, NO simplemente QUÉ pasó.
 
-{example_article_block}
+{_prompt_slot("example_article")}
 
 ═══════════════════════════════════════════════════════════════════════════"""
 
@@ -1014,9 +1101,127 @@ FORMATO DE SALIDA OBLIGATORIO:
 ═══════════════════════════════════════════════════════════════════════════
 """
 
-    return prompt + final_quality_block
+    pieces = _PROMPT_SLOT_PATTERN.split(prompt + final_quality_block)
+    literals = tuple(pieces[0::2])
+    slots = tuple(pieces[1::2])
+    literal_token_count = count_tokens("".join(literals))
+    return PromptSkeleton(
+        cache_key=cache_key,
+        literals=literals,
+        slots=slots,
+        static_blocks={"example_article": example_article_block},
+        literal_token_count=literal_token_count,
+        token_count=literal_token_count + count_tokens(example_article_block),
+    )
+
+
+def get_prompt_skeleton(agent) -> Tuple[PromptSkeleton, bool]:
+    """Devuelve (skeleton, cache_hit) para el agente. Solo se recompila si cambia el perfil en el CMS."""
+    cache_key = _prompt_skeleton_cache_key(agent)
+    cached = _PROMPT_SKELETON_CACHE.get(cache_key)
+    if cached is not None:
+        return cached, True
+
+    skeleton = _compile_prompt_skeleton(agent, cache_key)
+    with _CACHE_EVICTION_LOCK:
+        if len(_PROMPT_SKELETON_CACHE) >= _PROMPT_SKELETON_CACHE_MAX_ENTRIES:
+            _PROMPT_SKELETON_CACHE.pop(next(iter(_PROMPT_SKELETON_CACHE)), None)
+        _PROMPT_SKELETON_CACHE[cache_key] = skeleton
+    return skeleton, False
+
+
+def build_prompt_bundle(
+    agent,
+    trends_data: Dict[str, Any],
+    search_results: Dict[str, Any],
+    selected_trend: str,
+    topic_position: int = None,
+    outline_text: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Inserta los bloques dinámicos en el skeleton del agente, ajustándolos al presupuesto de tokens de entrada."""
+    trends_data = _validate_and_parse_data(trends_data, "trends_data")
+    search_results = _validate_and_parse_data(search_results, "search_results")
 
-def generate_article_content(agent, prompt: str) -> str:
+    skeleton, cache_hit = get_prompt_skeleton(agent)
+    blocks = [
+        PromptBlock("outline", _build_outline_block(outline_text), BLOCK_PRIORITIES["outline"]),
+        PromptBlock("market_data", _build_market_data_block(search_results), BLOCK_PRIORITIES["market_data"]),
+        PromptBlock("top_stories", _build_top_stories_block(search_results), BLOCK_PRIORITIES["top_stories"]),
+        PromptBlock("organic_results", _build_organic_results_block(search_results), BLOCK_PRIORITIES["organic_results"]),
+        PromptBlock("related_context", _build_related_context_block(search_results), BLOCK_PRIORITIES["related_context"]),
+        PromptBlock("internal_links", _build_internal_links_block(search_results), BLOCK_PRIORITIES["internal_links"]),
+        PromptBlock(
+            "example_article",
+            skeleton.static_blocks.get("example_article", ""),
+            BLOCK_PRIORITIES["example_article"],
+            header_lines=5,
+        ),
+        PromptBlock("trends", _build_trends_text(trends_data), BLOCK_PRIORITIES["trends"], header_lines=0),
+    ]
+    fixed_tokens = skeleton.literal_token_count + (
+        count_tokens(selected_trend or "") * skeleton.slots.count("selected_trend")
+    )
+    budget = read_prompt_token_budget() if token_budget is None else token_budget
+    budgeted = apply_token_budget(blocks, fixed_tokens, budget)
+    texts = budgeted["texts"]
+
+    prompt = skeleton.render(
+        {
+            "trends": texts.get("trends", ""),
+            "additional_info": _build_additional_info(texts),
+            "selected_trend": selected_trend,
+            "example_article": texts.get("example_article", ""),
+        }
+    )
+    if texts.get("outline"):
+        prompt += "\n\n" + texts["outline"] + "\n"
+
+    return {
+        "prompt": prompt,
+        "skeleton": {
+            "cache_hit": cache_hit,
+            "tokens": skeleton.token_count,
+        },
+        "token_budget": budgeted["report"],
+    }
+
+
+def build_source_context(search_results: Dict[str, Any], token_budget: int = SOURCE_CONTEXT_TOKEN_BUDGET) -> str:
+    """Noticias, datos de mercado y enlaces internos de `build_prompt_bundle`, recortados a `token_budget`."""
+    search_results = _validate_and_parse_data(search_results, "search_results")
+    blocks = [
+        PromptBlock("market_data", _build_market_data_block(search_results), BLOCK_PRIORITIES["market_data"]),
+        PromptBlock("top_stories", _build_top_stories_block(search_results), BLOCK_PRIORITIES["top_stories"]),
+        PromptBlock("organic_results", _build_organic_results_block(search_results), BLOCK_PRIORITIES["organic_results"]),
+        PromptBlock("related_context", _build_related_context_block(search_results), BLOCK_PRIORITIES["related_context"]),
+        PromptBlock("internal_links", _build_internal_links_block(search_results), BLOCK_PRIORITIES["internal_links"]),
+    ]
+    return _build_additional_info(apply_token_budget(blocks, 0, token_budget)["texts"]).strip()
+
+
+def create_prompt(agent, trends_data: Dict[str, Any], search_results: Dict[str, Any], selected_trend: str, topic_position: int = None) -> str:
+    """Crea el prompt para ChatGPT basado en las tendencias y búsquedas"""
+    return build_prompt_bundle(agent, trends_data, search_results, selected_trend, topic_position)["prompt"]
+
+def build_generation_request(agent, prompt: str, stage: str = "generation", max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Parámetros de la llamada de redacción (ver `generate_article_content`), reutilizables en batch."""
+    system_message = agent.personality or "Eres un periodista especializado en tendencias argentinas. Responde ÚNICAMENTE con contenido en formato Markdown."
+    route = resolve_model_route(agent, stage)
+    return {
+        "model": route.model,
+        "messages": [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens or route.max_tokens or max(256, int(getattr(agent, "max_tokens", 1400))),
+        "temperature": max(0.0, min(1.5, float(getattr(agent, "temperature", 0.6)))),
+        "top_p": 0.9,         # Controlado para variedad
+        "frequency_penalty": 0.3,  # Evita repeticiones
+        "presence_penalty": 0.1    # Fomenta contenido nuevo
+    }
+
+def generate_article_content(agent, prompt: str, stage: str = "generation", max_tokens: Optional[int] = None) -> str:
     """Genera el contenido del artículo usando ChatGPT con parámetros optimizados.
     
     Parámetros ajustados para mayor rigor y consistencia:
@@ -1026,19 +1231,10 @@ def generate_article_content(agent, prompt: str) -> str:
     - presence_penalty: 0.1 (fomenta nuevo contenido)
     """
     try:
-        system_message = agent.personality or "Eres un periodista especializado en tendencias argentinas. Responde ÚNICAMENTE con contenido en formato Markdown."
-        
-        response = agent.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max(256, int(getattr(agent, "max_tokens", 1400))),
-            temperature=max(0.0, min(1.5, float(getattr(agent, "temperature", 0.6)))),
-            top_p=0.9,         # Controlado para variedad
-            frequency_penalty=0.3,  # Evita repeticiones
-            presence_penalty=0.1    # Fomenta contenido nuevo
+        response = create_chat_completion(
+            agent,
+            stage,
+            **build_generation_request(agent, prompt, stage=stage, max_tokens=max_tokens),
         )
         
         return response.choices[0].message.content
@@ -1046,14 +1242,46 @@ def generate_article_content(agent, prompt: str) -> str:
         print(f"Error generating content: {str(e)}")
         return ""
 
+class _MarkdownRendererPool:
+    """Pool thread-safe de instancias `markdown.Markdown` preconfiguradas.
+
+    Construir un `Markdown` carga todo el grafo de extensiones; reutilizamos las
+    instancias y las reseteamos al devolverlas al pool."""
+
+    def __init__(self, extensions: List[str], max_idle: int = 8) -> None:
+        self._extensions = list(extensions)
+        self._max_idle = max_idle
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Any:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return markdown_lib.Markdown(extensions=self._extensions)
+
+    def _release(self, renderer: Any) -> None:
+        renderer.reset()
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(renderer)
+
+    def convert(self, text: str) -> str:
+        renderer = self._acquire()
+        try:
+            return renderer.convert(text)
+        finally:
+            self._release(renderer)
+
+
+_MARKDOWN_RENDERER_POOL = _MarkdownRendererPool(extensions=["extra"])
+
+
 def markdown_to_html(md: str) -> str:
     """Convierte Markdown a HTML usando la librería `markdown` (HTML válido, sin `<p>` envolviendo `<h2>`, etc.)."""
     if not isinstance(md, str) or not md.strip():
         return ""
-    return markdown_lib.markdown(
-        md.strip(),
-        extensions=["extra"],
-    ).strip()
+    return _MARKDOWN_RENDERER_POOL.convert(md.strip()).strip()
 
 
 def _slugify(text: str) -> str:
@@ -1,29 +1,49 @@
 from crewai import Crew, Process
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
 import os
+import queue
+import threading
 from agents.asistente import get_asistente_agent,get_asistente_task
 from agents.marketing import get_marketing_agent,get_marketing_task
 from agents.editor import get_editor_agent,get_editor_task
 from agents.director import get_director_agent,get_director_task
+from agents.editorial_roles import EDITORIAL_ROLES
 from load_env import load_env_files
 
 load_env_files()
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# Start the process with the crew, taking the input message
-def iterate_agents(message):
-    asistente = get_asistente_agent(message)
-    marketing = get_marketing_agent(message)
-    editor = get_editor_agent(message)
-    director = get_director_agent(message)
-    
-    marketing_task = get_marketing_task(message)
-    editor_task = get_editor_task(message)
-    writer_task = get_asistente_task(message)
-    director_task = get_director_task(message)
+DEFAULT_CREW_POOL_SIZE = 2
+
+
+def _read_crew_pool_size() -> int:
+    """EDITORIAL_CREW_POOL_SIZE: Crews plantilla reutilizables (= kickoffs simultáneos, 2 por defecto)."""
+    try:
+        value = int(os.getenv("EDITORIAL_CREW_POOL_SIZE", str(DEFAULT_CREW_POOL_SIZE)))
+    except ValueError:
+        return DEFAULT_CREW_POOL_SIZE
+    return value if value > 0 else DEFAULT_CREW_POOL_SIZE
+
+
+def build_editorial_crew():
+    """
+    Crew editorial armada una sola vez desde las plantillas de rol: goal, descripción y resultado
+    esperado llevan `{message}`, que CrewAI interpola desde los originales en cada `kickoff`.
+    Cada tarea usa el mismo agente que está en la Crew.
+    """
+    asistente = get_asistente_agent()
+    marketing = get_marketing_agent()
+    editor = get_editor_agent()
+    director = get_director_agent()
+
+    marketing_task = get_marketing_task(agent=marketing)
+    editor_task = get_editor_task(agent=editor)
+    writer_task = get_asistente_task(agent=asistente)
+    director_task = get_director_task(agent=director)
 
     # Forming the tech-focused crew with some enhanced configurations
-    crew = Crew(
+    return Crew(
         agents=[asistente, marketing, editor, director],
         tasks=[marketing_task, editor_task, writer_task, director_task],
         process=Process.sequential,
@@ -33,7 +53,105 @@ def iterate_agents(message):
         share_crew=True,
     )
 
-    result = crew.kickoff(inputs={'message': message})
+
+class CrewPool:
+    """
+    Crews plantilla reutilizables. La interpolación de `kickoff` muta agentes y tareas, así que
+    cada Crew la usa una sola ejecución a la vez; se crean bajo demanda hasta `size`.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._built = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        crew = self._acquire()
+        # Los agentes reutilizados acumulan tokens entre kickoffs: se ponen en cero para que
+        # `CrewOutput.token_usage` sea solo el de esta ejecución.
+        for agent in crew.agents:
+            agent._token_process = TokenProcess()
+        return crew
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._built < self.size:
+                self._built += 1
+                build = True
+            else:
+                build = False
+        if build:
+            try:
+                return build_editorial_crew()
+            except Exception:
+                with self._lock:
+                    self._built -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, crew) -> None:
+        self._idle.put(crew)
+
+
+_CREW_POOL = CrewPool(_read_crew_pool_size())
+
+
+# Start the process with the crew, taking the input message
+def iterate_agents(message):
+    crew = _CREW_POOL.acquire()
+    try:
+        result = crew.kickoff(inputs={'message': message})
+    finally:
+        _CREW_POOL.release(crew)
     print(result)
     return result
 
+
+_ROLE_KEYS = {role.role: key for key, role in EDITORIAL_ROLES.items()}
+_STREAM_DONE = object()
+
+
+def iterate_agents_stream(message):
+    """
+    Igual que `iterate_agents`, pero produce un evento `stage` al terminar cada tarea de la Crew
+    (vía `Task.callback`) y cierra con `result`. La Crew no expone tokens, así que aquí no hay
+    eventos `delta`.
+    """
+    crew = _CREW_POOL.acquire()
+    events = queue.Queue()
+    outcome = {}
+
+    def on_task(output):
+        events.put({"event": "stage", "role": _ROLE_KEYS.get(output.agent, output.agent), "content": output.raw})
+
+    def run():
+        try:
+            outcome["result"] = crew.kickoff(inputs={'message': message})
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            # La Crew vuelve al pool desde el worker: si el cliente corta el stream, el generador
+            # puede no cerrarse hasta un GC y no debe retenerla ni bloquear esperando el kickoff.
+            for task in crew.tasks:
+                task.callback = None
+            _CREW_POOL.release(crew)
+            events.put(_STREAM_DONE)
+
+    for task in crew.tasks:
+        task.callback = on_task
+    threading.Thread(target=run, name="editorial-crew-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is _STREAM_DONE:
+            break
+        yield event
+
+    if "error" in outcome:
+        raise outcome["error"]
+    print(outcome["result"])
+    yield {"event": "result", "content": str(outcome["result"])}
@@ -13,6 +13,7 @@ import random
 import io
 import traceback
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 # Refactored utils
 from .agent_api_utils import (
@@ -25,8 +26,6 @@ from .agent_api_utils import (
     download_image_from_url
 )
 from .agent_content_utils import (
-    _is_topic_similar_to_recent_articles,
-    _is_topic_trivial_or_contextual,
     _validate_article_depth,
     create_prompt,
     generate_article_content,
@@ -35,12 +34,50 @@ from .agent_content_utils import (
     _validate_and_parse_data
 )
 from .agent_profile import AgentProfile, _to_optional_int
+from .batch_mode import EXECUTION_MODE_BATCH, BatchJobBusy, BatchRunner, resolve_execution_mode
+from .llm_client import create_chat_completion
+from .llm_usage import UsageTracker, aggregate_usage
 from .market_data_utils import get_market_data_snapshot
+from .model_routing import get_latency_tracker
+from .rate_limiter import get_openai_rate_limiter
 from .trends_pipeline import TrendsPipeline
+from .topic_assignment import (
+    SELECTION_STRATEGY_BATCHED,
+    SELECTION_STRATEGY_PER_AGENT,
+    SELECTION_STRATEGY_SOLVER,
+    assign_topics_batched,
+    resolve_selection_strategy,
+)
+from .topic_solver import assign_topics_solver
+from .topic_selection import (
+    build_already_selected_text,
+    build_recent_articles_text,
+    build_selection_request,
+    parse_selection_response,
+    prefilter_trend_candidates,
+    resolve_selected_candidate,
+    summarize_prefilter,
+)
+from .trends_snapshot import get_trends_snapshot
 
 load_env_files()
 
 
+# Estrategias donde el coordinador asigna todos los temas antes de lanzar los agentes en paralelo.
+COORDINATED_ASSIGNERS = {
+    SELECTION_STRATEGY_BATCHED: assign_topics_batched,
+    SELECTION_STRATEGY_SOLVER: assign_topics_solver,
+}
+
+
+def _read_agent_parallelism() -> int:
+    """Agentes simultáneos en modo batched (AGENT_PARALLELISM, 4 por defecto)."""
+    try:
+        return max(1, int(os.getenv("AGENT_PARALLELISM", "4")))
+    except ValueError:
+        return 4
+
+
 def _normalize_agent_id_params(agent_ids: Optional[List[Any]]) -> List[int]:
     """Normaliza IDs desde query/body (pueden llegar como str). Lista vacía => []."""
     if agent_ids is None:
@@ -709,7 +746,10 @@ class AutomatedTrendsAgent:
         }
 
     def select_trending_topic(self, trends_data: Dict[str, Any], user_id: int = None) -> Dict[str, Any]:
-        """Permite que ChatGPT seleccione la tendencia más relevante evitando repetir temas de TODOS los agentes"""
+        """Permite que ChatGPT seleccione la tendencia más relevante evitando repetir temas de TODOS los agentes.
+
+        Los gates deterministas corren antes del LLM: solo se le envían tendencias elegibles y la
+        llamada se omite si sobrevive una o ninguna."""
         try:
             trends_data = _validate_and_parse_data(trends_data, "trends_data")
             
@@ -717,296 +757,89 @@ class AutomatedTrendsAgent:
                 user_id = self.agent_config.get('userId', 5822)
             
             all_recent_articles = get_all_agents_recent_articles(self, limit_per_agent=2)
-            recent_articles_text = ""
-            
-            if all_recent_articles.get("status") == "success" and all_recent_articles.get("articles"):
-                recent_articles_text = "\nARTÍCULOS RECIENTES DE TODOS LOS AGENTES (para evitar repetir temas):\n"
-                recent_articles_text += f"🔍 Total: {all_recent_articles.get('total', 0)} artículos de {all_recent_articles.get('agents_processed', 0)} agentes\n\n"
-                
-                for i, article in enumerate(all_recent_articles["articles"][:15], 1):
-                    title = article.get('title', 'Sin título')
-                    excerpt = article.get('excerpt', 'Sin descripción')
-                    category = article.get('category', 'Sin categoría')
-                    agent_name = article.get('agent_name', 'Agente desconocido')
-                    
-                    if len(excerpt) > 100:
-                        excerpt = excerpt[:97] + "..."
-                    
-                    recent_articles_text += f"{i}. 📰 {title}\n"
-                    recent_articles_text += f"   👤 Agente: {agent_name}\n"
-                    recent_articles_text += f"   📝 {excerpt}\n"
-                    recent_articles_text += f"   🏷️ Categoría: {category}\n"
-                    recent_articles_text += "\n"
-                
-                if all_recent_articles.get('total', 0) > 15:
-                    remaining = all_recent_articles.get('total', 0) - 15
-                    recent_articles_text += f"... y {remaining} artículos más de otros agentes\n\n"
-                
-                recent_articles_text += "🚫 IMPORTANTE: EVITA ELEGIR TENDENCIAS que sean muy similares en CONTENIDO ESPECÍFICO a estos artículos recientes.\n"
-                recent_articles_text += "✅ Puedes elegir la MISMA CATEGORÍA (deportes, política, etc.) pero con un TEMA DIFERENTE.\n"
-                recent_articles_text += "💡 Ejemplo: Si hay un artículo sobre 'Messi gana Balón de Oro', puedes escribir sobre 'River vs Boca' (ambos deportes, pero temas diferentes).\n"
-                recent_articles_text += "🎯 Solo evita temas que hablen exactamente del mismo evento, persona o noticia específica.\n"
-            else:
-                recent_articles_text = "\n✨ (No se encontraron artículos recientes de ningún agente - primera ejecución del sistema)\n"
-            
-            already_selected_text = ""
-            if self._selected_trends_session:
-                already_selected_text = "\nTENDENCIAS YA SELECCIONADAS EN ESTA SESIÓN (NO ELEGIR ESTAS):\n"
-                for i, (pos, trend) in enumerate(zip(self._selected_positions_session, self._selected_trends_session), 1):
-                    already_selected_text += f"  ❌ Posición {pos}: {trend}\n"
-                already_selected_text += "\nEVITA ESTAS TENDENCIAS COMPLETAMENTE - Ya fueron elegidas por otros agentes en esta misma ejecución.\n"
-            
-            trends_text = ""
-            trending_topics = trends_data.get("trending_topics", [])
-            if isinstance(trending_topics, list) and trending_topics:
-                for i, topic in enumerate(trending_topics, 1):
-                    title = ""
-                    categories_text = ""
-                    search_volume = ""
-                    
-                    if isinstance(topic, dict):
-                        title = topic.get('title', '')
-                        if isinstance(title, dict):
-                            title = title.get('query', str(title))
-                        
-                        categories = topic.get('categories', [])
-                        if isinstance(categories, list) and categories:
-                            category_names = []
-                            for cat in categories:
-                                if isinstance(cat, dict):
-                                    cat_name = cat.get('name', '')
-                                    if cat_name:
-                                        category_names.append(cat_name)
-                                elif isinstance(cat, str):
-                                    category_names.append(cat)
-                            
-                            if category_names:
-                                categories_text = f" [Categorías: {', '.join(category_names)} ]"
-                        
-                        volume = topic.get('search_volume')
-                        if volume:
-                            search_volume = f" (Vol: {volume:,})"
-                            
-                    elif isinstance(topic, str):
-                        title = topic
-                    
-                    if title:
-                        if i in self._selected_positions_session or title in self._selected_trends_session:
-                            trends_text += f"{i}. ❌ {title}{categories_text}{search_volume} - [YA SELECCIONADA - NO USAR]\n"
-                        else:
-                            trends_text += f"{i}. {title}{categories_text}{search_volume}\n"
-            
-            selection_prompt = f"""Eres un editor de noticias especializado en Argentina. Te proporciono las 16 tendencias actuales más populares en Argentina.
-
-TENDENCIAS ACTUALES (últimas 24h):
-{trends_text}
-{recent_articles_text}
-{already_selected_text}
-
-🎯 OBJETIVO: ELEGIR UNA SOLA tendencia que sea MÁS RELEVANTE e INTERESANTE para el público argentino.
-
-💰 PRIORIDAD FIN.GURU (OBLIGATORIA):
-- Prioriza tendencias de economía, mercados, dólar, inflación, tasas, bancos, deuda, inversión y política fiscal.
-- Si una tendencia es masiva pero no financiera (farándula, reality, chimentos), debe descartarse.
-
-📋 CRITERIOS DE SELECCIÓN:
-{self.trending_prompt}
-
-👤 PERFIL DEL AGENTE (RESPETAR):
-- Audiencia objetivo: {self.target_audience}
-- Estilo: {self.writing_style}
-- Tono: {self.tone}
-- Categorías preferidas: {', '.join(self.preferred_categories) if self.preferred_categories else 'Sin preferencias explícitas'}
-- Temas prohibidos: {', '.join(self.forbidden_topics) if self.forbidden_topics else 'Sin temas prohibidos explícitos'}
-
-🚫 REGLAS ESTRICTAS - NO VIOLAR:
-- ❌ PROHIBIDO: NO elijas tendencias marcadas con "❌ [YA SELECCIONADA - NO USAR]"
-- ❌ PROHIBIDO: NO elijas tendencias triviales (efemérides, "noches temáticas", paros sin análisis, etc.)
-- ❌ PROHIBIDO: NO elijas tendencias sobre el MISMO evento/persona/noticia específica de los artículos recientes
-- ❌ PROHIBIDO: NO elijas tendencias alineadas con temas prohibidos del perfil
-- ✅ PERMITIDO: Puedes elegir la MISMA CATEGORÍA pero con tema específico diferente
-- ✅ OBLIGATORIO: SOLO elige entre las tendencias SIN marca ❌
-- 🔍 VALIDACIÓN: Si NINGUNA tendencia cumple con criterios, responde "NO_SUITABLE_TOPIC"
-
-🔍 ANÁLISIS REQUERIDO:
-1. RECHAZA: Temas triviales/contextuales (efemérides, "noche de X", paros sin contexto profundo)
-2. Revisa cada tendencia disponible (sin ❌)
-3. Compara CONTENIDO ESPECÍFICO (no categorías) con artículos recientes 
-4. Evalúa si habla del mismo evento/persona/noticia específica
-5. Elige tendencia con contenido diferente y valor investigativo
-6. Si NO encuentras tendencia adecuada, responde "NO_SUITABLE_TOPIC"
-
-FORMATO DE RESPUESTA OBLIGATORIO:
-POSICIÓN: [número del 1 al 16 O "NO_SUITABLE_TOPIC"]
-TÍTULO: [título exacto de la tendencia elegida O "NINGUNO"]
-RAZÓN: [explicación detallada de por qué la elegiste y cómo el CONTENIDO ESPECÍFICO es diferente a los artículos recientes, O por qué ninguna tendencia es adecuada]
-
-Ejemplo exitoso:
-POSICIÓN: 3
-TÍTULO: Dólar blue Argentina
-RAZÓN: Aunque hay artículos de economía recientes, este tema específico sobre el dólar blue es diferente del contenido ya publicado sobre inflación
-
-Ejemplo sin tema adecuado:
-POSICIÓN: NO_SUITABLE_TOPIC
-TÍTULO: NINGUNO
-RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos específicos ya cubiertos en artículos recientes"""
-
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Eres un editor experto en seleccionar noticias relevantes para Argentina. Evita repetir temas ya cubiertos y NUNCA elijas tendencias marcadas como YA SELECCIONADAS. Responde exactamente en el formato solicitado."}, 
-                    {"role": "user", "content": selection_prompt}
-                ],
-                max_tokens=150,  
-                temperature=0.3 
+            all_articles_list = all_recent_articles.get("articles", []) if all_recent_articles.get("status") == "success" else []
+            
+            trends_snapshot = get_trends_snapshot(trends_data)
+            prefilter = prefilter_trend_candidates(
+                self,
+                trends_snapshot,
+                all_articles_list,
+                self.pipeline_v2.policy_engine,
+                self._selected_positions_session,
+                self._selected_trends_session,
+            )
+            candidates = prefilter["eligible"]
+            prefilter_summary = summarize_prefilter(prefilter)
+            print(
+                f"   Pre-filtro determinista: {prefilter_summary['eligible']}/{prefilter_summary['total']} "
+                f"tendencias elegibles (descartes: {prefilter_summary['rejected']})"
             )
             
-            selection_response = response.choices[0].message.content.strip()
-            print(f"   Respuesta de selección: {selection_response}")
-            
-            lines = selection_response.split('\n')
-            selected_position = None
-            selected_title = None
-            selected_reason = None
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('POSICIÓN:'):
-                    position_text = line.replace('POSICIÓN:', '').strip()
-                    if position_text == "NO_SUITABLE_TOPIC":
-                        selected_position = "NO_SUITABLE_TOPIC"
-                    else:
-                        try:
-                            selected_position = int(position_text)
-                        except ValueError:
-                            pass
-                elif line.startswith('TÍTULO:'):
-                    selected_title = line.replace('TÍTULO:', '').strip()
-                    if selected_title == "NINGUNO":
-                        selected_title = "NO_SUITABLE_TOPIC"
-                elif line.startswith('RAZÓN:'):
-                    selected_reason = line.replace('RAZÓN:', '').strip()
-            
-            if selected_position == "NO_SUITABLE_TOPIC" or selected_title == "NO_SUITABLE_TOPIC":
-                print(f"   🚫 ChatGPT determinó que NO hay temas adecuados")
-                print(f"   Razón: {selected_reason}")
+            if not candidates:
+                print(f"   🚫 Ninguna tendencia superó los filtros deterministas")
                 return {
                     "status": "no_suitable_topic",
                     "message": "No se encontró ningún tema que cumpla con los criterios de calidad",
-                    "reason": selected_reason
-                }
-
-            selected_categories = []
-            if isinstance(selected_position, int):
-                trending_topics = trends_data.get("trending_topics", [])
-                if isinstance(trending_topics, list) and 1 <= selected_position <= len(trending_topics):
-                    selected_topic_payload = trending_topics[selected_position - 1]
-                    if isinstance(selected_topic_payload, dict):
-                        selected_categories = selected_topic_payload.get("categories", [])
-
-            financial_relevance = self.pipeline_v2.policy_engine.evaluate_financial_relevance(
-                selected_title,
-                selected_categories,
-            )
-
-            if not financial_relevance.get("allowed"):
-                print(f"   🚫 Tema rechazado por baja relevancia financiera: {selected_title}")
-                return {
-                    "status": "no_suitable_topic",
-                    "message": "Tema fuera de foco financiero para FinGuru",
-                    "reason": (
-                        f"Score financiero insuficiente ({financial_relevance.get('score', 0)}) "
-                        f"| hard_block_hits={financial_relevance.get('hard_block_hits', [])}"
-                    ),
-                }
-
-            forbidden_hits = []
-            if selected_title:
-                selected_title_lc = selected_title.lower()
-                forbidden_hits = [
-                    topic
-                    for topic in self.forbidden_topics
-                    if isinstance(topic, str) and topic.strip() and topic.strip().lower() in selected_title_lc
-                ]
-
-            if forbidden_hits:
-                print(f"   🚫 Tema rechazado por forbidden_topics: {forbidden_hits}")
-                return {
-                    "status": "no_suitable_topic",
-                    "message": "Tema rechazado por restricciones del perfil del agente",
-                    "reason": f"Coincide con forbidden_topics: {', '.join(forbidden_hits)}"
+                    "reason": f"Ninguna tendencia elegible tras filtros deterministas: {prefilter_summary['rejected']}",
+                    "prefilter": prefilter_summary,
                 }
             
-            if selected_position in self._selected_positions_session or selected_title in self._selected_trends_session:
-                print(f"   ⚠️  ADVERTENCIA: ChatGPT eligió una tendencia ya seleccionada. Buscando alternativa...")
+            if len(candidates) == 1:
+                selected_item = candidates[0]
+                selected_reason = "Única tendencia elegible tras filtros deterministas (sin llamada al LLM)"
+                llm_skipped = True
+            else:
+                selection_request = build_selection_request(
+                    self,
+                    candidates,
+                    build_recent_articles_text(all_recent_articles),
+                    build_already_selected_text(self._selected_positions_session, self._selected_trends_session),
+                )
                 
-                trending_topics = trends_data.get("trending_topics", [])
-                for i, topic in enumerate(trending_topics, 1):
-                    if i not in self._selected_positions_session:
-                        title = ""
-                        if isinstance(topic, dict):
-                            title = topic.get('title', '')
-                            if isinstance(title, dict):
-                                title = title.get('query', str(title))
-                        elif isinstance(topic, str):
-                            title = topic
-                        
-                        if title and title not in self._selected_trends_session:
-                            all_articles_list = all_recent_articles.get("articles", [])
-                            if not _is_topic_similar_to_recent_articles(title, all_articles_list):
-                                selected_position = i
-                                selected_title = title
-                                selected_reason = "Selección automática para evitar duplicados"
-                                print(f"   ✅ Alternativa encontrada: Posición #{i} - {title}")
-                                break
-                else:
-                    return {"status": "error", "message": "No hay tendencias disponibles que no se relacionen con artículos recientes de todos los agentes"}
-            
-            if selected_title and all_recent_articles.get("articles"):
-                all_articles_list = all_recent_articles.get("articles", [])
-                if _is_topic_similar_to_recent_articles(selected_title, all_articles_list):
-                    print(f"   ⚠️  ADVERTENCIA: La tendencia '{selected_title}' es muy similar a artículos recientes de todos los agentes")
-                    
-                    trending_topics = trends_data.get("trending_topics", [])
-                    for i, topic in enumerate(trending_topics, 1):
-                        if i not in self._selected_positions_session:
-                            title = _extract_trend_title(trends_data, i)
-                            if title and title not in self._selected_trends_session:
-                                if not _is_topic_similar_to_recent_articles(title, all_articles_list):
-                                    selected_position = i
-                                    selected_title = title
-                                    selected_reason = "Selección automática para evitar repetición temática"
-                                    print(f"   ✅ Alternativa sin similitud encontrada: Posición #{i} - {title}")
-                                    break
-                    else:
-                        print(f"   ⚠️  No se encontró alternativa, procediendo con la selección original (puede haber similitud con todos los agentes)")
-            
-            if selected_position and selected_title:
-                # NUEVO: Verificar que no sea un tema trivial/contextual
-                if _is_topic_trivial_or_contextual(selected_title):
-                    print(f"   ⚠️  RECHAZO: Tema '{selected_title}' es trivial/contextual")
+                response = create_chat_completion(self, "selection", **selection_request)
+                
+                selection_response = response.choices[0].message.content.strip()
+                print(f"   Respuesta de selección: {selection_response}")
+                
+                parsed = parse_selection_response(selection_response)
+                if parsed["no_suitable_topic"]:
+                    print(f"   🚫 ChatGPT determinó que NO hay temas adecuados")
+                    print(f"   Razón: {parsed['reason']}")
                     return {
                         "status": "no_suitable_topic",
-                        "message": "Tema seleccionado es trivial o contextual sin valor investigativo",
-                        "reason": "El tema seleccionado no cumple estándares de calidad editorial (tema superficial, sin análisis profundo)"
+                        "message": "No se encontró ningún tema que cumpla con los criterios de calidad",
+                        "reason": parsed["reason"],
+                        "prefilter": prefilter_summary,
                     }
                 
-                self._selected_positions_session.add(selected_position)
-                self._selected_trends_session.add(selected_title)
-                
-                print(f"   ChatGPT eligió: Posición #{selected_position} - {selected_title}")
-                print(f"   Razón: {selected_reason}")
-                print(f"   📝 Registrado para evitar duplicados futuros")
-                
-                return {
-                    "status": "success",
-                    "selected_position": selected_position,
-                    "selected_title": selected_title,
-                    "selected_reason": selected_reason
-                }
+                selected_item, matched = resolve_selected_candidate(parsed, candidates)
+                selected_reason = parsed["reason"]
+                if not matched:
+                    print(f"   ⚠️  ChatGPT eligió una tendencia fuera de las elegibles ({parsed['position']} - {parsed['title']}). Usando la primera elegible...")
+                    selected_reason = "Selección automática: la elección del LLM no estaba entre las tendencias elegibles"
+                llm_skipped = False
+            
+            selected_position = selected_item.position
+            selected_title = selected_item.title
+            
+            self._selected_positions_session.add(selected_position)
+            self._selected_trends_session.add(selected_title)
+            
+            if llm_skipped:
+                print(f"   Selección determinista (sin LLM): Posición #{selected_position} - {selected_title}")
             else:
-                print(f"   No se pudo parsear la respuesta de selección")
-                return {"status": "error", "message": "No se pudo parsear la selección"}
+                print(f"   ChatGPT eligió: Posición #{selected_position} - {selected_title}")
+            print(f"   Razón: {selected_reason}")
+            print(f"   📝 Registrado para evitar duplicados futuros")
+            
+            return {
+                "status": "success",
+                "selected_position": selected_position,
+                "selected_title": selected_title,
+                "selected_reason": selected_reason,
+                "llm_skipped": llm_skipped,
+                "prefilter": prefilter_summary,
+            }
                 
         except Exception as e:
             print(f"   Error en selección de tendencia: {str(e)}")
@@ -1117,6 +950,7 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
         topic_position: int = None,
         dry_run: bool = False,
         correlation_id: Optional[str] = None,
+        preselected_topic: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Ejecuta pipeline v2 desacoplado con respuesta estructurada y trazabilidad."""
         return self.pipeline_v2.execute(
@@ -1125,6 +959,7 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
             topic_position=topic_position,
             dry_run=dry_run,
             correlation_id=correlation_id,
+            preselected_topic=preselected_topic,
         )
 
     def run_multi_agent_process_v2(
@@ -1133,8 +968,17 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
         dry_run: bool = False,
         request_correlation_id: Optional[str] = None,
         agent_ids: Optional[List[int]] = None,
+        selection_strategy: Optional[str] = None,
+        execution_mode: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Ejecuta múltiples agentes bajo el contrato v2 con trazabilidad por ejecución."""
+        """Ejecuta múltiples agentes bajo el contrato v2 con trazabilidad por ejecución.
+
+        Con `selection_strategy="batched"` (o TOPIC_SELECTION_STRATEGY) el coordinador asigna los temas
+        de todos los agentes en una sola llamada y los agentes corren en paralelo (AGENT_PARALLELISM).
+        `"solver"` hace la misma asignación sin LLM, con una matriz de puntajes y asignación óptima.
+
+        Con `execution_mode="batch"` (o AGENT_EXECUTION_MODE) las llamadas LLM se envían a la API batch
+        y se devuelve `status="submitted"` con el `job_id`; ver `resume_multi_agent_process_v2_batch`."""
         try:
             request_correlation_id = request_correlation_id or str(uuid.uuid4())
             print(f"[{datetime.now()}] Iniciando proceso multi-agente v2 (correlation_id={request_correlation_id})...")
@@ -1197,16 +1041,65 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
                     }
                 agents = filtered
 
-            results = []
-            for agent in agents:
-                agent_correlation_id = f"{request_correlation_id}:{agent.agent_id}"
-                result = agent.run_automated_process_with_shared_trends_v2(
-                    shared_trends_data=shared_trends_data,
-                    topic_position=topic_position,
-                    dry_run=dry_run,
-                    correlation_id=agent_correlation_id,
+            if resolve_execution_mode(execution_mode) == EXECUTION_MODE_BATCH:
+                # En batch la selección es por agente dentro de las rondas, con conflictos resueltos en orden.
+                return BatchRunner(self).submit(
+                    shared_trends_data,
+                    agents,
+                    topic_position,
+                    dry_run,
+                    request_correlation_id,
+                    requested_agent_ids,
                 )
-                results.append(result)
+
+            strategy = resolve_selection_strategy(selection_strategy)
+            if topic_position is not None:
+                strategy = SELECTION_STRATEGY_PER_AGENT
+
+            coordinator_usage = None
+            assignment_report = None
+            if strategy in COORDINATED_ASSIGNERS:
+                self.llm_usage = UsageTracker()
+                try:
+                    batched = COORDINATED_ASSIGNERS[strategy](
+                        self,
+                        agents,
+                        get_trends_snapshot(shared_trends_data),
+                        self.pipeline_v2.policy_engine,
+                    )
+                finally:
+                    coordinator_usage = self.llm_usage.summary()
+                    self.llm_usage = None
+                assignment_report = batched["llm"]
+
+                for selection in batched["assignments"].values():
+                    if selection.get("status") == "success":
+                        self._selected_positions_session.add(selection["selected_position"])
+                        self._selected_trends_session.add(selection["selected_title"])
+
+                def run_agent(agent: "AutomatedTrendsAgent") -> Dict[str, Any]:
+                    return agent.run_automated_process_with_shared_trends_v2(
+                        shared_trends_data=shared_trends_data,
+                        topic_position=topic_position,
+                        dry_run=dry_run,
+                        correlation_id=f"{request_correlation_id}:{agent.agent_id}",
+                        preselected_topic=batched["assignments"].get(agent.agent_id),
+                    )
+
+                max_workers = max(1, min(_read_agent_parallelism(), len(agents)))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(run_agent, agents))
+            else:
+                results = []
+                for agent in agents:
+                    agent_correlation_id = f"{request_correlation_id}:{agent.agent_id}"
+                    result = agent.run_automated_process_with_shared_trends_v2(
+                        shared_trends_data=shared_trends_data,
+                        topic_position=topic_position,
+                        dry_run=dry_run,
+                        correlation_id=agent_correlation_id,
+                    )
+                    results.append(result)
 
             successful = [r for r in results if r.get("status") == "success"]
             skipped = [r for r in results if r.get("status") == "skipped"]
@@ -1220,6 +1113,14 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
                 "skipped": len(skipped),
                 "failed": len(failed),
                 "requested_agent_ids": requested_agent_ids,
+                "selection_strategy": strategy,
+                "topic_assignment": assignment_report,
+                "usage": aggregate_usage(
+                    [("coordinator", coordinator_usage)]
+                    + [(r.get("agent", {}).get("id"), r.get("usage")) for r in results]
+                ),
+                "model_latency": get_latency_tracker().snapshot(),
+                "rate_limiter": get_openai_rate_limiter().snapshot(),
             }
 
             return {
@@ -1238,6 +1139,33 @@ RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos espe
                 "message": f"Error general en proceso multi-agente v2: {str(e)}",
             }
 
+    def resume_multi_agent_process_v2_batch(self, job_id: str) -> Dict[str, Any]:
+        """Consulta la ronda batch en curso de `job_id`, aplica sus respuestas y envía la siguiente."""
+        try:
+            agents = self.initialize_agents()
+            return BatchRunner(self).resume(job_id, agents or [])
+        except BatchJobBusy as e:
+            return {
+                "status": "busy",
+                "contract_version": "v2",
+                "message": str(e),
+                "job_id": job_id,
+            }
+        except KeyError as e:
+            return {
+                "status": "error",
+                "contract_version": "v2",
+                "message": str(e).strip("'\""),
+                "job_id": job_id,
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "contract_version": "v2",
+                "message": f"Error reanudando job batch v2: {str(e)}",
+                "job_id": job_id,
+            }
+
 def run_trends_agent(topic_position: int = None):
     agent = AutomatedTrendsAgent()
     return agent.run_automated_process(topic_position)
@@ -1252,6 +1180,8 @@ def run_multi_trends_agents_v2(
     dry_run: bool = False,
     correlation_id: Optional[str] = None,
     agent_ids: Optional[List[int]] = None,
+    selection_strategy: Optional[str] = None,
+    execution_mode: Optional[str] = None,
 ):
     coordinator = AutomatedTrendsAgent()
     return coordinator.run_multi_agent_process_v2(
@@ -1259,8 +1189,15 @@ def run_multi_trends_agents_v2(
         dry_run=dry_run,
         request_correlation_id=correlation_id,
         agent_ids=agent_ids,
+        selection_strategy=selection_strategy,
+        execution_mode=execution_mode,
     )
 
+
+def resume_multi_trends_agents_v2_batch(job_id: str):
+    coordinator = AutomatedTrendsAgent()
+    return coordinator.resume_multi_agent_process_v2_batch(job_id)
+
 def get_available_agents_standalone():
     agent = AutomatedTrendsAgent()
     return get_available_agents(agent)
@@ -0,0 +1,802 @@
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .agent_api_utils import get_all_agents_recent_articles
+from .agent_content_utils import build_generation_request
+from .llm_usage import UsageTracker, aggregate_usage
+from .token_utils import count_tokens
+from .topic_selection import (
+    build_recent_articles_text,
+    build_selection_request,
+    parse_selection_response,
+    prefilter_trend_candidates,
+    resolve_selected_candidate,
+    summarize_prefilter,
+)
+from .trends_snapshot import get_trends_snapshot
+
+
+EXECUTION_MODE_INTERACTIVE = "interactive"
+EXECUTION_MODE_BATCH = "batch"
+EXECUTION_MODES = {EXECUTION_MODE_INTERACTIVE, EXECUTION_MODE_BATCH}
+
+BATCH_PROVIDER_OPENAI = "openai"
+BATCH_PROVIDER_LOCAL = "local"
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+# La API batch de OpenAI cobra la mitad del precio interactivo.
+BATCH_PRICE_FACTOR = 0.5
+
+PHASE_SELECTION = "selection"
+PHASE_OUTLINE = "outline"
+PHASE_GENERATION = "generation"
+PHASE_REVIEW = "review"
+PHASE_DONE = "done"
+
+_OPENAI_PENDING_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
+
+# Un lock de reanudación más viejo que esto se considera de un proceso caído y se descarta.
+DEFAULT_BATCH_LOCK_STALE_SECONDS = 3600
+
+BATCH_JOB_STORE_MONGO = "mongo"
+BATCH_JOB_STORE_FILE = "file"
+BATCH_JOBS_COLLECTION = "batch_jobs"
+_JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def resolve_execution_mode(mode: Optional[str] = None) -> str:
+    """Modo explícito o AGENT_EXECUTION_MODE (interactive por defecto)."""
+    candidate = (mode or os.getenv("AGENT_EXECUTION_MODE", EXECUTION_MODE_INTERACTIVE) or "").strip().lower()
+    if candidate not in EXECUTION_MODES:
+        print(f"   ⚠️ Modo de ejecución desconocido '{candidate}', usando {EXECUTION_MODE_INTERACTIVE}")
+        return EXECUTION_MODE_INTERACTIVE
+    return candidate
+
+
+class BatchJobBusy(RuntimeError):
+    """Otra reanudación del mismo job está en curso; reintentar cuando termine."""
+
+
+class BatchStorageNotConfigured(RuntimeError):
+    """El modo batch no tiene un almacenamiento durable y compartido para el estado de los jobs."""
+
+
+def read_batch_lock_stale_seconds() -> int:
+    try:
+        value = int(os.getenv("BATCH_LOCK_STALE_SECONDS", str(DEFAULT_BATCH_LOCK_STALE_SECONDS)))
+    except ValueError:
+        return DEFAULT_BATCH_LOCK_STALE_SECONDS
+    return value if value > 0 else DEFAULT_BATCH_LOCK_STALE_SECONDS
+
+
+def read_batch_jobs_dir() -> str:
+    """
+    BATCH_JOBS_DIR: directorio del store en disco. Sin default: un job espera hasta 24 h y la
+    reanudación puede caer en otra instancia, así que debe ser un montaje persistente y compartido.
+    """
+    root = os.getenv("BATCH_JOBS_DIR")
+    if not root:
+        raise BatchStorageNotConfigured(
+            "BATCH_JOBS_DIR no está configurado: el store en disco del modo batch necesita un montaje "
+            "persistente compartido entre instancias (o usar BATCH_JOB_STORE=mongo)"
+        )
+    return root
+
+
+def _validate_job_id(job_id: str) -> str:
+    if not _JOB_ID_PATTERN.fullmatch(str(job_id)):
+        raise KeyError(f"job_id inválido: {job_id}")
+    return str(job_id)
+
+
+def _write_requests_file(path: str, requests: List[Dict[str, Any]]) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        for request in requests:
+            handle.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+
+class BatchJobStore:
+    """Estado de los jobs batch en disco: `<root>/<job_id>/job.json` más los JSONL de cada ronda."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or read_batch_jobs_dir()
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, _validate_job_id(job_id))
+
+    def create(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job["job_id"] = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job["job_id"]), exist_ok=True)
+        self.save(job)
+        return job
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        path = os.path.join(self._job_dir(job_id), "job.json")
+        if not os.path.exists(path):
+            raise KeyError(f"No existe el job batch {job_id}")
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = datetime.utcnow().isoformat() + "Z"
+        path = os.path.join(self._job_dir(job["job_id"]), "job.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(job, handle, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def lock(self, job_id: str) -> Iterator[None]:
+        """
+        Lock exclusivo de reanudación (`resume.lock` creado con O_EXCL): dos resume simultáneos del
+        mismo job no aplican dos veces la misma ronda ni publican dos veces. Lanza `BatchJobBusy`.
+        """
+        path = os.path.join(self._job_dir(job_id), "resume.lock")
+        if not os.path.exists(os.path.dirname(path)):
+            raise KeyError(f"No existe el job batch {job_id}")
+        try:
+            if time.time() - os.path.getmtime(path) > read_batch_lock_stale_seconds():
+                print(f"   ⚠️ Lock de reanudación vencido para el job {job_id}, descartándolo")
+                os.remove(path)
+        except OSError:
+            pass
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise BatchJobBusy(f"El job batch {job_id} ya se está reanudando")
+        try:
+            os.write(fd, str(os.getpid()).encode("utf-8"))
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def write_requests(self, job_id: str, round_number: int, requests: List[Dict[str, Any]]) -> str:
+        return _write_requests_file(os.path.join(self._job_dir(job_id), f"round_{round_number}.input.jsonl"), requests)
+
+
+def _mongo_batch_collection() -> Any:
+    # Import diferido: pymongo solo hace falta con el store en Mongo.
+    from db import connect_to_mongo, db as mongo
+
+    if mongo.db is None:
+        connect_to_mongo()
+    return mongo.db[BATCH_JOBS_COLLECTION]
+
+
+class MongoBatchJobStore:
+    """
+    Estado de los jobs batch en Mongo (colección `batch_jobs`), visible desde cualquier instancia.
+    El job va serializado como JSON en `state` (sus claves vienen de APIs externas); el lock de
+    reanudación es un compare-and-set sobre `resume_lock`. Los JSONL de cada ronda solo se escriben
+    en un directorio temporal local, porque el proveedor los sube en el momento.
+    """
+
+    def __init__(self, collection: Any = None):
+        self.collection = collection if collection is not None else _mongo_batch_collection()
+
+    def create(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job["job_id"] = uuid.uuid4().hex
+        self.save(job)
+        return job
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        document = self.collection.find_one({"_id": _validate_job_id(job_id)}, {"state": 1})
+        if document is None:
+            raise KeyError(f"No existe el job batch {job_id}")
+        return json.loads(document["state"])
+
+    def save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = datetime.utcnow().isoformat() + "Z"
+        self.collection.update_one(
+            {"_id": job["job_id"]},
+            {"$set": {
+                "state": json.dumps(job, ensure_ascii=False),
+                "status": job.get("status"),
+                "updated_at": job["updated_at"],
+            }},
+            upsert=True,
+        )
+
+    @contextmanager
+    def lock(self, job_id: str) -> Iterator[None]:
+        """Como `BatchJobStore.lock`, pero válido entre instancias. Lanza `BatchJobBusy`."""
+        job_id = _validate_job_id(job_id)
+        owner = uuid.uuid4().hex
+        acquired = self.collection.find_one_and_update(
+            {
+                "_id": job_id,
+                "$or": [
+                    {"resume_lock": None},
+                    {"resume_lock.acquired_at": {"$lt": time.time() - read_batch_lock_stale_seconds()}},
+                ],
+            },
+            {"$set": {"resume_lock": {"owner": owner, "acquired_at": time.time()}}},
+        )
+        if acquired is None:
+            if self.collection.find_one({"_id": job_id}, {"_id": 1}) is None:
+                raise KeyError(f"No existe el job batch {job_id}")
+            raise BatchJobBusy(f"El job batch {job_id} ya se está reanudando")
+        try:
+            yield
+        finally:
+            self.collection.update_one({"_id": job_id, "resume_lock.owner": owner}, {"$set": {"resume_lock": None}})
+
+    def write_requests(self, job_id: str, round_number: int, requests: List[Dict[str, Any]]) -> str:
+        directory = os.path.join(tempfile.gettempdir(), "finguru_batch_requests", _validate_job_id(job_id))
+        return _write_requests_file(os.path.join(directory, f"round_{round_number}.input.jsonl"), requests)
+
+
+def resolve_batch_job_store(name: Optional[str] = None) -> Any:
+    """
+    Store explícito o BATCH_JOB_STORE: `mongo` (por defecto si hay MONGODB_URI) o `file`
+    (requiere BATCH_JOBS_DIR). Lanza `BatchStorageNotConfigured` si no hay ninguno durable.
+    """
+    default = BATCH_JOB_STORE_MONGO if os.getenv("MONGODB_URI") else BATCH_JOB_STORE_FILE
+    store_name = (name or os.getenv("BATCH_JOB_STORE") or default).strip().lower()
+    if store_name == BATCH_JOB_STORE_MONGO:
+        try:
+            return MongoBatchJobStore()
+        except Exception as e:
+            raise BatchStorageNotConfigured(f"No se pudo usar Mongo para los jobs batch: {str(e)}")
+    return BatchJobStore()
+
+
+def check_batch_storage() -> None:
+    """Al arrancar: si AGENT_EXECUTION_MODE=batch, falla sin un store durable en vez de perder jobs."""
+    if resolve_execution_mode() == EXECUTION_MODE_BATCH:
+        store = resolve_batch_job_store()
+        print(f"📦 Modo batch con store {type(store).__name__}")
+
+
+def _parse_batch_output(text: str) -> Dict[str, Dict[str, Any]]:
+    """Líneas de salida de la API batch → {custom_id: {"body": ..., "error": ...}}."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for line in (text or "").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        error = entry.get("error")
+        if not error and int(response.get("status_code", 200) or 200) >= 400:
+            error = (response.get("body") or {}).get("error") or f"status_code {response.get('status_code')}"
+        results[entry["custom_id"]] = {"body": response.get("body") if not error else None, "error": error}
+    return results
+
+
+class OpenAIBatchProvider:
+    """Sube el JSONL a la API batch de OpenAI (`/v1/chat/completions`, ventana de 24 h)."""
+
+    name = BATCH_PROVIDER_OPENAI
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def submit(self, input_path: str, metadata: Dict[str, str]) -> str:
+        with open(input_path, "rb") as handle:
+            batch_file = self.client.files.create(file=handle, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+            metadata=metadata,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        status = batch.status
+        if status in _OPENAI_PENDING_STATUSES:
+            return {"status": "pending", "provider_status": status}
+        if status != "completed":
+            return {"status": "failed", "provider_status": status}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if file_id:
+                results.update(_parse_batch_output(self.client.files.content(file_id).text))
+        return {"status": "completed", "provider_status": status, "results": results}
+
+
+_STUB_PARAGRAPH = (
+    "Según datos del BCRA, las reservas internacionales cayeron un 4,5% en el último mes, mientras que "
+    "el dólar blue cerró en $1.250 y la brecha con el oficial se ubicó en 18%. Este contexto de volatilidad "
+    "cambiaria impacta en la estrategia de las empresas, que ajustan precios y posponen inversiones ante la "
+    "incertidumbre sobre la política monetaria. En comparación con Chile y Brasil, la Argentina mantiene una "
+    "inflación mensual más alta, lo que erosiona la confianza y limita el crédito."
+)
+_STUB_SECTIONS = (
+    "Situación actual y contexto",
+    "Análisis de causas y factores",
+    "Comparación internacional e impacto global",
+    "Implicancias y consecuencias",
+    "Perspectiva estratégica y outlook futuro",
+)
+_STUB_TREND_LINE = re.compile(r"^(\d+)\. (.+?)(?: \[Categorías:| \(Vol:|$)")
+
+
+def offline_stub_response(stage: str, body: Dict[str, Any]) -> str:
+    """Respuestas deterministas por etapa para probar el flujo batch sin red."""
+    prompt = str((body.get("messages") or [{}])[-1].get("content", ""))
+    if stage == PHASE_SELECTION:
+        for line in prompt.splitlines():
+            match = _STUB_TREND_LINE.match(line.strip())
+            if match:
+                return f"POSICIÓN: {match.group(1)}\nTÍTULO: {match.group(2)}\nRAZÓN: Respuesta local de prueba"
+        return "POSICIÓN: NO_SUITABLE_TOPIC\nTÍTULO: NINGUNO\nRAZÓN: Sin tendencias en el prompt"
+    if stage == PHASE_OUTLINE:
+        return "\n".join(f"{index}) {section}" for index, section in enumerate(_STUB_SECTIONS, start=1))
+    if stage == PHASE_GENERATION:
+        lines = ["# Artículo de prueba del modo batch", "", "**CATEGORÍA:** Economía y Finanzas", ""]
+        for section in _STUB_SECTIONS:
+            lines.extend([f"## {section}", "", _STUB_PARAGRAPH, "", _STUB_PARAGRAPH, ""])
+        return "\n".join(lines)
+    if stage == "fact_check":
+        return "VERDICT: PASS\nISSUES:\n"
+    if stage == "devil_advocate":
+        return "- Sumar una cifra de contraste\n- Acortar la introducción\n- Cerrar con un escenario concreto"
+    if stage == PHASE_REVIEW:
+        return json.dumps({"verdict": "PASS", "issues": [], "critique": ["Sumar una cifra de contraste"]})
+    return ""
+
+
+class LocalStubBatchProvider:
+    """
+    Sustituto local de la API batch: responde cada línea con `responder(stage, body)` al enviarla y
+    deja la salida en un JSONL junto a la entrada, con el mismo formato que OpenAI.
+    """
+
+    name = BATCH_PROVIDER_LOCAL
+
+    def __init__(self, responder: Optional[Callable[[str, Dict[str, Any]], str]] = None):
+        self.responder = responder or offline_stub_response
+
+    def submit(self, input_path: str, metadata: Dict[str, str]) -> str:
+        output_path = input_path.replace(".input.jsonl", ".output.jsonl")
+        with open(input_path, "r", encoding="utf-8") as source, open(output_path, "w", encoding="utf-8") as target:
+            for line in source:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                stage = request["custom_id"].split(":", 1)[1]
+                content = self.responder(stage, request["body"])
+                prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in request["body"].get("messages", []))
+                completion_tokens = count_tokens(content)
+                body = {
+                    "model": request["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+                target.write(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": body},
+                    "error": None,
+                }, ensure_ascii=False) + "\n")
+        return output_path
+
+    def poll(self, batch_id: str) -> Dict[str, Any]:
+        if not os.path.exists(batch_id):
+            return {"status": "failed", "provider_status": "missing_output"}
+        with open(batch_id, "r", encoding="utf-8") as handle:
+            return {"status": "completed", "provider_status": "completed", "results": _parse_batch_output(handle.read())}
+
+
+def resolve_batch_provider(coordinator: Any, name: Optional[str] = None) -> Any:
+    """Proveedor explícito o BATCH_PROVIDER (openai por defecto; `local` para pruebas offline)."""
+    provider_name = (name or os.getenv("BATCH_PROVIDER", BATCH_PROVIDER_OPENAI) or "").strip().lower()
+    if provider_name == BATCH_PROVIDER_LOCAL:
+        return LocalStubBatchProvider()
+    return OpenAIBatchProvider(coordinator.openai_client)
+
+
+def _as_response(value: Any) -> Any:
+    """dict anidado → objeto con atributos, para reutilizar `UsageTracker.record` con cuerpos batch."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _as_response(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_as_response(item) for item in value]
+    return value
+
+
+class BatchRunner:
+    """
+    Ejecuta el pipeline v2 de varios agentes por rondas batch.
+
+    Cada ronda agrupa en un JSONL las llamadas LLM pendientes de todos los agentes (selección,
+    outline, redacción y revisión); al reanudar se aplican las respuestas y se arma la ronda
+    siguiente. Cuando un agente tiene su revisión, se completa con `TrendsPipeline.resume_from_draft`
+    (validación, reintento de calidad interactivo si hace falta, policy y publicación).
+    """
+
+    def __init__(self, coordinator: Any, provider: Any = None, store: Any = None):
+        self.coordinator = coordinator
+        self.pipeline = coordinator.pipeline_v2
+        self.provider = provider or resolve_batch_provider(coordinator)
+        self.store = store or resolve_batch_job_store()
+
+    # ---- ciclo de vida del job ----
+
+    def submit(
+        self,
+        shared_trends_data: Dict[str, Any],
+        agents: List[Any],
+        topic_position: Optional[int],
+        dry_run: bool,
+        correlation_id: str,
+        requested_agent_ids: Optional[List[int]],
+    ) -> Dict[str, Any]:
+        all_recent_articles = get_all_agents_recent_articles(self.coordinator, limit_per_agent=2)
+        job = self.store.create({
+            "status": "running",
+            "provider": self.provider.name,
+            "correlation_id": correlation_id,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "topic_position": topic_position,
+            "dry_run": dry_run,
+            "requested_agent_ids": requested_agent_ids,
+            "agent_ids": [agent.agent_id for agent in agents],
+            "trends_data": shared_trends_data,
+            "recent_articles": all_recent_articles,
+            "taken_positions": [],
+            "rounds": [],
+            "agents": {
+                str(agent.agent_id): {"phase": PHASE_SELECTION, "pending": {}, "usage_records": [], "timings": {}}
+                for agent in agents
+            },
+        })
+        return self._advance(job, {agent.agent_id: agent for agent in agents})
+
+    def resume(self, job_id: str, agents: List[Any]) -> Dict[str, Any]:
+        with self.store.lock(job_id):
+            return self._resume_locked(job_id, agents)
+
+    def _resume_locked(self, job_id: str, agents: List[Any]) -> Dict[str, Any]:
+        job = self.store.load(job_id)
+        if job["status"] != "running":
+            return self._payload(job)
+
+        current = job["rounds"][-1]
+        polled = self.provider.poll(current["provider_batch_id"])
+        if polled["status"] == "pending":
+            return {**self._payload(job), "provider_status": polled.get("provider_status")}
+        current["completed_at"] = datetime.utcnow().isoformat() + "Z"
+        current["provider_status"] = polled.get("provider_status")
+
+        results = polled.get("results", {})
+        for agent_id, state in job["agents"].items():
+            for stage, entry in state["pending"].items():
+                entry["result"] = results.get(f"{agent_id}:{stage}") or {
+                    "body": None,
+                    "error": f"Lote {polled.get('provider_status')}: sin respuesta",
+                }
+
+        agents_by_id = {agent.agent_id: agent for agent in agents if agent.agent_id in job["agent_ids"]}
+        return self._advance(job, agents_by_id)
+
+    def _advance(self, job: Dict[str, Any], agents_by_id: Dict[Any, Any]) -> Dict[str, Any]:
+        requests: List[Dict[str, Any]] = []
+        for agent_id in job["agent_ids"]:
+            state = job["agents"][str(agent_id)]
+            agent = agents_by_id.get(agent_id)
+            if state["phase"] == PHASE_DONE:
+                continue
+            if agent is None:
+                state["phase"] = PHASE_DONE
+                state["result"] = {
+                    "status": "error",
+                    "agent": {"id": agent_id},
+                    "message": "El agente ya no está disponible al reanudar el batch",
+                }
+                continue
+            try:
+                new_requests = self._step_agent(job, agent, state)
+            except Exception as e:
+                print(f"   ❌ Agente {agent_id} falló en la fase {state['phase']} del batch: {str(e)}")
+                new_requests = {}
+                state["pending"] = {}
+                self._finish(agent, state, {
+                    "status": "error",
+                    "agent": {"id": agent_id, "name": getattr(agent, "agent_name", None)},
+                    "message": f"Error en la fase {state['phase']} del batch: {str(e)}",
+                })
+            if state["phase"] == PHASE_DONE:
+                # Guardar apenas termina (y quizá publicó): un fallo posterior no lo re-publica.
+                self.store.save(job)
+            for stage, body in new_requests.items():
+                requests.append({"custom_id": f"{agent_id}:{stage}", "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+
+        if requests:
+            round_number = len(job["rounds"]) + 1
+            input_path = self.store.write_requests(job["job_id"], round_number, requests)
+            provider_batch_id = self.provider.submit(
+                input_path,
+                {"job_id": job["job_id"], "correlation_id": job["correlation_id"], "round": str(round_number)},
+            )
+            job["rounds"].append({
+                "round": round_number,
+                "requests": len(requests),
+                "stages": sorted({request["custom_id"].split(":", 1)[1] for request in requests}),
+                "provider_batch_id": provider_batch_id,
+                "submitted_at": datetime.utcnow().isoformat() + "Z",
+            })
+            print(f"   📦 Ronda batch {round_number} enviada ({len(requests)} requests, job {job['job_id']})")
+        else:
+            job["status"] = "completed"
+            job["completed_at"] = datetime.utcnow().isoformat() + "Z"
+
+        self.store.save(job)
+        return self._payload(job)
+
+    # ---- máquina de estados por agente ----
+
+    def _step_agent(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Avanza al agente lo posible; devuelve las requests que necesita (vacío si terminó)."""
+        while state["phase"] != PHASE_DONE:
+            pending = state["pending"]
+            if pending and any("result" not in entry for entry in pending.values()):
+                return {}
+            answers = {stage: self._take_answer(state, stage, entry) for stage, entry in pending.items()}
+            state["pending"] = {}
+            handler = getattr(self, f"_phase_{state['phase']}")
+            new_requests = handler(job, agent, state, answers)
+            if new_requests:
+                state["pending"] = {stage: {"model": body.get("model")} for stage, body in new_requests.items()}
+                return new_requests
+        return {}
+
+    @staticmethod
+    def _take_answer(state: Dict[str, Any], stage: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        result = entry.get("result") or {}
+        body = result.get("body")
+        if body:
+            state["usage_records"].append({"stage": stage, "model": entry.get("model"), "body": body})
+            choices = body.get("choices") or [{}]
+            return {"text": (choices[0].get("message") or {}).get("content") or "", "model": entry.get("model")}
+        return {"text": None, "model": entry.get("model"), "error": str(result.get("error") or "sin respuesta")}
+
+    def _phase_selection(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any], answers: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = get_trends_snapshot(job["trends_data"])
+        if job["topic_position"] is not None:
+            return self._apply_selection(job, agent, state, None)
+
+        if "candidates" not in state:
+            recent = job["recent_articles"]
+            recent_list = recent.get("articles", []) if recent.get("status") == "success" else []
+            prefilter = prefilter_trend_candidates(agent, snapshot, recent_list, self.pipeline.policy_engine)
+            state["prefilter"] = summarize_prefilter(prefilter)
+            state["candidates"] = [item.position for item in prefilter["eligible"]]
+            if len(prefilter["eligible"]) > 1:
+                return {
+                    PHASE_SELECTION: build_selection_request(
+                        agent,
+                        prefilter["eligible"],
+                        build_recent_articles_text(recent),
+                        "",
+                    )
+                }
+
+        candidates = [snapshot.get(position) for position in state["candidates"]]
+        answer = answers.get(PHASE_SELECTION)
+        choice = {"source": "deterministic", "reason": "Única tendencia elegible tras filtros deterministas (sin llamada al LLM)"}
+        if answer is not None:
+            choice = {"source": "llm", "reason": answer.get("error") or "Selección batch"}
+            if answer["text"] is not None:
+                parsed = parse_selection_response(answer["text"])
+                if parsed["no_suitable_topic"]:
+                    return self._finish(agent, state, {
+                        "status": "skipped",
+                        "agent": {"id": agent.agent_id, "name": agent.agent_name},
+                        "selection": {
+                            "status": "no_suitable_topic",
+                            "reason": parsed["reason"],
+                            "prefilter": state["prefilter"],
+                        },
+                    })
+                item, matched = resolve_selected_candidate(parsed, candidates)
+                if matched:
+                    choice = {"source": "llm", "reason": parsed["reason"], "position": item.position}
+
+        # Resolución de conflictos en orden de agentes: si la tendencia ya fue tomada, la primera libre.
+        taken = set(job["taken_positions"])
+        preferred = [choice["position"]] if choice.get("position") else []
+        free = [position for position in preferred + state["candidates"] if position not in taken]
+        if not free:
+            return self._finish(agent, state, {
+                "status": "skipped",
+                "agent": {"id": agent.agent_id, "name": agent.agent_name},
+                "selection": {
+                    "status": "no_suitable_topic",
+                    "reason": "Sin tendencias elegibles libres tras filtros deterministas",
+                    "prefilter": state.get("prefilter"),
+                },
+            })
+        item = snapshot.get(free[0])
+        if free[0] != choice.get("position") and choice["source"] == "llm":
+            choice = {"source": "deterministic", "reason": "Asignación automática: primera tendencia elegible libre"}
+        job["taken_positions"].append(item.position)
+        preselected = {
+            "status": "success",
+            "selected_position": item.position,
+            "selected_title": item.title,
+            "selected_reason": choice["reason"],
+            "llm_skipped": choice["source"] != "llm",
+            "prefilter": state.get("prefilter"),
+            "assignment": {"strategy": EXECUTION_MODE_BATCH, "source": choice["source"]},
+        }
+        return self._apply_selection(job, agent, state, preselected)
+
+    def _apply_selection(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any], preselected: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        user_id = agent.agent_config.get("userId", 5822)
+        selection = self.pipeline.topic_selector.select(agent, job["trends_data"], job["topic_position"], user_id, preselected)
+        if selection.get("status") != "success":
+            return self._finish(agent, state, {
+                "status": "skipped" if selection.get("status") == "no_suitable_topic" else "error",
+                "agent": {"id": agent.agent_id, "name": agent.agent_name},
+                "selection": selection,
+            })
+
+        context = self.pipeline.gather_context(agent, job["trends_data"], selection["selected_title"], state["timings"])
+        state["run_state"] = {
+            "correlation_id": f"{job['correlation_id']}:{agent.agent_id}",
+            "execution_started": datetime.utcnow().isoformat() + "Z",
+            "dry_run": job["dry_run"],
+            "selection": selection,
+            "context": context,
+        }
+        state["phase"] = PHASE_OUTLINE
+        return {PHASE_OUTLINE: self.pipeline.outline_generator.request_params(agent, selection["selected_title"])}
+
+    def _phase_outline(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any], answers: Dict[str, Any]) -> Dict[str, Any]:
+        run_state = state["run_state"]
+        selection = run_state["selection"]
+        answer = answers[PHASE_OUTLINE]
+        if answer["text"] is None:
+            outline_data = {
+                "status": "fallback",
+                "outline": self.pipeline.outline_generator._fallback_outline(selection["selected_title"]),
+                "reason": answer["error"],
+            }
+        else:
+            outline_data = self.pipeline.outline_generator.parse(answer["text"], answer["model"], selection["selected_title"])
+
+        run_state["outline"] = outline_data
+        run_state["prompt"] = self.pipeline.prompt_builder.build(
+            agent,
+            job["trends_data"],
+            run_state["context"]["search_results"],
+            selection["selected_title"],
+            selection["selected_position"],
+            outline_text=outline_data.get("outline", ""),
+        )
+        state["phase"] = PHASE_GENERATION
+        return {PHASE_GENERATION: build_generation_request(agent, run_state["prompt"]["prompt"])}
+
+    def _phase_generation(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any], answers: Dict[str, Any]) -> Dict[str, Any]:
+        content = answers[PHASE_GENERATION]["text"] or ""
+        state["generation"] = {
+            "content": content,
+            "llm_effective_params": self.pipeline.content_generator._effective_params(agent),
+        }
+        if not content.strip():
+            return self._finalize(agent, state, None)
+
+        state["phase"] = PHASE_REVIEW
+        if self.pipeline.combined_reviewer.is_enabled():
+            return {PHASE_REVIEW: self.pipeline.combined_reviewer.request_params(agent, content)}
+        return {
+            "fact_check": self.pipeline.fact_checker.request_params(agent, content),
+            "devil_advocate": self.pipeline.devil_advocate.request_params(agent, content),
+        }
+
+    def _phase_review(self, job: Dict[str, Any], agent: Any, state: Dict[str, Any], answers: Dict[str, Any]) -> Dict[str, Any]:
+        depth_validation = self.pipeline.depth_validator.validate(state["generation"]["content"])
+        fact_checker = self.pipeline.fact_checker
+
+        if PHASE_REVIEW in answers:
+            answer = answers[PHASE_REVIEW]
+            reviewer = self.pipeline.combined_reviewer
+            if answer["text"] is None:
+                review = reviewer.error_result(fact_checker.deterministic_issues(depth_validation), RuntimeError(answer["error"]))
+            else:
+                review = reviewer.parse(answer["text"], answer["model"], depth_validation)
+        else:
+            check_answer = answers["fact_check"]
+            if check_answer["text"] is None:
+                fact_check = fact_checker.combine(
+                    fact_checker.deterministic_issues(depth_validation),
+                    {"verdict": "PASS", "issues": [], "raw": "", "warning": check_answer["error"]},
+                )
+            else:
+                fact_check = fact_checker.parse(check_answer["text"], check_answer["model"], depth_validation)
+
+            devil_answer = answers["devil_advocate"]
+            if devil_answer["text"] is None:
+                devil_review = {"status": "error", "critique": "No se pudo generar crítica.", "error": devil_answer["error"]}
+            else:
+                devil_review = self.pipeline.devil_advocate.parse(devil_answer["text"], devil_answer["model"])
+            review = (fact_check, devil_review)
+        return self._finalize(agent, state, review)
+
+    def _finalize(self, agent: Any, state: Dict[str, Any], review: Any) -> Dict[str, Any]:
+        result = self.pipeline.resume_from_draft(
+            agent,
+            state["run_state"],
+            state["generation"],
+            state["timings"],
+            initial_review=review,
+            usage_tracker=self._usage_tracker(state),
+        )
+        return self._finish(agent, state, result, with_usage=False)
+
+    def _finish(self, agent: Any, state: Dict[str, Any], result: Dict[str, Any], with_usage: bool = True) -> Dict[str, Any]:
+        if with_usage:
+            result["usage"] = self._usage_tracker(state).summary()
+        result.setdefault("correlation_id", (state.get("run_state") or {}).get("correlation_id"))
+        state["result"] = result
+        state["phase"] = PHASE_DONE
+        return {}
+
+    @staticmethod
+    def _usage_tracker(state: Dict[str, Any]) -> UsageTracker:
+        tracker = UsageTracker()
+        for record in state["usage_records"]:
+            tracker.record(record["stage"], record["model"], _as_response(record["body"]), price_factor=BATCH_PRICE_FACTOR)
+        return tracker
+
+    # ---- respuesta ----
+
+    def _payload(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        batch_info = {
+            "job_id": job["job_id"],
+            "provider": job["provider"],
+            "status": job["status"],
+            "rounds": job["rounds"],
+            "phases": {agent_id: state["phase"] for agent_id, state in job["agents"].items()},
+        }
+        if job["status"] != "completed":
+            return {
+                "status": "submitted",
+                "contract_version": "v2",
+                "correlation_id": job["correlation_id"],
+                "timestamp": datetime.now().isoformat(),
+                "execution": {"execution_mode": EXECUTION_MODE_BATCH, "batch": batch_info},
+            }
+
+        results = [job["agents"][str(agent_id)]["result"] for agent_id in job["agent_ids"]]
+        return {
+            "status": "success",
+            "contract_version": "v2",
+            "correlation_id": job["correlation_id"],
+            "timestamp": datetime.now().isoformat(),
+            "execution": {
+                "execution_mode": EXECUTION_MODE_BATCH,
+                "topic_position": job["topic_position"],
+                "dry_run": job["dry_run"],
+                "agents_total": len(results),
+                "successful": len([r for r in results if r.get("status") == "success"]),
+                "skipped": len([r for r in results if r.get("status") == "skipped"]),
+                "failed": len([r for r in results if r.get("status") == "error"]),
+                "requested_agent_ids": job["requested_agent_ids"],
+                "batch": batch_info,
+                "usage": aggregate_usage([(r.get("agent", {}).get("id"), r.get("usage")) for r in results]),
+            },
+            "results": results,
+        }
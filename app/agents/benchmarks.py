@@ -0,0 +1,320 @@
+"""Micro-benchmarks de rutas calientes del generador de artículos.
+
+Uso (desde el directorio app/):
+    python -m agents.benchmarks markdown --iterations 300
+    python -m agents.benchmarks review --iterations 5 --live   # --live llama a la API de OpenAI
+    python -m agents.benchmarks editorial --iterations 3 --live
+    python -m agents.benchmarks crew --iterations 20   # requiere OPENAI_API_KEY definida (no llama a la API)
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+import markdown as markdown_lib
+
+from .agent_content_utils import markdown_to_html
+from .editorial_roles import EDITORIAL_ROLES, EDITORIAL_TASK_ORDER
+from .fast_path import EDITORIAL_MODEL, build_role_messages, run_fast_path
+from .llm_usage import UsageTracker, estimate_cost_usd
+from .token_utils import count_tokens
+from .trends_pipeline import CombinedReviewer, DevilAdvocateReviewer, FactChecker
+
+
+_SAMPLE_PARAGRAPH = (
+    "Según datos del **BCRA**, las reservas internacionales cayeron un 4,5% en el último mes, "
+    "mientras que el dólar blue cerró en **$1.250** y la brecha con el oficial se ubicó en 18%. "
+    "Este contexto de volatilidad cambiaria impacta en la estrategia de las empresas, que "
+    "ajustan precios y posponen inversiones ante la incertidumbre sobre la política monetaria. "
+    "En comparación con Chile y Brasil, la Argentina mantiene una inflación mensual más alta, "
+    "lo que erosiona la confianza y limita el crédito. Ver [análisis previo](https://fin.guru/dolar)."
+)
+
+
+def _build_sample_article(words: int = 1200) -> str:
+    """Arma un artículo Markdown con la forma típica de la salida del agente (~`words` palabras)."""
+    paragraph_words = len(_SAMPLE_PARAGRAPH.split())
+    paragraphs_needed = max(1, words // paragraph_words)
+    sections = [
+        "Situación actual y contexto",
+        "Análisis de causas y factores",
+        "Comparación internacional e impacto global",
+        "Implicancias y consecuencias",
+        "Perspectiva estratégica y outlook futuro",
+    ]
+
+    lines = ["# El dólar y las reservas: qué esperar", "", "**CATEGORÍA:** Economía y Finanzas", ""]
+    for index in range(paragraphs_needed):
+        if index % 2 == 0:
+            lines.append(f"## {sections[(index // 2) % len(sections)]}")
+            lines.append("")
+        lines.append(_SAMPLE_PARAGRAPH)
+        lines.append("")
+        if index % 4 == 3:
+            lines.extend(["- Dólar MEP: **$1.180**", "- Dólar CCL: **$1.210**", ""])
+    return "\n".join(lines)
+
+
+def _measure(fn: Callable[[str], Any], text: str, iterations: int) -> Dict[str, float]:
+    fn(text)  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(text)
+    elapsed = time.perf_counter() - started
+    return {
+        "total_ms": round(elapsed * 1000, 2),
+        "per_call_ms": round((elapsed / iterations) * 1000, 4),
+        "articles_per_second": round(iterations / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def benchmark_markdown_to_html(iterations: int = 200, words: int = 1200) -> Dict[str, Any]:
+    """Compara `markdown_lib.markdown` (instancia nueva por artículo) contra el pool de renderers."""
+    article = _build_sample_article(words)
+
+    def fresh_instance(text: str) -> str:
+        return markdown_lib.markdown(text.strip(), extensions=["extra"]).strip()
+
+    baseline = _measure(fresh_instance, article, iterations)
+    pooled = _measure(markdown_to_html, article, iterations)
+
+    return {
+        "benchmark": "markdown_to_html",
+        "iterations": iterations,
+        "article_words": len(article.split()),
+        "outputs_match": fresh_instance(article) == markdown_to_html(article),
+        "fresh_instance": baseline,
+        "pooled_renderer": pooled,
+        "speedup": round(baseline["total_ms"] / pooled["total_ms"], 2) if pooled["total_ms"] else None,
+    }
+
+
+def _review_input_tokens(system_message: str, prompt: str) -> int:
+    return count_tokens(system_message) + count_tokens(prompt)
+
+
+def _latency_stats(samples_ms: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.mean(samples_ms), 2),
+        "p50_ms": round(statistics.median(samples_ms), 2),
+        "max_ms": round(max(samples_ms), 2),
+    }
+
+
+def benchmark_review(iterations: int = 5, words: int = 1200, live: bool = False) -> Dict[str, Any]:
+    """Compara fact-check + abogado del diablo (2 llamadas) contra CombinedReviewer (1 llamada JSON).
+
+    Sin `live` solo mide tokens de entrada; con `live` ejecuta ambos caminos contra la API y reporta
+    latencia y `usage` real por camino."""
+    draft = _build_sample_article(words)
+    two_call_tokens = (
+        _review_input_tokens(FactChecker.SYSTEM_MESSAGE, FactChecker.build_prompt(draft))
+        + _review_input_tokens(DevilAdvocateReviewer.SYSTEM_MESSAGE, DevilAdvocateReviewer.build_prompt(draft))
+    )
+    combined_tokens = _review_input_tokens(CombinedReviewer.SYSTEM_MESSAGE, CombinedReviewer.build_prompt(draft))
+
+    result: Dict[str, Any] = {
+        "benchmark": "review",
+        "article_words": len(draft.split()),
+        "input_tokens": {
+            "two_call": two_call_tokens,
+            "combined": combined_tokens,
+            "saved": two_call_tokens - combined_tokens,
+            "saved_pct": round((1 - combined_tokens / two_call_tokens) * 100, 2) if two_call_tokens else 0.0,
+        },
+        "estimated_input_cost_usd": {
+            "two_call": estimate_cost_usd("gpt-4o-mini", two_call_tokens, 0, 0),
+            "combined": estimate_cost_usd("gpt-4o-mini", combined_tokens, 0, 0),
+        },
+    }
+    if not live:
+        return result
+
+    from openai import OpenAI
+
+    client = OpenAI()
+    depth_validation = {"numeric_evidence_count": 5, "forbidden_phrase_hits": []}
+    fact_checker = FactChecker()
+    devil_advocate = DevilAdvocateReviewer()
+    combined_reviewer = CombinedReviewer(fact_checker)
+
+    paths = {
+        "two_call": lambda agent: (
+            fact_checker.check(agent, draft, depth_validation, {}),
+            devil_advocate.review(agent, draft),
+        ),
+        "combined": lambda agent: combined_reviewer.review(agent, draft, depth_validation),
+    }
+    live_result: Dict[str, Any] = {"iterations": iterations}
+    for name, run in paths.items():
+        agent = SimpleNamespace(openai_client=client, llm_usage=UsageTracker())
+        samples_ms = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run(agent)
+            samples_ms.append((time.perf_counter() - started) * 1000)
+        live_result[name] = {
+            "latency": _latency_stats(samples_ms),
+            "usage": agent.llm_usage.summary()["totals"],
+        }
+    result["live"] = live_result
+    return result
+
+
+def benchmark_editorial(iterations: int = 3, words: int = 600, live: bool = False) -> Dict[str, Any]:
+    """Compara la Crew editorial (CrewAI) contra el camino rápido de llamadas directas.
+
+    Sin `live` solo mide los tokens de entrada del camino rápido (cada rol recibe un borrador de
+    ~`words` palabras como contexto); con `live` ejecuta ambos motores contra la API y reporta
+    latencia y tokens por motor."""
+    message = "Hecho, nota o tema: el BCRA recortó la tasa de política monetaria y el dólar blue subió 3%"
+    draft = _build_sample_article(words)
+    prompt_tokens = {
+        key: sum(
+            count_tokens(item["content"])
+            for item in build_role_messages(EDITORIAL_ROLES[key], message, draft if index else "")
+        )
+        for index, key in enumerate(EDITORIAL_TASK_ORDER)
+    }
+    total_prompt_tokens = sum(prompt_tokens.values())
+    result: Dict[str, Any] = {
+        "benchmark": "editorial",
+        "fast_path_input_tokens": {"by_role": prompt_tokens, "total": total_prompt_tokens},
+        "estimated_fast_path_input_cost_usd": estimate_cost_usd(EDITORIAL_MODEL, total_prompt_tokens, 0, 0),
+    }
+    if not live:
+        return result
+
+    from openai import OpenAI
+
+    from .agents import iterate_agents
+
+    client = OpenAI()
+    live_result: Dict[str, Any] = {"iterations": iterations}
+
+    samples_ms = []
+    fast_totals: Dict[str, Any] = {}
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fast = run_fast_path(message, client)
+        samples_ms.append((time.perf_counter() - started) * 1000)
+        for field, value in fast["usage"]["totals"].items():
+            if isinstance(value, (int, float)):
+                fast_totals[field] = round(fast_totals.get(field, 0) + value, 8)
+    live_result["fast"] = {"latency": _latency_stats(samples_ms), "usage": fast_totals}
+
+    samples_ms = []
+    crew_totals: Dict[str, int] = {}
+    for _ in range(iterations):
+        started = time.perf_counter()
+        crew_output = iterate_agents(message)
+        samples_ms.append((time.perf_counter() - started) * 1000)
+        token_usage = getattr(crew_output, "token_usage", None)
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens", "successful_requests"):
+            crew_totals[field] = crew_totals.get(field, 0) + int(getattr(token_usage, field, 0) or 0)
+    live_result["crew"] = {"latency": _latency_stats(samples_ms), "usage": crew_totals}
+
+    result["live"] = live_result
+    return result
+
+
+def _measure_allocations(fn: Callable[[int], Any], iterations: int) -> Dict[str, float]:
+    fn(-1)  # warm-up (imports y cachés de pydantic/CrewAI)
+    tracemalloc.start()
+    started = time.perf_counter()
+    for index in range(iterations):
+        fn(index)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "total_ms": round(elapsed * 1000, 2),
+        "per_call_ms": round((elapsed / iterations) * 1000, 4),
+        "peak_kib": round(peak / 1024, 2),
+    }
+
+
+def benchmark_crew(iterations: int = 20) -> Dict[str, Any]:
+    """Costo de armar la Crew editorial por request (8 agentes, 4 tareas y una Crew nueva) contra
+    reutilizar una Crew plantilla e interpolar `{message}` como hace `kickoff`. No llama a la API."""
+    from crewai import Crew, Process
+
+    from .agents import build_editorial_crew
+    from .asistente import get_asistente_agent, get_asistente_task
+    from .director import get_director_agent, get_director_task
+    from .editor import get_editor_agent, get_editor_task
+    from .marketing import get_marketing_agent, get_marketing_task
+
+    def per_request(index: int) -> Any:
+        message = f"Hecho, nota o tema: noticia {index}"
+        return Crew(
+            agents=[
+                get_asistente_agent(message),
+                get_marketing_agent(message),
+                get_editor_agent(message),
+                get_director_agent(message),
+            ],
+            tasks=[
+                get_marketing_task(message),
+                get_editor_task(message),
+                get_asistente_task(message),
+                get_director_task(message),
+            ],
+            process=Process.sequential,
+            memory=True,
+            cache=True,
+            max_rpm=100,
+            share_crew=True,
+        )
+
+    template = build_editorial_crew()
+
+    def reused(index: int) -> Any:
+        template._interpolate_inputs({"message": f"Hecho, nota o tema: noticia {index}"})
+        return template
+
+    legacy = per_request(0)
+    reused(0)
+    outputs_match = [task.description for task in legacy.tasks] == [task.description for task in template.tasks] and [
+        agent.goal for agent in legacy.agents
+    ] == [agent.goal for agent in template.agents]
+
+    baseline = _measure_allocations(per_request, iterations)
+    pooled = _measure_allocations(reused, iterations)
+    return {
+        "benchmark": "crew",
+        "iterations": iterations,
+        "outputs_match": outputs_match,
+        "per_request_crew": baseline,
+        "template_crew": pooled,
+        "speedup": round(baseline["total_ms"] / pooled["total_ms"], 2) if pooled["total_ms"] else None,
+    }
+
+
+BENCHMARKS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "markdown": benchmark_markdown_to_html,
+    "review": benchmark_review,
+    "editorial": benchmark_editorial,
+    "crew": benchmark_crew,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de FinGuru")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Llama a la API real (benchmarks review y editorial)")
+    args = parser.parse_args()
+
+    options: Dict[str, Any] = {"iterations": args.iterations}
+    if args.live:
+        options["live"] = True
+    result = BENCHMARKS[args.benchmark](**options)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,26 @@
 from agents.config import llm
+from agents.editorial_roles import EDITORIAL_ROLES
 from crewai import Agent, Task
 
-def get_director_agent(message):
-    goal = f"Realizar la evaluación final de los artículos para asegurar su calidad y coherencia con la reputación de Fin.Gurú. Si consideras que el artículo está listo para ser publicado, incluye la palabra 'TERMINAR' en tu respuesta. Revisar y evaluar el artículo sobre {message}, y estar en el mismo lenguaje del mensaje, si el mensaje está en español devolver el resultado en español, o si está en inglés en ingles"
-    backstory = "Como Director de Fin.Gurú, tu rol es ejercer el máximo nivel de supervisión editorial asegurando que cada artículo no solo sea excelente en contenido y forma, sino que también respete y refuerce la reputación de Fin.Gurú como un medio de comunicación líder. Con una visión estratégica y un compromiso con la excelencia periodística, tu juicio determina la idoneidad final del contenido publicado."
+ROLE = EDITORIAL_ROLES["director"]
 
+def get_director_agent(message=None):
+    # Sin message se usa la plantilla con {message}: la Crew la interpola en cada kickoff.
     return Agent(
-        role="Director",
-        goal=goal,
-        backstory=backstory,
+        role=ROLE.role,
+        goal=ROLE.goal(message) if message is not None else ROLE.goal_template,
+        backstory=ROLE.backstory,
         tools=[],
         llm=llm
     )
     
-def get_director_task(message):
-    goal = "Asegurar la calidad y coherencia del articulo con la reputación de Fin.Gurú."
-    description = f"{goal} Revisar y evaluar el artículo sobre {message} y estar en el mismo lenguaje del mensaje, si el mensaje está en español devolver el resultado en español, o si está en inglés en ingles"
-    expected_output = "Determinar si el artículo está listo para ser publicado o si necesita ajustes adicionales, asegurando que tiene una longitud adecuada para una nota periodistica y devolver el artículo ya terminado en formato HTML de SOLO lo que va dentro del body, sin head, ni html, ni body tags, ni footer. Además debe estar en el mismo lenguaje del mensaje, si el mensaje está en español devolver el resultado en español"
-    agent = get_director_agent(message)
+def get_director_task(message=None, agent=None):
+    agent = agent or get_director_agent(message)
 
     return Task(
-        description=description,
-        expected_output=expected_output,
+        description=ROLE.description(message) if message is not None else ROLE.description_template,
+        expected_output=ROLE.expected_output(message) if message is not None else ROLE.expected_output_template,
         tools=[],
         agent=agent,
         async_execution=False,
-    )
\ No newline at end of file
+    )
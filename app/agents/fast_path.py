@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .editorial_roles import EDITORIAL_ROLES, EDITORIAL_TASK_ORDER, EditorialRole
+from .llm_client import create_chat_completion, stream_chat_completion
+from .llm_usage import UsageTracker
+
+
+EDITORIAL_ENGINE_CREW = "crew"
+EDITORIAL_ENGINE_FAST = "fast"
+EDITORIAL_ENGINES = {EDITORIAL_ENGINE_CREW, EDITORIAL_ENGINE_FAST}
+
+# Mismo modelo y temperatura que el LLM de la Crew (`agents.config`).
+EDITORIAL_MODEL = "gpt-4o-mini"
+EDITORIAL_TEMPERATURE = 0
+
+_CLIENT_LOCK = threading.Lock()
+_DEFAULT_CLIENT: Any = None
+
+
+def resolve_editorial_engine(engine: Optional[str] = None) -> str:
+    """Motor explícito o EDITORIAL_ENGINE (crew por defecto)."""
+    candidate = (engine or os.getenv("EDITORIAL_ENGINE", EDITORIAL_ENGINE_CREW) or "").strip().lower()
+    if candidate not in EDITORIAL_ENGINES:
+        print(f"⚠️ EDITORIAL_ENGINE desconocido '{candidate}', usando {EDITORIAL_ENGINE_CREW}")
+        return EDITORIAL_ENGINE_CREW
+    return candidate
+
+
+def _default_client() -> Any:
+    global _DEFAULT_CLIENT
+    with _CLIENT_LOCK:
+        if _DEFAULT_CLIENT is None:
+            from openai import OpenAI
+
+            _DEFAULT_CLIENT = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return _DEFAULT_CLIENT
+
+
+class EditorialCaller:
+    """Contexto mínimo que espera `create_chat_completion` (cliente, identidad para rutas y uso)."""
+
+    agent_id = "editorial"
+    agent_name = "editorial"
+
+    def __init__(self, openai_client: Any):
+        self.openai_client = openai_client
+        self.llm_usage = UsageTracker()
+
+
+def build_role_messages(role: EditorialRole, message: str, context: str = "") -> List[Dict[str, str]]:
+    """Mensajes de un rol con la misma información que recibe el agente en la Crew."""
+    system = f"Eres {role.role}. {role.backstory}\nTu objetivo personal es: {role.goal(message)}"
+    user = (
+        f"Tarea actual: {role.description(message)}\n\n"
+        f"Criterio esperado para tu respuesta final: {role.expected_output(message)}\n"
+        "Devuelve el contenido completo como respuesta final, no un resumen."
+    )
+    if context:
+        user += f"\n\nEste es el trabajo previo del equipo sobre el que debes trabajar:\n{context}"
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+def run_fast_path(message: str, openai_client: Any = None) -> Dict[str, Any]:
+    """
+    Ejecuta los cuatro roles editoriales como llamadas directas de chat, en el orden de las tareas
+    de la Crew y pasando a cada rol el resultado del anterior, sin memoria ni embeddings de CrewAI.
+    """
+    caller = EditorialCaller(openai_client or _default_client())
+    steps = []
+    content = ""
+    started = time.perf_counter()
+    for key in EDITORIAL_TASK_ORDER:
+        role = EDITORIAL_ROLES[key]
+        step_start = time.perf_counter()
+        response = create_chat_completion(
+            caller,
+            f"editorial_{key}",
+            model=EDITORIAL_MODEL,
+            messages=build_role_messages(role, message, content),
+            temperature=EDITORIAL_TEMPERATURE,
+        )
+        content = (response.choices[0].message.content or "").strip() or content
+        steps.append({"role": key, "ms": round((time.perf_counter() - step_start) * 1000, 2)})
+
+    return {
+        "content": content,
+        "steps": steps,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "usage": caller.llm_usage.summary(),
+    }
+
+
+def stream_fast_path(message: str, openai_client: Any = None) -> Iterator[Dict[str, Any]]:
+    """
+    `run_fast_path` como eventos: `stage` con el texto de cada rol al terminarlo, `delta` con cada
+    fragmento del rol final (con `stream=True`) y `result` con el contenido, tiempos y uso.
+    """
+    caller = EditorialCaller(openai_client or _default_client())
+    steps = []
+    content = ""
+    started = time.perf_counter()
+    final_key = EDITORIAL_TASK_ORDER[-1]
+    for key in EDITORIAL_TASK_ORDER:
+        role = EDITORIAL_ROLES[key]
+        step_start = time.perf_counter()
+        params = {
+            "model": EDITORIAL_MODEL,
+            "messages": build_role_messages(role, message, content),
+            "temperature": EDITORIAL_TEMPERATURE,
+        }
+        if key == final_key:
+            pieces = []
+            for piece in stream_chat_completion(caller, f"editorial_{key}", **params):
+                pieces.append(piece)
+                yield {"event": "delta", "role": key, "text": piece}
+            text = "".join(pieces)
+        else:
+            response = create_chat_completion(caller, f"editorial_{key}", **params)
+            text = response.choices[0].message.content or ""
+        content = text.strip() or content
+        steps.append({"role": key, "ms": round((time.perf_counter() - step_start) * 1000, 2)})
+        yield {"event": "stage", "role": key, "content": content, "ms": steps[-1]["ms"]}
+
+    yield {
+        "event": "result",
+        "content": content,
+        "steps": steps,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "usage": caller.llm_usage.summary(),
+    }
+
+
+def run_editorial_engine(message: str, openai_client: Any = None, engine: Optional[str] = None) -> Any:
+    """Texto editorial para `message` con el motor elegido (ver `resolve_editorial_engine`)."""
+    if resolve_editorial_engine(engine) == EDITORIAL_ENGINE_FAST:
+        result = run_fast_path(message, openai_client)
+        print(f"⚡ Camino rápido editorial: {result['total_ms']} ms, {result['usage']['totals']['total_tokens']} tokens")
+        return result["content"]
+
+    # Import diferido: la Crew arrastra crewai/chromadb solo si se usa.
+    from agents.agents import iterate_agents
+
+    return iterate_agents(message)
+
+
+def stream_editorial_engine(message: str, openai_client: Any = None, engine: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Eventos `stage`/`delta`/`result` de `run_editorial_engine` con el motor elegido."""
+    if resolve_editorial_engine(engine) == EDITORIAL_ENGINE_FAST:
+        return stream_fast_path(message, openai_client)
+
+    from agents.agents import iterate_agents_stream
+
+    return iterate_agents_stream(message)
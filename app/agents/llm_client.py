@@ -0,0 +1,150 @@
+import time
+from contextlib import ExitStack
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from .llm_resilience import HEDGE_PERCENTILE, call_with_resilience, new_resilience_report
+from .llm_usage import UsageTracker, extract_usage
+from .model_routing import ModelRoute, get_latency_tracker, resolve_model_route, route_key
+from .rate_limiter import estimate_request_tokens, get_openai_rate_limiter
+
+
+def _completions_without_sdk_retries(agent: Any) -> Any:
+    """
+    `chat.completions` del cliente con `max_retries=0`: `call_with_resilience` es el único bucle de
+    reintentos, así el deadline de la ruta acota la llamada y cada 429 pasa por el limitador.
+    """
+    client = agent.openai_client
+    with_options = getattr(client, "with_options", None)
+    if with_options is not None:
+        client = with_options(max_retries=0)
+    return client.chat.completions
+
+
+def _create_with_headers(agent: Any, params: Any) -> Tuple[Any, Optional[Mapping[str, str]]]:
+    """Llama a la API leyendo los headers `x-ratelimit-*` cuando el cliente expone la respuesta cruda."""
+    completions = _completions_without_sdk_retries(agent)
+    raw_api = getattr(completions, "with_raw_response", None)
+    if raw_api is None:
+        return completions.create(**params), None
+    raw_response = raw_api.create(**params)
+    return raw_response.parse(), raw_response.headers
+
+
+def build_request_params(route: ModelRoute, **params: Any) -> Dict[str, Any]:
+    """Parámetros completos de la llamada (modelo y `max_tokens` de la ruta), reutilizables en batch."""
+    request = {"model": route.model}
+    if route.max_tokens:
+        request["max_tokens"] = route.max_tokens
+    request.update(params)
+    return request
+
+
+def create_chat_completion(agent: Any, stage: str, route: Optional[ModelRoute] = None, **params: Any) -> Any:
+    """
+    Punto único de llamada a `chat.completions.create` para los agentes.
+
+    Si no se indica `model`, se toma de la ruta de `stage` (ver `model_routing`), que también
+    completa `max_tokens` cuando el llamador no lo fija. Cada intento pasa por el limitador
+    compartido de OpenAI (ver `rate_limiter`) y los errores transitorios se reintentan con
+    backoff dentro del deadline de la ruta, con hedging opcional al p90 de la etapa (ver
+    `llm_resilience`). La latencia observada se registra por etapa y modelo, y el uso de tokens,
+    la espera en cola y los reintentos en `agent.llm_usage` cuando la ejecución tiene un
+    `UsageTracker` activo.
+    """
+    route = route or resolve_model_route(agent, stage)
+    if "model" not in params:
+        params["model"] = route.model
+        if route.max_tokens and "max_tokens" not in params:
+            params["max_tokens"] = route.max_tokens
+    timeout_s = params.pop("timeout", None) or route.timeout_s
+    key = route_key(stage)
+    tracker = getattr(agent, "llm_usage", None)
+
+    def attempt(timeout: Optional[float]) -> Any:
+        call_params = dict(params, timeout=timeout) if timeout else params
+        with get_openai_rate_limiter().reserve(estimate_request_tokens(params)) as ticket:
+            started = time.perf_counter()
+            response, ticket.headers = _create_with_headers(agent, call_params)
+            get_latency_tracker().record(key, params["model"], (time.perf_counter() - started) * 1000)
+            ticket.actual_tokens = extract_usage(response)["total_tokens"] or None
+
+        if isinstance(tracker, UsageTracker):
+            tracker.record(stage, params.get("model"), response, queue_wait_ms=ticket.queue_wait_ms)
+        return response
+
+    hedge_after_s = None
+    if route.hedge:
+        p90_ms = get_latency_tracker().percentile(key, params["model"], HEDGE_PERCENTILE)
+        hedge_after_s = p90_ms / 1000 if p90_ms else None
+
+    report = new_resilience_report()
+    try:
+        return call_with_resilience(
+            attempt,
+            report,
+            timeout_s=timeout_s,
+            deadline_s=route.deadline_s,
+            hedge_after_s=hedge_after_s,
+        )
+    finally:
+        if isinstance(tracker, UsageTracker):
+            tracker.record_resilience(stage, report)
+
+
+def stream_chat_completion(agent: Any, stage: str, route: Optional[ModelRoute] = None, **params: Any) -> Iterator[str]:
+    """
+    Variante con `stream=True` de `create_chat_completion`: devuelve los fragmentos de texto a
+    medida que llegan. La apertura del stream se reintenta como una llamada normal, con un cupo del
+    limitador por intento que se mantiene hasta consumir el stream. La latencia registrada es la del
+    primer fragmento y el uso de tokens sale del último chunk (`stream_options.include_usage`).
+    """
+    route = route or resolve_model_route(agent, stage)
+    if "model" not in params:
+        params["model"] = route.model
+        if route.max_tokens and "max_tokens" not in params:
+            params["max_tokens"] = route.max_tokens
+    params["stream"] = True
+    params.setdefault("stream_options", {"include_usage": True})
+    timeout_s = params.pop("timeout", None) or route.timeout_s
+    key = route_key(stage)
+    tracker = getattr(agent, "llm_usage", None)
+    completions = _completions_without_sdk_retries(agent)
+
+    def open_stream(timeout: Optional[float]) -> Tuple[Any, Any, ExitStack]:
+        call_params = dict(params, timeout=timeout) if timeout else params
+        with ExitStack() as stack:
+            ticket = stack.enter_context(get_openai_rate_limiter().reserve(estimate_request_tokens(params)))
+            stream = completions.create(**call_params)
+            # Abierto el stream, el cupo sigue reservado hasta terminar de leerlo.
+            return stream, ticket, stack.pop_all()
+
+    report = new_resilience_report()
+    try:
+        started = time.perf_counter()
+        stream, ticket, reservation = call_with_resilience(
+            open_stream,
+            report,
+            timeout_s=timeout_s,
+            deadline_s=route.deadline_s,
+        )
+        with reservation:
+            first_chunk = True
+            usage = None
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                for choice in getattr(chunk, "choices", None) or []:
+                    text = getattr(choice.delta, "content", None)
+                    if text:
+                        if first_chunk:
+                            get_latency_tracker().record(key, params["model"], (time.perf_counter() - started) * 1000)
+                            first_chunk = False
+                        yield text
+            if usage is not None:
+                ticket.actual_tokens = getattr(usage, "total_tokens", None)
+                if isinstance(tracker, UsageTracker):
+                    tracker.record(stage, params["model"], SimpleNamespace(usage=usage), queue_wait_ms=ticket.queue_wait_ms)
+    finally:
+        if isinstance(tracker, UsageTracker):
+            tracker.record_resilience(stage, report)
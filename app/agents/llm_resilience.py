@@ -0,0 +1,125 @@
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from .rate_limiter import _error_headers, parse_reset_duration
+
+
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+HEDGE_PERCENTILE = 90.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+_RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError"}
+
+
+class DeadlineExceeded(TimeoutError):
+    """La llamada agotó su deadline antes de completar un intento."""
+
+
+def read_max_retries() -> int:
+    """LLM_MAX_RETRIES: reintentos tras el primer intento (3 por defecto, 0 los desactiva)."""
+    try:
+        return max(0, int(os.getenv("LLM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES))))
+    except ValueError:
+        return DEFAULT_MAX_RETRIES
+
+
+def new_resilience_report() -> Dict[str, Any]:
+    return {"attempts": 0, "retries": 0, "hedged": 0, "hedge_wins": 0, "failed": 0}
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None:
+        return int(status_code) in RETRYABLE_STATUS_CODES
+    return type(exc).__name__ in _RETRYABLE_ERROR_NAMES or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def backoff_delay(retry_number: int, retry_after: Optional[float] = None) -> float:
+    """Backoff exponencial con full jitter; respeta `retry-after` si el servidor lo informa."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** retry_number))
+    delay = random.uniform(0, ceiling)
+    return max(delay, retry_after or 0.0)
+
+
+def _run_hedged(call: Callable[[Optional[float]], Any], timeout: Optional[float], hedge_after_s: float, report: Dict[str, Any]) -> Any:
+    """Lanza un duplicado si el primer intento supera `hedge_after_s`; gana el primero que termine bien."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        primary = executor.submit(call, timeout)
+        done, _ = wait([primary], timeout=hedge_after_s)
+        if done:
+            return primary.result()
+
+        report["hedged"] += 1
+        hedge = executor.submit(call, timeout)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        report["hedge_wins"] += 1
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+    finally:
+        # El intento perdedor no se puede cancelar; termina en segundo plano y se descarta.
+        executor.shutdown(wait=False)
+
+
+def call_with_resilience(
+    call: Callable[[Optional[float]], Any],
+    report: Dict[str, Any],
+    timeout_s: Optional[float] = None,
+    deadline_s: Optional[float] = None,
+    hedge_after_s: Optional[float] = None,
+    max_retries: Optional[int] = None,
+) -> Any:
+    """
+    Ejecuta `call(timeout)` con reintentos, backoff exponencial con jitter y deadline total.
+
+    Solo se reintentan errores transitorios (429, 5xx, timeouts y errores de conexión). Cada intento
+    recibe como timeout el mínimo entre `timeout_s` y lo que queda del deadline. Con
+    `hedge_after_s` se usa hedging por intento. `report` acumula intentos, reintentos y hedges.
+    """
+    retries_allowed = read_max_retries() if max_retries is None else max(0, max_retries)
+    deadline = time.monotonic() + deadline_s if deadline_s else None
+
+    retry_number = 0
+    while True:
+        timeout = timeout_s
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                report["failed"] += 1
+                raise DeadlineExceeded(f"Deadline de {deadline_s}s agotado tras {report['attempts']} intentos")
+            timeout = min(timeout, remaining) if timeout else remaining
+
+        report["attempts"] += 1
+        try:
+            if hedge_after_s is not None and (timeout is None or hedge_after_s < timeout):
+                return _run_hedged(call, timeout, hedge_after_s, report)
+            return call(timeout)
+        except Exception as exc:
+            if retry_number >= retries_allowed or not is_retryable_error(exc):
+                report["failed"] += 1
+                raise
+            headers = _error_headers(exc) or {}
+            try:
+                retry_after = parse_reset_duration(headers.get("retry-after"))
+            except AttributeError:
+                retry_after = None
+            delay = backoff_delay(retry_number, retry_after)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                report["failed"] += 1
+                raise
+            print(f"   🔁 Error transitorio del LLM ({type(exc).__name__}), reintentando en {delay:.2f}s")
+            time.sleep(delay)
+            retry_number += 1
+            report["retries"] += 1
@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+# USD por 1M tokens: (input, input cacheado, output). Se resuelve por prefijo más largo
+# para cubrir snapshots con fecha (p.ej. "gpt-4o-mini-2024-07-18").
+MODEL_PRICING_PER_MILLION: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+_USAGE_FIELDS = ("calls", "prompt_tokens", "cached_tokens", "completion_tokens", "total_tokens")
+_RESILIENCE_FIELDS = ("attempts", "retries", "hedged", "hedge_wins", "failed")
+
+
+def _resolve_pricing(model: Optional[str]) -> Optional[Tuple[float, float, float]]:
+    if not model:
+        return None
+    model_lc = str(model).lower()
+    for prefix in sorted(MODEL_PRICING_PER_MILLION, key=len, reverse=True):
+        if model_lc.startswith(prefix):
+            return MODEL_PRICING_PER_MILLION[prefix]
+    return None
+
+
+def estimate_cost_usd(model: Optional[str], prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Costo estimado de una llamada; None si el modelo no está en la tabla de precios."""
+    pricing = _resolve_pricing(model)
+    if pricing is None:
+        return None
+    input_price, cached_price, output_price = pricing
+    uncached_tokens = max(0, prompt_tokens - cached_tokens)
+    cost = (
+        uncached_tokens * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * output_price
+    ) / 1_000_000
+    return round(cost, 8)
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """Lee `response.usage` (incluye tokens cacheados si la API los informa)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+    completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+    total_tokens = int(getattr(usage, "total_tokens", 0) or (prompt_tokens + completion_tokens))
+
+    cached_tokens = 0
+    prompt_details = getattr(usage, "prompt_tokens_details", None)
+    if prompt_details is not None:
+        cached_tokens = int(getattr(prompt_details, "cached_tokens", 0) or 0)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+    }
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    bucket: Dict[str, Any] = {field: 0 for field in _USAGE_FIELDS}
+    bucket["cost_usd"] = 0.0
+    bucket["unpriced_calls"] = 0
+    bucket["queue_wait_ms"] = 0.0
+    return bucket
+
+
+def _accumulate(bucket: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for field in _USAGE_FIELDS:
+        bucket[field] += int(other.get(field, 0) or 0)
+    bucket["cost_usd"] = round(bucket["cost_usd"] + float(other.get("cost_usd", 0.0) or 0.0), 8)
+    bucket["unpriced_calls"] += int(other.get("unpriced_calls", 0) or 0)
+    bucket["queue_wait_ms"] = round(bucket["queue_wait_ms"] + float(other.get("queue_wait_ms", 0.0) or 0.0), 2)
+
+
+class UsageTracker:
+    """Acumula tokens y costo estimado por etapa para una ejecución de un agente."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._resilience: Dict[str, Dict[str, int]] = {}
+
+    def record(
+        self,
+        stage: str,
+        model: Optional[str],
+        response: Any,
+        queue_wait_ms: float = 0.0,
+        price_factor: float = 1.0,
+    ) -> Dict[str, Any]:
+        """`price_factor` ajusta el costo estimado (p.ej. 0.5 para la API batch)."""
+        usage = extract_usage(response)
+        resolved_model = model or getattr(response, "model", None)
+        cost = estimate_cost_usd(
+            resolved_model,
+            usage["prompt_tokens"],
+            usage["cached_tokens"],
+            usage["completion_tokens"],
+        )
+        entry = dict(usage)
+        entry["calls"] = 1
+        entry["cost_usd"] = round((cost or 0.0) * price_factor, 8)
+        entry["unpriced_calls"] = 1 if cost is None else 0
+        entry["queue_wait_ms"] = round(float(queue_wait_ms or 0.0), 2)
+
+        with self._lock:
+            bucket = self._stages.setdefault(stage, _empty_bucket())
+            _accumulate(bucket, entry)
+            models = bucket.setdefault("models", [])
+            if resolved_model and resolved_model not in models:
+                models.append(resolved_model)
+        return entry
+
+    def record_resilience(self, stage: str, report: Dict[str, Any]) -> None:
+        """Acumula intentos, reintentos y hedges de una llamada (ver `llm_resilience`)."""
+        with self._lock:
+            bucket = self._resilience.setdefault(stage, {field: 0 for field in _RESILIENCE_FIELDS})
+            for field in _RESILIENCE_FIELDS:
+                bucket[field] += int(report.get(field, 0) or 0)
+
+    def resilience_summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {stage: dict(bucket) for stage, bucket in self._resilience.items()}
+        totals = {field: sum(bucket[field] for bucket in stages.values()) for field in _RESILIENCE_FIELDS}
+        return {"stages": stages, "totals": totals}
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                stage: {**bucket, "models": list(bucket.get("models", []))}
+                for stage, bucket in self._stages.items()
+            }
+        totals = _empty_bucket()
+        for bucket in stages.values():
+            _accumulate(totals, bucket)
+        return {"stages": stages, "totals": totals}
+
+
+def aggregate_usage(usage_by_agent: Iterable[Tuple[Any, Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+    """Agrega summaries de `UsageTracker` por etapa y por agente para el payload de la ejecución."""
+    totals = _empty_bucket()
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    by_agent: Dict[str, Dict[str, Any]] = {}
+
+    for agent_id, usage in usage_by_agent:
+        if not isinstance(usage, dict):
+            continue
+        agent_totals = usage.get("totals", {})
+        _accumulate(totals, agent_totals)
+        agent_bucket = by_agent.setdefault(str(agent_id), _empty_bucket())
+        _accumulate(agent_bucket, agent_totals)
+        for stage, bucket in (usage.get("stages") or {}).items():
+            _accumulate(by_stage.setdefault(stage, _empty_bucket()), bucket)
+
+    return {"totals": totals, "by_stage": by_stage, "by_agent": by_agent}
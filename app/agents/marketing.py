@@ -1,28 +1,26 @@
 from agents.config import llm
+from agents.editorial_roles import EDITORIAL_ROLES
 from crewai import Agent, Task
 
-def get_marketing_agent(message):
-    goal = f"Perfeccionar los artículos escritos por el equipo de periodistas de Fin.Gurú. El artículo debe tratar sobre {message} y estar en el mismo lenguaje del mensaje, si el mensaje está en español devolver el resultado en español, o si está en inglés en ingles"
-    backstory = "Como especialista en Marketing y SEO en Fin.Gurú, posees conocimientos avanzados en técnicas de SEO (Search Engine Optimization) y tácticas de marketing digital para aumentar la visibilidad y el engagement del contenido en línea. Eres un estratega creativo en la construcción de titulares impactantes y contenido optimizado para motores de búsqueda, manteniendo siempre la integridad y relevancia del tema tratado."
+ROLE = EDITORIAL_ROLES["marketing"]
 
+def get_marketing_agent(message=None):
+    # Sin message se usa la plantilla con {message}: la Crew la interpola en cada kickoff.
     return Agent(
-        role="Marketing y SEO",
-        goal=goal,
-        backstory=backstory,
+        role=ROLE.role,
+        goal=ROLE.goal(message) if message is not None else ROLE.goal_template,
+        backstory=ROLE.backstory,
         tools=[],
         llm=llm
     )
     
-def get_marketing_task(message):
-    goal = "Perfeccionar los artículos escritos por el equipo de periodistas de Fin.Gurú."
-    description = f"{goal} El artículo debe tratar sobre {message} y estar en el mismo lenguaje del mensaje, si el mensaje está en español devolver el resultado en español, o si está en inglés en ingles"
-    expected_output = f"Optimizar los artículos para motores de búsqueda y engagement del público objetivo, asegurando la relevancia y calidad del contenido. Devolver el artículo, y asegurar que trate sobre: {message} y debe estar en el mismo lenguaje del mensaje"
-    agent = get_marketing_agent(message)
+def get_marketing_task(message=None, agent=None):
+    agent = agent or get_marketing_agent(message)
 
     return Task(
-        description=description,
-        expected_output=expected_output,
+        description=ROLE.description(message) if message is not None else ROLE.description_template,
+        expected_output=ROLE.expected_output(message) if message is not None else ROLE.expected_output_template,
         tools=[],
         agent=agent,
         async_execution=False,
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,322 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields, replace
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_FALLBACK_MODEL = "gpt-4.1-nano"
+
+# Ventana de observación de latencias: al expirar, el modelo principal vuelve a probarse.
+LATENCY_WINDOW_SECONDS = 600
+LATENCY_MAX_SAMPLES = 200
+LATENCY_MIN_SAMPLES = 5
+
+# Etapas derivadas que comparten ruta con otra (los reintentos usan la ruta de su etapa base).
+_STAGE_ALIASES = {
+    "quality_retry": "generation",
+    "quality_retry_section": "generation",
+}
+_RETRY_PREFIX = "quality_retry_"
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    stage: str
+    model: str = DEFAULT_MODEL
+    max_tokens: Optional[int] = None
+    timeout_s: Optional[float] = None
+    fallback_model: Optional[str] = None
+    latency_budget_ms: Optional[float] = None
+    deadline_s: Optional[float] = None
+    hedge: bool = False
+    downgraded: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+_ROUTE_FIELDS = {"model", "max_tokens", "timeout_s", "fallback_model", "latency_budget_ms", "deadline_s", "hedge"}
+
+
+def _read_hedge_stages() -> set:
+    """LLM_HEDGE_STAGES: etapas (coma separadas) con hedging habilitado; vacío = ninguna."""
+    return {stage.strip() for stage in os.getenv("LLM_HEDGE_STAGES", "").split(",") if stage.strip()}
+
+
+def _default_routes() -> Dict[str, ModelRoute]:
+    fallback = os.getenv("MODEL_FALLBACK", DEFAULT_FALLBACK_MODEL) or None
+    factcheck_model = os.getenv("FACTCHECK_MODEL", DEFAULT_MODEL)
+    routes = {
+        "generation": ModelRoute("generation", timeout_s=90, latency_budget_ms=60000, deadline_s=240),
+        "selection": ModelRoute(
+            "selection",
+            max_tokens=150,
+            timeout_s=30,
+            fallback_model=fallback,
+            latency_budget_ms=8000,
+            deadline_s=90,
+        ),
+        "topic_assignment": ModelRoute(
+            "topic_assignment",
+            timeout_s=45,
+            fallback_model=fallback,
+            latency_budget_ms=15000,
+            deadline_s=120,
+        ),
+        "outline": ModelRoute(
+            "outline",
+            model=os.getenv("OUTLINE_MODEL", DEFAULT_MODEL),
+            max_tokens=320,
+            timeout_s=30,
+            fallback_model=fallback,
+            latency_budget_ms=8000,
+            deadline_s=90,
+        ),
+        "fact_check": ModelRoute(
+            "fact_check",
+            model=factcheck_model,
+            max_tokens=260,
+            timeout_s=30,
+            fallback_model=fallback,
+            latency_budget_ms=8000,
+            deadline_s=90,
+        ),
+        "devil_advocate": ModelRoute(
+            "devil_advocate",
+            model=os.getenv("DEVIL_ADVOCATE_MODEL", DEFAULT_MODEL),
+            max_tokens=220,
+            timeout_s=30,
+            fallback_model=fallback,
+            latency_budget_ms=8000,
+            deadline_s=90,
+        ),
+        "review": ModelRoute(
+            "review",
+            model=os.getenv("COMBINED_REVIEW_MODEL") or factcheck_model,
+            max_tokens=480,
+            timeout_s=45,
+            fallback_model=fallback,
+            latency_budget_ms=12000,
+            deadline_s=120,
+        ),
+    }
+    hedge_stages = _read_hedge_stages()
+    return {key: replace(route, hedge=True) if key in hedge_stages else route for key, route in routes.items()}
+
+
+_OPTIONAL_INT_FIELDS = {"max_tokens"}
+_OPTIONAL_FLOAT_FIELDS = {"timeout_s", "latency_budget_ms", "deadline_s"}
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_FALSE_VALUES = {"0", "false", "no", "off", ""}
+
+_routes_override_cache: Tuple[Optional[str], Dict[str, Any]] = (None, {})
+
+
+def _coerce_route_value(name: str, value: Any) -> Any:
+    """Convierte un campo de MODEL_ROUTES_JSON al tipo de ModelRoute; ValueError si no es válido."""
+    if name == "model":
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError("debe ser un nombre de modelo no vacío")
+        return value.strip()
+    if name == "fallback_model":
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        if not isinstance(value, str):
+            raise ValueError("debe ser un nombre de modelo o null")
+        return value.strip()
+    if name == "hedge":
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).strip().lower()
+        if normalized in _TRUE_VALUES:
+            return True
+        if normalized in _FALSE_VALUES:
+            return False
+        raise ValueError("debe ser booleano")
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError("debe ser numérico")
+    number = float(value)
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError("debe ser positivo")
+    if name in _OPTIONAL_INT_FIELDS:
+        if not number.is_integer():
+            raise ValueError("debe ser entero")
+        return int(number)
+    return number
+
+
+def _coerce_override(override: Dict[str, Any], where: str = "") -> Dict[str, Any]:
+    """Campos admitidos ya convertidos; los desconocidos se ignoran y los inválidos se descartan con aviso."""
+    changes = {}
+    for key, value in override.items():
+        if key not in _ROUTE_FIELDS:
+            continue
+        try:
+            changes[key] = _coerce_route_value(key, value)
+        except (TypeError, ValueError) as exc:
+            print(f"⚠️ MODEL_ROUTES_JSON {where}{key}={value!r} inválido ({str(exc)}), se ignora")
+    return changes
+
+
+def _parse_routes_override(raw: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(raw)
+    except ValueError as exc:
+        print(f"⚠️ MODEL_ROUTES_JSON inválido ({str(exc)}), usando rutas por defecto")
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+
+    parsed: Dict[str, Any] = {}
+    if isinstance(payload.get("stages"), dict):
+        parsed["stages"] = {
+            stage: _coerce_override(override, f"stages.{stage}.")
+            for stage, override in payload["stages"].items()
+            if isinstance(override, dict)
+        }
+    if isinstance(payload.get("agents"), dict):
+        parsed["agents"] = {
+            agent_key: {
+                stage: _coerce_override(override, f"agents.{agent_key}.{stage}.")
+                for stage, override in stages.items()
+                if isinstance(override, dict)
+            }
+            for agent_key, stages in payload["agents"].items()
+            if isinstance(stages, dict)
+        }
+    return parsed
+
+
+def _read_routes_override() -> Dict[str, Any]:
+    """
+    MODEL_ROUTES_JSON: {"stages": {etapa: {...}}, "agents": {id_o_nombre: {etapa: {...}}}}.
+
+    Los campos admitidos por etapa son model, max_tokens, timeout_s, fallback_model,
+    latency_budget_ms, deadline_s y hedge; un JSON inválido se ignora con aviso. El resultado se
+    cachea por el texto crudo de la variable, así que solo se re-parsea (y avisa) cuando cambia.
+    """
+    global _routes_override_cache
+    raw = os.getenv("MODEL_ROUTES_JSON", "").strip()
+    if not raw:
+        return {}
+    cached_raw, cached = _routes_override_cache
+    if cached_raw == raw:
+        return cached
+    parsed = _parse_routes_override(raw)
+    _routes_override_cache = (raw, parsed)
+    return parsed
+
+
+def _apply_override(route: ModelRoute, override: Any) -> ModelRoute:
+    if not isinstance(override, dict):
+        return route
+    changes = _coerce_override(override)
+    return replace(route, **changes) if changes else route
+
+
+def route_key(stage: str) -> str:
+    """Etapa base de la tabla de rutas para un nombre de etapa de uso."""
+    if stage in _STAGE_ALIASES:
+        return _STAGE_ALIASES[stage]
+    if stage.startswith(_RETRY_PREFIX):
+        return stage[len(_RETRY_PREFIX):]
+    return stage
+
+
+class LatencyTracker:
+    """Latencias observadas por (etapa, modelo) en una ventana deslizante, thread-safe."""
+
+    def __init__(self, window_seconds: float = LATENCY_WINDOW_SECONDS, max_samples: int = LATENCY_MAX_SAMPLES):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, samples: Deque[Tuple[float, float]], now: float) -> None:
+        while samples and now - samples[0][0] > self.window_seconds:
+            samples.popleft()
+
+    def record(self, stage: str, model: str, elapsed_ms: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            samples = self._samples.setdefault((stage, model), deque(maxlen=self.max_samples))
+            samples.append((now, float(elapsed_ms)))
+            self._prune(samples, now)
+
+    def percentile(self, stage: str, model: str, percentile: float = 95.0) -> Optional[float]:
+        """Percentil nearest-rank; None si hay menos de LATENCY_MIN_SAMPLES muestras en la ventana."""
+        with self._lock:
+            samples = self._samples.get((stage, model))
+            if not samples:
+                return None
+            self._prune(samples, time.monotonic())
+            values = sorted(value for _, value in samples)
+        if len(values) < LATENCY_MIN_SAMPLES:
+            return None
+        rank = max(1, math.ceil(percentile / 100.0 * len(values)))
+        return values[rank - 1]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._samples)
+        report: Dict[str, Dict[str, Any]] = {}
+        for stage, model in keys:
+            with self._lock:
+                count = len(self._samples.get((stage, model), ()))
+            report.setdefault(stage, {})[model] = {
+                "samples": count,
+                "p95_ms": self.percentile(stage, model),
+            }
+        return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+_LATENCY_TRACKER = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    return _LATENCY_TRACKER
+
+
+def _agent_overrides(overrides: Dict[str, Any], agent: Any) -> Dict[str, Any]:
+    by_agent = overrides.get("agents")
+    if not isinstance(by_agent, dict):
+        return {}
+    for key in (getattr(agent, "agent_id", None), getattr(agent, "agent_name", None)):
+        if key is not None and isinstance(by_agent.get(str(key)), dict):
+            return by_agent[str(key)]
+    return {}
+
+
+def resolve_model_route(agent: Any, stage: str) -> ModelRoute:
+    """
+    Ruta efectiva de `stage` para `agent`: tabla por defecto (con las variables de entorno de
+    modelo existentes), luego MODEL_ROUTES_JSON por etapa y por agente.
+
+    Si el p95 observado del modelo principal supera `latency_budget_ms` y hay `fallback_model`,
+    la ruta se degrada al modelo de respaldo hasta que las muestras salgan de la ventana.
+    """
+    key = route_key(stage)
+    route = _default_routes().get(key, ModelRoute(key))
+
+    overrides = _read_routes_override()
+    stage_overrides = overrides.get("stages") if isinstance(overrides.get("stages"), dict) else {}
+    route = _apply_override(route, stage_overrides.get(key))
+    route = _apply_override(route, _agent_overrides(overrides, agent).get(key))
+
+    if route.latency_budget_ms and route.fallback_model and route.fallback_model != route.model:
+        p95 = _LATENCY_TRACKER.percentile(key, route.model)
+        if p95 is not None and p95 > float(route.latency_budget_ms):
+            print(f"   ⚠️ p95 de {route.model} en '{key}' ({p95:.0f} ms) supera el presupuesto, usando {route.fallback_model}")
+            route = replace(route, model=route.fallback_model, downgraded=True)
+    return route
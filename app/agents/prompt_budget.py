@@ -0,0 +1,112 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from .token_utils import count_tokens
+
+
+DEFAULT_PROMPT_INPUT_TOKEN_BUDGET = 6000
+
+# Mayor prioridad = último bloque en recortarse.
+BLOCK_PRIORITIES: Dict[str, int] = {
+    "outline": 100,
+    "market_data": 90,
+    "top_stories": 80,
+    "organic_results": 70,
+    "related_context": 60,
+    "internal_links": 50,
+    "example_article": 40,
+    "trends": 30,
+}
+
+
+@dataclass
+class PromptBlock:
+    """Bloque dinámico del prompt. `header_lines` son las líneas que no tienen sentido sin contenido."""
+    name: str
+    text: str
+    priority: int
+    header_lines: int = 1
+
+
+def read_prompt_token_budget() -> int:
+    """Presupuesto de tokens de entrada desde PROMPT_INPUT_TOKEN_BUDGET (0 o negativo lo desactiva)."""
+    raw_value = os.getenv("PROMPT_INPUT_TOKEN_BUDGET", str(DEFAULT_PROMPT_INPUT_TOKEN_BUDGET))
+    try:
+        return int(str(raw_value).strip())
+    except (TypeError, ValueError):
+        print(f"   ⚠️ PROMPT_INPUT_TOKEN_BUDGET inválido ({raw_value}), usando {DEFAULT_PROMPT_INPUT_TOKEN_BUDGET}")
+        return DEFAULT_PROMPT_INPUT_TOKEN_BUDGET
+
+
+def _trim_block(block: PromptBlock, max_tokens: int) -> str:
+    """Conserva el encabezado y tantas líneas de cuerpo (desde el inicio) como entren en `max_tokens`."""
+    lines = block.text.split("\n")
+    header = lines[:block.header_lines]
+    body = lines[block.header_lines:]
+
+    used = count_tokens("\n".join(header))
+    kept: List[str] = []
+    for line in body:
+        line_tokens = count_tokens("\n" + line)
+        if used + line_tokens > max_tokens:
+            break
+        kept.append(line)
+        used += line_tokens
+
+    while kept and not kept[-1].strip():
+        kept.pop()
+    if not kept:
+        return ""
+    return "\n".join(header + kept)
+
+
+def apply_token_budget(blocks: List[PromptBlock], fixed_tokens: int, budget: int) -> Dict[str, Any]:
+    """
+    Ajusta los bloques dinámicos para que `fixed_tokens` + bloques no supere `budget`.
+
+    Recorta primero los bloques de menor prioridad (por líneas, desde el final) y los descarta
+    si no queda contenido más allá del encabezado. Con `budget` <= 0 no se recorta nada.
+    """
+    tokens = {block.name: count_tokens(block.text) for block in blocks}
+    texts = {block.name: block.text for block in blocks}
+    actions = {block.name: ("empty" if not block.text else "kept") for block in blocks}
+    total_before = fixed_tokens + sum(tokens.values())
+
+    if budget > 0 and total_before > budget:
+        overflow = total_before - budget
+        for block in sorted(blocks, key=lambda item: item.priority):
+            if overflow <= 0:
+                break
+            if not block.text:
+                continue
+
+            allowed = max(0, tokens[block.name] - overflow)
+            trimmed = _trim_block(block, allowed) if allowed else ""
+            trimmed_tokens = count_tokens(trimmed)
+            overflow -= tokens[block.name] - trimmed_tokens
+            texts[block.name] = trimmed
+            actions[block.name] = "trimmed" if trimmed else "dropped"
+
+    final_tokens = {name: count_tokens(text) for name, text in texts.items()}
+    total_after = fixed_tokens + sum(final_tokens.values())
+
+    return {
+        "texts": texts,
+        "report": {
+            "budget": budget if budget > 0 else None,
+            "fixed_tokens": fixed_tokens,
+            "total_before": total_before,
+            "total_after": total_after,
+            "within_budget": budget <= 0 or total_after <= budget,
+            "blocks": {
+                block.name: {
+                    "priority": block.priority,
+                    "tokens": tokens[block.name],
+                    "final_tokens": final_tokens[block.name],
+                    "action": actions[block.name],
+                }
+                for block in blocks
+            },
+        },
+    }
@@ -0,0 +1,288 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, Mapping, Optional
+
+from .token_utils import count_tokens
+
+
+DEFAULT_RPM_LIMIT = 500
+DEFAULT_TPM_LIMIT = 200_000
+DEFAULT_MAX_CONCURRENCY = 8
+
+# AIMD: +1/límite por éxito (≈ +1 por "ventana" de llamadas) y ×0.5 ante un 429, como máximo
+# una reducción por segundo para que una ráfaga de 429 simultáneos no colapse el límite.
+CONCURRENCY_DECREASE_FACTOR = 0.5
+CONCURRENCY_DECREASE_COOLDOWN_SECONDS = 1.0
+
+# Por debajo de esta fracción de cuota restante (headers x-ratelimit-*) el bucket local se
+# alinea con el servidor.
+HEADER_SYNC_THRESHOLD = 0.1
+
+_WAIT_SAMPLES = 500
+_DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Any) -> Optional[float]:
+    """Convierte "1s", "6m0s", "120ms" o "2.5" (headers de OpenAI) a segundos."""
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART_PATTERN.findall(text)
+    if not parts:
+        return None
+    factors = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * factors[unit] for amount, unit in parts)
+
+
+def _read_positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class TokenBucket:
+    """Bucket con reservas: cada llamada descuenta su costo y recibe cuánto debe esperar."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+
+    def reserve(self, amount: float) -> float:
+        """Reserva `amount` (acotado a la capacidad) y devuelve los segundos de espera."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+    def adjust(self, delta: float) -> None:
+        """Devuelve (delta > 0) o cobra (delta < 0) la diferencia entre lo estimado y lo real."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+    def sync(self, remaining: float, reset_seconds: Optional[float] = None) -> None:
+        """Alinea el bucket con la cuota que informa el servidor."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if remaining < self._tokens:
+                self._tokens = float(remaining)
+            if reset_seconds and remaining <= 0:
+                self._tokens = min(self._tokens, -reset_seconds * self.refill_per_second)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Límite de llamadas simultáneas con incremento aditivo y reducción multiplicativa (AIMD)."""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, rate_limited: bool = False, succeeded: bool = True) -> None:
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+            if rate_limited:
+                if now - self._last_decrease >= CONCURRENCY_DECREASE_COOLDOWN_SECONDS:
+                    self._limit = max(float(self.minimum), self._limit * CONCURRENCY_DECREASE_FACTOR)
+                    self._last_decrease = now
+            elif succeeded:
+                self._limit = min(float(self.maximum), self._limit + 1.0 / self._limit)
+            self._condition.notify_all()
+
+
+@dataclass
+class RateLimitTicket:
+    """Reserva de una llamada: el llamador completa `actual_tokens` y `headers` si los conoce."""
+
+    estimated_tokens: int
+    queue_wait_ms: float = 0.0
+    actual_tokens: Optional[int] = None
+    headers: Optional[Mapping[str, str]] = None
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    return type(exc).__name__ == "RateLimitError"
+
+
+def _error_headers(exc: BaseException) -> Optional[Mapping[str, str]]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None)
+
+
+class OpenAIRateLimiter:
+    """
+    Limitador compartido para las llamadas a OpenAI del proceso.
+
+    Combina buckets de requests y tokens estimados por minuto con un límite de concurrencia
+    adaptativo (AIMD) que reacciona a los 429 y a los headers `x-ratelimit-*`. La espera en cola
+    de cada llamada queda en `RateLimitTicket.queue_wait_ms` y agregada en `snapshot()`.
+    """
+
+    def __init__(self, rpm_limit: int, tpm_limit: int, max_concurrency: int):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.requests = TokenBucket(rpm_limit, rpm_limit / 60.0)
+        self.tokens = TokenBucket(tpm_limit, tpm_limit / 60.0)
+        self.concurrency = AdaptiveConcurrencyLimiter(initial=max_concurrency, maximum=max_concurrency)
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._stats = {"calls": 0, "rate_limited": 0, "queue_wait_ms_total": 0.0, "queue_wait_ms_max": 0.0}
+
+    def _acquire(self, estimated_tokens: int) -> RateLimitTicket:
+        started = time.perf_counter()
+        wait_seconds = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        self.concurrency.acquire()
+        queue_wait_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["queue_wait_ms_total"] = round(self._stats["queue_wait_ms_total"] + queue_wait_ms, 2)
+            self._stats["queue_wait_ms_max"] = max(self._stats["queue_wait_ms_max"], queue_wait_ms)
+            self._waits.append(queue_wait_ms)
+        return RateLimitTicket(estimated_tokens=estimated_tokens, queue_wait_ms=queue_wait_ms)
+
+    def _sync_from_headers(self, headers: Optional[Mapping[str, str]], rate_limited: bool) -> None:
+        if not headers:
+            return
+        try:
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            reset_requests = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            reset_tokens = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+            retry_after = parse_reset_duration(headers.get("retry-after"))
+        except AttributeError:
+            return
+
+        if remaining_requests is not None:
+            remaining = float(remaining_requests)
+            if rate_limited or remaining <= self.rpm_limit * HEADER_SYNC_THRESHOLD:
+                self.requests.sync(remaining, reset_requests)
+        if remaining_tokens is not None:
+            remaining = float(remaining_tokens)
+            if rate_limited or remaining <= self.tpm_limit * HEADER_SYNC_THRESHOLD:
+                self.tokens.sync(remaining, reset_tokens)
+        if rate_limited and retry_after:
+            self.requests.sync(0, retry_after)
+
+    def _release(self, ticket: RateLimitTicket, rate_limited: bool, succeeded: bool) -> None:
+        if ticket.actual_tokens is not None:
+            self.tokens.adjust(ticket.estimated_tokens - ticket.actual_tokens)
+        try:
+            self._sync_from_headers(ticket.headers, rate_limited)
+        except (TypeError, ValueError):
+            pass
+        if rate_limited:
+            with self._lock:
+                self._stats["rate_limited"] += 1
+        self.concurrency.release(rate_limited=rate_limited, succeeded=succeeded)
+
+    @contextmanager
+    def reserve(self, estimated_tokens: int = 0) -> Iterator[RateLimitTicket]:
+        """Bloquea hasta tener cupo; al salir registra 429/headers y ajusta la concurrencia."""
+        ticket = self._acquire(max(0, int(estimated_tokens)))
+        rate_limited = False
+        succeeded = False
+        try:
+            yield ticket
+            succeeded = True
+        except Exception as exc:
+            rate_limited = is_rate_limit_error(exc)
+            if rate_limited and ticket.headers is None:
+                ticket.headers = _error_headers(exc)
+            raise
+        finally:
+            self._release(ticket, rate_limited, succeeded)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            waits = sorted(self._waits)
+        p95 = waits[max(0, math.ceil(0.95 * len(waits)) - 1)] if waits else 0.0
+        return {
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "concurrency_limit": self.concurrency.limit,
+            "in_flight": self.concurrency.in_flight,
+            "calls": stats["calls"],
+            "rate_limited": stats["rate_limited"],
+            "queue_wait_ms": {
+                "total": stats["queue_wait_ms_total"],
+                "avg": round(stats["queue_wait_ms_total"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                "p95": p95,
+                "max": stats["queue_wait_ms_max"],
+            },
+        }
+
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """Tokens de entrada estimados de los mensajes más el `max_tokens` pedido."""
+    prompt_tokens = 0
+    for message in params.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            prompt_tokens += count_tokens(content) + 4
+    return prompt_tokens + int(params.get("max_tokens") or 0)
+
+
+_RATE_LIMITER: Optional[OpenAIRateLimiter] = None
+_RATE_LIMITER_LOCK = threading.Lock()
+
+
+def get_openai_rate_limiter() -> OpenAIRateLimiter:
+    """Limitador del proceso (OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, OPENAI_MAX_CONCURRENCY)."""
+    global _RATE_LIMITER
+    with _RATE_LIMITER_LOCK:
+        if _RATE_LIMITER is None:
+            _RATE_LIMITER = OpenAIRateLimiter(
+                rpm_limit=_read_positive_int_env("OPENAI_RPM_LIMIT", DEFAULT_RPM_LIMIT),
+                tpm_limit=_read_positive_int_env("OPENAI_TPM_LIMIT", DEFAULT_TPM_LIMIT),
+                max_concurrency=_read_positive_int_env("OPENAI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+            )
+        return _RATE_LIMITER
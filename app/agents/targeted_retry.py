@@ -0,0 +1,258 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .agent_content_utils import (
+    DEEP_ANALYSIS_KEYWORDS,
+    MIN_PARAGRAPH_WORDS,
+    MIN_REQUIRED_NUMERIC_EVIDENCES,
+    MIN_REQUIRED_SUBSTANTIVE_PARAGRAPHS,
+    _extract_numeric_evidences,
+    _normalize_text_for_matching,
+    build_source_context,
+    generate_article_content,
+)
+from .token_utils import count_tokens
+
+
+QUALITY_RETRY_MODE_FULL = "full"
+QUALITY_RETRY_MODE_TARGETED = "targeted"
+
+_SECTION_SPLIT_PATTERN = re.compile(r"(?m)^(?=##\s)")
+_SIGNIFICANT_WORD_PATTERN = re.compile(r"[a-z0-9%$]{5,}")
+# Problemas que no se arreglan reescribiendo secciones sueltas: van al reintento completo.
+_STRUCTURAL_ISSUE_PREFIXES = ("Estructura débil",)
+
+
+def read_quality_retry_mode() -> str:
+    """QUALITY_RETRY_MODE=targeted|full (full por defecto)."""
+    mode = os.getenv("QUALITY_RETRY_MODE", QUALITY_RETRY_MODE_FULL).strip().lower()
+    return mode if mode in {QUALITY_RETRY_MODE_FULL, QUALITY_RETRY_MODE_TARGETED} else QUALITY_RETRY_MODE_FULL
+
+
+@dataclass
+class ArticleSection:
+    index: int
+    text: str
+    heading: Optional[str] = None
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def is_body(self) -> bool:
+        return self.heading is not None
+
+    @property
+    def normalized(self) -> str:
+        return _normalize_text_for_matching(self.text)
+
+    @property
+    def numeric_evidence_count(self) -> int:
+        return len(_extract_numeric_evidences(self.text))
+
+    @property
+    def substantive_paragraph_count(self) -> int:
+        count = 0
+        for para in self.text.split("\n\n"):
+            para_clean = para.strip()
+            if para_clean and not para_clean.startswith("#") and not para_clean.startswith("-"):
+                if len(para_clean.split()) >= MIN_PARAGRAPH_WORDS:
+                    count += 1
+        return count
+
+    @property
+    def analysis_keyword_count(self) -> int:
+        text_lc = self.text.lower()
+        return sum(1 for keyword in DEEP_ANALYSIS_KEYWORDS if keyword in text_lc)
+
+
+def split_sections(content: str) -> List[ArticleSection]:
+    """Divide el artículo por encabezados `## `; "".join(textos) reconstruye el original."""
+    sections = []
+    for index, chunk in enumerate(part for part in _SECTION_SPLIT_PATTERN.split(content) if part):
+        first_line = chunk.split("\n", 1)[0]
+        heading = first_line.strip() if first_line.startswith("## ") else None
+        sections.append(ArticleSection(index=index, text=chunk, heading=heading))
+    return sections
+
+
+def _add_issue(section: ArticleSection, issue: str) -> None:
+    if issue not in section.issues:
+        section.issues.append(issue)
+
+
+def _weakest(sections: List[ArticleSection], metric: str, limit: int) -> List[ArticleSection]:
+    return sorted(sections, key=lambda section: (getattr(section, metric), section.index))[:max(1, limit)]
+
+
+def _best_matching_section(issue: str, sections: List[ArticleSection]) -> Optional[ArticleSection]:
+    issue_words = set(_SIGNIFICANT_WORD_PATTERN.findall(_normalize_text_for_matching(issue)))
+    if not issue_words:
+        return None
+    best, best_overlap = None, 1
+    for section in sections:
+        overlap = len(issue_words & set(_SIGNIFICANT_WORD_PATTERN.findall(section.normalized)))
+        if overlap > best_overlap:
+            best, best_overlap = section, overlap
+    return best
+
+
+def map_issues_to_sections(
+    sections: List[ArticleSection],
+    depth_validation: Dict[str, Any],
+    alignment: Dict[str, Any],
+    fact_check: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Asigna cada problema detectado a las secciones que lo causan.
+
+    Devuelve `{"sections": [...], "unmapped": [...]}`; cualquier problema sin sección (o estructural)
+    obliga a caer al reintento completo.
+    """
+    body = [section for section in sections if section.is_body]
+    unmapped: List[str] = []
+    if not body:
+        return {"sections": [], "unmapped": ["El artículo no tiene secciones ## para reintento dirigido"]}
+
+    for phrase in depth_validation.get("forbidden_phrase_hits", []) or []:
+        phrase_normalized = _normalize_text_for_matching(phrase)
+        hits = [section for section in sections if phrase_normalized and phrase_normalized in section.normalized]
+        for section in hits:
+            _add_issue(section, f'Reemplaza la frase vaga "{phrase}" por un dato o argumento concreto')
+        if not hits:
+            unmapped.append(f"Frase vaga no localizada: {phrase}")
+
+    for issue in depth_validation.get("issues", []) or []:
+        if issue.startswith(_STRUCTURAL_ISSUE_PREFIXES):
+            unmapped.append(issue)
+        elif issue.startswith("Falta respaldo empírico"):
+            deficit = MIN_REQUIRED_NUMERIC_EVIDENCES - int(depth_validation.get("numeric_evidence_count", 0) or 0)
+            for section in _weakest(body, "numeric_evidence_count", min(deficit, 3)):
+                _add_issue(section, "Agrega cifras concretas (%, $, montos, variaciones) con su fuente")
+        elif issue.startswith("Desarrollo insuficiente"):
+            deficit = MIN_REQUIRED_SUBSTANTIVE_PARAGRAPHS - int(depth_validation.get("substantive_paragraph_count", 0) or 0)
+            for section in _weakest(body, "substantive_paragraph_count", min(deficit, 3)):
+                _add_issue(section, f"Desarrolla al menos un párrafo sustancial de {MIN_PARAGRAPH_WORDS}+ palabras")
+        elif issue.startswith(("Profundidad baja", "Análisis insuficiente")):
+            for section in _weakest(body, "analysis_keyword_count", 2):
+                _add_issue(section, "Profundiza el análisis: causas, consecuencias, impacto y escenarios")
+        elif issue.startswith("Sin fuentes"):
+            _add_issue(body[0], "Cita al menos una fuente o dato verificable (según ..., informó ...)")
+        elif not issue.startswith("Contiene frases vagas"):
+            unmapped.append(issue)
+
+    weak_checks = [name for name, ok in ((alignment or {}).get("checks", {}) or {}).items() if not ok]
+    if weak_checks:
+        _add_issue(body[-1], "Refuerza la alineación con el perfil del agente en: " + ", ".join(weak_checks))
+
+    for issue in ((fact_check or {}).get("llm", {}) or {}).get("issues", []) or []:
+        section = _best_matching_section(issue, body)
+        if section is None:
+            unmapped.append(issue)
+        else:
+            _add_issue(section, f"Corrige este hallazgo de fact-check: {issue}")
+
+    return {"sections": [section for section in sections if section.issues], "unmapped": unmapped}
+
+
+def build_section_retry_prompt(
+    selected_trend: str,
+    content: str,
+    section: ArticleSection,
+    devil_review: Optional[Dict[str, Any]] = None,
+    source_context: str = "",
+) -> str:
+    headings = "\n".join(f"- {line.strip()}" for line in content.splitlines() if line.startswith("## "))
+    issues = "\n".join(f"- {issue}" for issue in section.issues)
+    critique = ""
+    devil_text = (devil_review or {}).get("critique", "") if isinstance(devil_review, dict) else ""
+    if devil_text:
+        critique_lines = [line.strip() for line in str(devil_text).splitlines() if line.strip()][:4]
+        critique = "\nCRÍTICA EDITORIAL GENERAL (aplícala solo si corresponde a esta sección):\n" + "\n".join(critique_lines) + "\n"
+    sources = (
+        f"\nFUENTES DISPONIBLES (las únicas de las que puedes tomar cifras nuevas):\n{source_context}\n"
+        if source_context
+        else "\nFUENTES DISPONIBLES: ninguna; no agregues cifras que no estén ya en el artículo.\n"
+    )
+
+    return (
+        f'Estás corrigiendo UNA sección de un artículo de FinGuru sobre "{selected_trend}".\n\n'
+        f"ESTRUCTURA DEL ARTÍCULO (no la modifiques):\n{headings}\n\n"
+        f"ARTÍCULO ACTUAL (solo referencia, no lo reescribas):\n{content}\n\n"
+        f"SECCIÓN A REESCRIBIR:\n{section.text.strip()}\n\n"
+        f"PROBLEMAS A CORREGIR EN ESTA SECCIÓN:\n{issues}\n"
+        f"{critique}"
+        f"{sources}\n"
+        "INSTRUCCIONES:\n"
+        f'- Devuelve SOLO la sección reescrita en Markdown, empezando con el encabezado "{section.heading}".\n'
+        "- No agregues otras secciones, título general ni conclusiones del artículo completo.\n"
+        "- Conserva los datos correctos que ya tiene la sección y no inventes cifras sin fuente.\n"
+        "- Toda cifra nueva debe salir de FUENTES DISPONIBLES; nombra la fuente al citarla.\n"
+    )
+
+
+def _splice_section(section: ArticleSection, regenerated: str) -> str:
+    text = regenerated.strip()
+    if text.startswith("## "):
+        # El encabezado original se conserva para no alterar la estructura del artículo.
+        text = text.split("\n", 1)[1].lstrip("\n") if "\n" in text else ""
+    text = f"{section.heading}\n\n{text}"
+    trailing = section.text[len(section.text.rstrip()):] or "\n\n"
+    return text + trailing
+
+
+class TargetedRetry:
+    """Regenera solo las secciones con problemas y las reinserta en el artículo."""
+
+    def run(
+        self,
+        agent: Any,
+        selected_trend: str,
+        content: str,
+        depth_validation: Dict[str, Any],
+        alignment: Dict[str, Any],
+        fact_check: Dict[str, Any],
+        devil_review: Optional[Dict[str, Any]] = None,
+        search_results: Optional[Dict[str, Any]] = None,
+        stage: str = "quality_retry_section",
+    ) -> Dict[str, Any]:
+        sections = split_sections(content)
+        mapping = map_issues_to_sections(sections, depth_validation, alignment, fact_check)
+        if mapping["unmapped"] or not mapping["sections"]:
+            return {
+                "status": "fallback",
+                "reason": "Problemas sin sección asignable: " + " | ".join(mapping["unmapped"] or ["ninguno mapeado"]),
+            }
+
+        targets: List[ArticleSection] = mapping["sections"]
+        max_tokens_cap = max(256, int(getattr(agent, "max_tokens", 1400)))
+        source_context = build_source_context(search_results or {})
+
+        def regenerate(section: ArticleSection) -> str:
+            max_tokens = min(max_tokens_cap, max(300, count_tokens(section.text) * 2))
+            prompt = build_section_retry_prompt(selected_trend, content, section, devil_review, source_context)
+            return generate_article_content(agent, prompt, stage=stage, max_tokens=max_tokens) or ""
+
+        with ThreadPoolExecutor(max_workers=min(4, len(targets))) as executor:
+            regenerated = list(executor.map(regenerate, targets))
+
+        changed: List[ArticleSection] = []
+        for section, new_text in zip(targets, regenerated):
+            if new_text.strip():
+                sections[section.index].text = _splice_section(section, new_text)
+                changed.append(sections[section.index])
+
+        if not changed:
+            return {"status": "fallback", "reason": "No se pudo regenerar ninguna sección"}
+
+        return {
+            "status": "success",
+            "content": "".join(section.text for section in sections),
+            "changed_text": "\n\n".join(section.text.strip() for section in changed),
+            "sections": [
+                {"index": section.index, "heading": section.heading, "issues": section.issues}
+                for section in changed
+            ],
+            "sections_total": len([section for section in sections if section.is_body]),
+        }
@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+DEFAULT_TOKENIZER_MODEL = "gpt-4o-mini"
+_FALLBACK_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional[Any]:
+    """Resuelve el encoding de tiktoken para el modelo; None si no está disponible."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        # tiktoken descarga el BPE la primera vez; sin red usamos la estimación por caracteres.
+        print(f"   ⚠️ tiktoken no disponible ({str(exc)}), usando estimación de tokens")
+        return None
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKENIZER_MODEL) -> int:
+    """Cuenta tokens con tiktoken (o ~4 caracteres por token si no está disponible)."""
+    if not isinstance(text, str) or not text:
+        return 0
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // _FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,234 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .agent_api_utils import get_all_agents_recent_articles
+from .llm_client import create_chat_completion
+from .model_routing import resolve_model_route
+from .policy_engine import ProfilePolicyEngine
+from .topic_selection import build_recent_articles_text, prefilter_trend_candidates, summarize_prefilter
+from .trends_snapshot import TrendItem, TrendsSnapshot
+
+
+SELECTION_STRATEGY_PER_AGENT = "per_agent"
+SELECTION_STRATEGY_BATCHED = "batched"
+SELECTION_STRATEGY_SOLVER = "solver"
+SELECTION_STRATEGIES = {SELECTION_STRATEGY_PER_AGENT, SELECTION_STRATEGY_BATCHED, SELECTION_STRATEGY_SOLVER}
+
+ASSIGNMENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "topic_assignment",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "assignments": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "agent_id": {"type": "integer"},
+                            "position": {"type": ["integer", "null"]},
+                            "reason": {"type": "string"},
+                        },
+                        "required": ["agent_id", "position", "reason"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["assignments"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def resolve_selection_strategy(strategy: Optional[str] = None) -> str:
+    """Estrategia explícita o TOPIC_SELECTION_STRATEGY (per_agent por defecto)."""
+    candidate = (strategy or os.getenv("TOPIC_SELECTION_STRATEGY", SELECTION_STRATEGY_PER_AGENT) or "").strip().lower()
+    if candidate not in SELECTION_STRATEGIES:
+        print(f"   ⚠️ Estrategia de selección desconocida '{candidate}', usando {SELECTION_STRATEGY_PER_AGENT}")
+        return SELECTION_STRATEGY_PER_AGENT
+    return candidate
+
+
+def _describe_agent(agent: Any, candidates: List[TrendItem]) -> str:
+    preferred_categories = getattr(agent, "preferred_categories", []) or []
+    forbidden_topics = getattr(agent, "forbidden_topics", []) or []
+    criteria = str(getattr(agent, "trending_prompt", "") or "").strip().replace("\n", " ")
+    if len(criteria) > 400:
+        criteria = criteria[:397] + "..."
+    eligible_positions = ", ".join(str(item.position) for item in candidates) or "ninguna"
+    return (
+        f"- AGENTE {agent.agent_id} ({agent.agent_name})\n"
+        f"  Audiencia: {agent.target_audience} | Estilo: {agent.writing_style} | Tono: {agent.tone}\n"
+        f"  Categorías preferidas: {', '.join(preferred_categories) if preferred_categories else 'Sin preferencias explícitas'}\n"
+        f"  Temas prohibidos: {', '.join(forbidden_topics) if forbidden_topics else 'Sin temas prohibidos explícitos'}\n"
+        f"  Criterios: {criteria or 'Sin criterios adicionales'}\n"
+        f"  Posiciones elegibles: {eligible_positions}\n"
+    )
+
+
+def build_assignment_prompt(
+    agents: List[Any],
+    candidates_by_agent: Dict[Any, List[TrendItem]],
+    recent_articles_text: str,
+) -> str:
+    union: Dict[int, TrendItem] = {}
+    for candidates in candidates_by_agent.values():
+        for item in candidates:
+            union[item.position] = item
+    trends_text = "".join(f"{union[position].line}\n" for position in sorted(union))
+    agents_text = "".join(_describe_agent(agent, candidates_by_agent[agent.agent_id]) for agent in agents)
+
+    return f"""Eres el editor jefe de FinGuru. Debes repartir las tendencias actuales de Argentina entre los agentes redactores.
+
+TENDENCIAS ELEGIBLES (posición original):
+{trends_text}
+AGENTES:
+{agents_text}
+{recent_articles_text}
+
+🎯 OBJETIVO: asignar a cada agente UNA tendencia de sus "Posiciones elegibles" que encaje con su perfil.
+
+🚫 REGLAS ESTRICTAS:
+- Cada tendencia se asigna como máximo a UN agente (asignación uno a uno).
+- Solo puedes asignar posiciones que figuren en las "Posiciones elegibles" de ese agente.
+- Prioriza economía, mercados, dólar, inflación, tasas, bancos, deuda, inversión y política fiscal.
+- Evita tendencias sobre el MISMO evento/persona/noticia de los artículos recientes.
+- Si ninguna tendencia disponible es adecuada para un agente, usa position = null.
+
+Devuelve una entrada por agente con agent_id, position y una razón breve."""
+
+
+def _assignment_success(item: TrendItem, reason: str, source: str, prefilter_summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "success",
+        "selected_position": item.position,
+        "selected_title": item.title,
+        "selected_reason": reason,
+        "llm_skipped": source != "llm",
+        "prefilter": prefilter_summary,
+        "assignment": {"strategy": SELECTION_STRATEGY_BATCHED, "source": source},
+    }
+
+
+def _assignment_none(reason: str, prefilter_summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "no_suitable_topic",
+        "message": "No se asignó ninguna tendencia adecuada a este agente",
+        "reason": reason,
+        "prefilter": prefilter_summary,
+        "assignment": {"strategy": SELECTION_STRATEGY_BATCHED, "source": "llm"},
+    }
+
+
+def assign_topics_batched(
+    coordinator: Any,
+    agents: List[Any],
+    snapshot: TrendsSnapshot,
+    policy_engine: ProfilePolicyEngine,
+) -> Dict[str, Any]:
+    """
+    Asigna tendencias a todos los agentes con una única llamada de salida estructurada.
+
+    Devuelve `{"assignments": {agent_id: selección}, "llm": {...}}`, donde cada selección tiene la
+    misma forma que `select_trending_topic`. Las respuestas inválidas o en conflicto se reparan de
+    forma determinista con la primera posición elegible libre.
+    """
+    all_recent_articles = get_all_agents_recent_articles(coordinator, limit_per_agent=2)
+    recent_articles = all_recent_articles.get("articles", []) if all_recent_articles.get("status") == "success" else []
+
+    candidates_by_agent: Dict[Any, List[TrendItem]] = {}
+    prefilter_by_agent: Dict[Any, Dict[str, Any]] = {}
+    for agent in agents:
+        prefilter = prefilter_trend_candidates(agent, snapshot, recent_articles, policy_engine)
+        candidates_by_agent[agent.agent_id] = prefilter["eligible"]
+        prefilter_by_agent[agent.agent_id] = summarize_prefilter(prefilter)
+
+    route = resolve_model_route(coordinator, "topic_assignment")
+    llm_report: Dict[str, Any] = {"status": "skipped", "model": route.model}
+    proposed: Dict[Any, Dict[str, Any]] = {}
+
+    needs_llm = any(len(candidates) > 1 for candidates in candidates_by_agent.values())
+    if needs_llm:
+        try:
+            response = create_chat_completion(
+                coordinator,
+                "topic_assignment",
+                route=route,
+                messages=[
+                    {"role": "system", "content": "Eres un editor jefe que reparte temas sin repetir. Responde solo con el JSON solicitado."},
+                    {
+                        "role": "user",
+                        "content": build_assignment_prompt(
+                            agents,
+                            candidates_by_agent,
+                            build_recent_articles_text(all_recent_articles),
+                        ),
+                    },
+                ],
+                response_format=ASSIGNMENT_RESPONSE_FORMAT,
+                max_tokens=route.max_tokens or 80 + 60 * len(agents),
+                temperature=0.2,
+            )
+            payload = json.loads(response.choices[0].message.content or "{}")
+            for entry in payload.get("assignments", []):
+                if isinstance(entry, dict) and entry.get("agent_id") in candidates_by_agent:
+                    proposed.setdefault(entry["agent_id"], entry)
+            llm_report = {"status": "success", "model": route.model, "assignments_returned": len(proposed)}
+        except Exception as exc:
+            print(f"   ⚠️ Asignación batched falló ({str(exc)}), usando asignación determinista")
+            llm_report = {"status": "error", "model": route.model, "error": str(exc)}
+
+    taken: set = set()
+    assignments: Dict[Any, Dict[str, Any]] = {}
+    repaired: List[Any] = []
+
+    # Primero se respetan las elecciones válidas del LLM; luego se reparan las demás en orden.
+    for agent in agents:
+        entry = proposed.get(agent.agent_id)
+        if entry is None:
+            continue
+        by_position = {item.position: item for item in candidates_by_agent[agent.agent_id]}
+        position = entry.get("position")
+        if position is None:
+            assignments[agent.agent_id] = _assignment_none(
+                entry.get("reason") or "El LLM no encontró tendencia adecuada",
+                prefilter_by_agent[agent.agent_id],
+            )
+        elif position in by_position and position not in taken:
+            taken.add(position)
+            assignments[agent.agent_id] = _assignment_success(
+                by_position[position],
+                entry.get("reason") or "Asignación batched",
+                "llm",
+                prefilter_by_agent[agent.agent_id],
+            )
+
+    for agent in agents:
+        if agent.agent_id in assignments:
+            continue
+        free = [item for item in candidates_by_agent[agent.agent_id] if item.position not in taken]
+        if not free:
+            assignments[agent.agent_id] = {
+                "status": "no_suitable_topic",
+                "message": "No se encontró ningún tema que cumpla con los criterios de calidad",
+                "reason": "Sin tendencias elegibles libres tras filtros deterministas",
+                "prefilter": prefilter_by_agent[agent.agent_id],
+                "assignment": {"strategy": SELECTION_STRATEGY_BATCHED, "source": "deterministic"},
+            }
+            continue
+        taken.add(free[0].position)
+        if agent.agent_id in proposed:
+            repaired.append(agent.agent_id)
+        assignments[agent.agent_id] = _assignment_success(
+            free[0],
+            "Asignación automática: primera tendencia elegible libre",
+            "deterministic",
+            prefilter_by_agent[agent.agent_id],
+        )
+
+    llm_report["repaired_agent_ids"] = repaired
+    return {"assignments": assignments, "llm": llm_report}
@@ -0,0 +1,285 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .agent_content_utils import _is_topic_similar_to_recent_articles, _is_topic_trivial_or_contextual
+from .llm_client import build_request_params
+from .model_routing import resolve_model_route
+from .policy_engine import ProfilePolicyEngine
+from .trends_snapshot import TrendItem, TrendsSnapshot
+
+
+NO_SUITABLE_TOPIC = "NO_SUITABLE_TOPIC"
+
+SELECTION_SYSTEM_MESSAGE = (
+    "Eres un editor experto en seleccionar noticias relevantes para Argentina. "
+    "Evita repetir temas ya cubiertos y NUNCA elijas tendencias marcadas como YA SELECCIONADAS. "
+    "Responde exactamente en el formato solicitado."
+)
+
+
+def _forbidden_hits(agent: Any, title: str) -> List[str]:
+    title_lc = (title or "").lower()
+    return [
+        topic
+        for topic in (getattr(agent, "forbidden_topics", []) or [])
+        if isinstance(topic, str) and topic.strip() and topic.strip().lower() in title_lc
+    ]
+
+
+def prefilter_trend_candidates(
+    agent: Any,
+    snapshot: TrendsSnapshot,
+    recent_articles: List[Dict[str, Any]],
+    policy_engine: ProfilePolicyEngine,
+    selected_positions: Iterable[int] = (),
+    selected_titles: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Aplica los gates deterministas (ya seleccionada, foco financiero, forbidden_topics, tema trivial
+    y similitud con artículos recientes) sobre todas las tendencias antes de consultar al LLM.
+
+    La similitud es un gate blando: si descarta todas las tendencias restantes se ignora, igual que
+    el flujo anterior procedía con la selección original cuando no había alternativa.
+    """
+    rejected: Dict[str, List[Dict[str, Any]]] = {
+        "already_selected": [],
+        "financial_relevance": [],
+        "forbidden_topics": [],
+        "trivial": [],
+        "similar_to_recent": [],
+    }
+
+    eligible: List[TrendItem] = []
+    for item in snapshot.items:
+        if snapshot.is_selected(item, selected_positions, selected_titles):
+            rejected["already_selected"].append({"position": item.position, "title": item.title})
+            continue
+
+        relevance = policy_engine.evaluate_financial_relevance(item.title, list(item.categories))
+        if not relevance.get("allowed"):
+            rejected["financial_relevance"].append(
+                {"position": item.position, "title": item.title, "score": relevance.get("score", 0)}
+            )
+            continue
+
+        hits = _forbidden_hits(agent, item.title)
+        if hits:
+            rejected["forbidden_topics"].append({"position": item.position, "title": item.title, "hits": hits})
+            continue
+
+        if _is_topic_trivial_or_contextual(item.title):
+            rejected["trivial"].append({"position": item.position, "title": item.title})
+            continue
+
+        eligible.append(item)
+
+    similarity_gate_applied = False
+    if recent_articles and eligible:
+        not_similar = [
+            item for item in eligible
+            if not _is_topic_similar_to_recent_articles(item.title, recent_articles)
+        ]
+        if not_similar:
+            similarity_gate_applied = True
+            kept_positions = {item.position for item in not_similar}
+            rejected["similar_to_recent"] = [
+                {"position": item.position, "title": item.title}
+                for item in eligible
+                if item.position not in kept_positions
+            ]
+            eligible = not_similar
+
+    return {
+        "eligible": eligible,
+        "rejected": rejected,
+        "similarity_gate_applied": similarity_gate_applied,
+        "total": len(snapshot.items),
+    }
+
+
+def summarize_prefilter(prefilter: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumen serializable del pre-filtro para trazabilidad en la respuesta de selección."""
+    return {
+        "total": prefilter.get("total", 0),
+        "eligible": len(prefilter.get("eligible", [])),
+        "eligible_positions": [item.position for item in prefilter.get("eligible", [])],
+        "rejected": {gate: len(items) for gate, items in prefilter.get("rejected", {}).items()},
+        "similarity_gate_applied": prefilter.get("similarity_gate_applied", False),
+    }
+
+
+def build_recent_articles_text(all_recent_articles: Dict[str, Any]) -> str:
+    if not (all_recent_articles.get("status") == "success" and all_recent_articles.get("articles")):
+        return "\n✨ (No se encontraron artículos recientes de ningún agente - primera ejecución del sistema)\n"
+
+    recent_articles_text = "\nARTÍCULOS RECIENTES DE TODOS LOS AGENTES (para evitar repetir temas):\n"
+    recent_articles_text += f"🔍 Total: {all_recent_articles.get('total', 0)} artículos de {all_recent_articles.get('agents_processed', 0)} agentes\n\n"
+
+    for i, article in enumerate(all_recent_articles["articles"][:15], 1):
+        title = article.get('title', 'Sin título')
+        excerpt = article.get('excerpt', 'Sin descripción')
+        category = article.get('category', 'Sin categoría')
+        agent_name = article.get('agent_name', 'Agente desconocido')
+
+        if len(excerpt) > 100:
+            excerpt = excerpt[:97] + "..."
+
+        recent_articles_text += f"{i}. 📰 {title}\n"
+        recent_articles_text += f"   👤 Agente: {agent_name}\n"
+        recent_articles_text += f"   📝 {excerpt}\n"
+        recent_articles_text += f"   🏷️ Categoría: {category}\n"
+        recent_articles_text += "\n"
+
+    if all_recent_articles.get('total', 0) > 15:
+        remaining = all_recent_articles.get('total', 0) - 15
+        recent_articles_text += f"... y {remaining} artículos más de otros agentes\n\n"
+
+    recent_articles_text += "🚫 IMPORTANTE: EVITA ELEGIR TENDENCIAS que sean muy similares en CONTENIDO ESPECÍFICO a estos artículos recientes.\n"
+    recent_articles_text += "✅ Puedes elegir la MISMA CATEGORÍA (deportes, política, etc.) pero con un TEMA DIFERENTE.\n"
+    recent_articles_text += "💡 Ejemplo: Si hay un artículo sobre 'Messi gana Balón de Oro', puedes escribir sobre 'River vs Boca' (ambos deportes, pero temas diferentes).\n"
+    recent_articles_text += "🎯 Solo evita temas que hablen exactamente del mismo evento, persona o noticia específica.\n"
+    return recent_articles_text
+
+
+def build_already_selected_text(selected_positions: Iterable[int], selected_titles: Iterable[str]) -> str:
+    selected_titles = list(selected_titles)
+    if not selected_titles:
+        return ""
+    already_selected_text = "\nTENDENCIAS YA SELECCIONADAS EN ESTA SESIÓN (NO ELEGIR ESTAS):\n"
+    for pos, trend in zip(selected_positions, selected_titles):
+        already_selected_text += f"  ❌ Posición {pos}: {trend}\n"
+    already_selected_text += "\nEVITA ESTAS TENDENCIAS COMPLETAMENTE - Ya fueron elegidas por otros agentes en esta misma ejecución.\n"
+    return already_selected_text
+
+
+def build_selection_prompt(
+    agent: Any,
+    candidates: List[TrendItem],
+    recent_articles_text: str,
+    already_selected_text: str,
+) -> str:
+    """Prompt de selección con solo las tendencias elegibles (se conservan sus posiciones originales)."""
+    trends_text = "".join(f"{item.line}\n" for item in candidates)
+    preferred_categories = getattr(agent, "preferred_categories", []) or []
+    forbidden_topics = getattr(agent, "forbidden_topics", []) or []
+
+    return f"""Eres un editor de noticias especializado en Argentina. Te proporciono {len(candidates)} tendencias actuales en Argentina que ya pasaron los filtros editoriales de FinGuru.
+
+TENDENCIAS ELEGIBLES (últimas 24h, con su posición original):
+{trends_text}
+{recent_articles_text}
+{already_selected_text}
+
+🎯 OBJETIVO: ELEGIR UNA SOLA tendencia que sea MÁS RELEVANTE e INTERESANTE para el público argentino.
+
+💰 PRIORIDAD FIN.GURU (OBLIGATORIA):
+- Prioriza tendencias de economía, mercados, dólar, inflación, tasas, bancos, deuda, inversión y política fiscal.
+- Si una tendencia es masiva pero no financiera (farándula, reality, chimentos), debe descartarse.
+
+📋 CRITERIOS DE SELECCIÓN:
+{agent.trending_prompt}
+
+👤 PERFIL DEL AGENTE (RESPETAR):
+- Audiencia objetivo: {agent.target_audience}
+- Estilo: {agent.writing_style}
+- Tono: {agent.tone}
+- Categorías preferidas: {', '.join(preferred_categories) if preferred_categories else 'Sin preferencias explícitas'}
+- Temas prohibidos: {', '.join(forbidden_topics) if forbidden_topics else 'Sin temas prohibidos explícitos'}
+
+🚫 REGLAS ESTRICTAS - NO VIOLAR:
+- ❌ PROHIBIDO: NO elijas tendencias fuera de la lista de TENDENCIAS ELEGIBLES
+- ❌ PROHIBIDO: NO elijas tendencias sobre el MISMO evento/persona/noticia específica de los artículos recientes
+- ❌ PROHIBIDO: NO elijas tendencias alineadas con temas prohibidos del perfil
+- ✅ PERMITIDO: Puedes elegir la MISMA CATEGORÍA pero con tema específico diferente
+- 🔍 VALIDACIÓN: Si NINGUNA tendencia cumple con criterios, responde "{NO_SUITABLE_TOPIC}"
+
+🔍 ANÁLISIS REQUERIDO:
+1. Revisa cada tendencia elegible
+2. Compara CONTENIDO ESPECÍFICO (no categorías) con artículos recientes
+3. Evalúa si habla del mismo evento/persona/noticia específica
+4. Elige tendencia con contenido diferente y valor investigativo
+5. Si NO encuentras tendencia adecuada, responde "{NO_SUITABLE_TOPIC}"
+
+FORMATO DE RESPUESTA OBLIGATORIO:
+POSICIÓN: [posición original de la tendencia elegida O "{NO_SUITABLE_TOPIC}"]
+TÍTULO: [título exacto de la tendencia elegida O "NINGUNO"]
+RAZÓN: [explicación detallada de por qué la elegiste y cómo el CONTENIDO ESPECÍFICO es diferente a los artículos recientes, O por qué ninguna tendencia es adecuada]
+
+Ejemplo exitoso:
+POSICIÓN: 3
+TÍTULO: Dólar blue Argentina
+RAZÓN: Aunque hay artículos de economía recientes, este tema específico sobre el dólar blue es diferente del contenido ya publicado sobre inflación
+
+Ejemplo sin tema adecuado:
+POSICIÓN: {NO_SUITABLE_TOPIC}
+TÍTULO: NINGUNO
+RAZÓN: Las tendencias disponibles hablan exactamente de los mismos eventos específicos ya cubiertos en artículos recientes"""
+
+
+def build_selection_request(
+    agent: Any,
+    candidates: List[TrendItem],
+    recent_articles_text: str,
+    already_selected_text: str,
+    stage: str = "selection",
+) -> Dict[str, Any]:
+    """Parámetros completos de la llamada de selección (se reutilizan en el modo batch)."""
+    return build_request_params(
+        resolve_model_route(agent, stage),
+        messages=[
+            {"role": "system", "content": SELECTION_SYSTEM_MESSAGE},
+            {"role": "user", "content": build_selection_prompt(agent, candidates, recent_articles_text, already_selected_text)},
+        ],
+        temperature=0.3,
+    )
+
+
+def parse_selection_response(selection_response: str) -> Dict[str, Any]:
+    """Parsea el formato POSICIÓN/TÍTULO/RAZÓN. `position` es int, NO_SUITABLE_TOPIC o None."""
+    selected_position: Any = None
+    selected_title: Optional[str] = None
+    selected_reason: Optional[str] = None
+
+    for line in (selection_response or "").split('\n'):
+        line = line.strip()
+        if line.startswith('POSICIÓN:'):
+            position_text = line.replace('POSICIÓN:', '').strip()
+            if position_text == NO_SUITABLE_TOPIC:
+                selected_position = NO_SUITABLE_TOPIC
+            else:
+                try:
+                    selected_position = int(position_text)
+                except ValueError:
+                    pass
+        elif line.startswith('TÍTULO:'):
+            selected_title = line.replace('TÍTULO:', '').strip()
+            if selected_title == "NINGUNO":
+                selected_title = NO_SUITABLE_TOPIC
+        elif line.startswith('RAZÓN:'):
+            selected_reason = line.replace('RAZÓN:', '').strip()
+
+    return {
+        "position": selected_position,
+        "title": selected_title,
+        "reason": selected_reason,
+        "no_suitable_topic": NO_SUITABLE_TOPIC in (selected_position, selected_title),
+    }
+
+
+def resolve_selected_candidate(
+    parsed: Dict[str, Any],
+    candidates: List[TrendItem],
+) -> Tuple[Optional[TrendItem], bool]:
+    """
+    Mapea la respuesta del LLM a un candidato elegible (por posición o, si no, por título).
+    Devuelve (candidato, coincidió); si el LLM eligió algo fuera de la lista se usa el primer elegible.
+    """
+    by_position = {item.position: item for item in candidates}
+    if isinstance(parsed.get("position"), int) and parsed["position"] in by_position:
+        return by_position[parsed["position"]], True
+
+    title_lc = str(parsed.get("title") or "").strip().lower()
+    for item in candidates:
+        if title_lc and item.title.strip().lower() == title_lc:
+            return item, True
+
+    return (candidates[0] if candidates else None), False
@@ -0,0 +1,186 @@
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .agent_api_utils import get_all_agents_recent_articles
+from .agent_content_utils import _is_topic_similar_to_recent_articles
+from .policy_engine import ProfilePolicyEngine
+from .topic_assignment import SELECTION_STRATEGY_SOLVER
+from .topic_selection import prefilter_trend_candidates, summarize_prefilter
+from .trends_snapshot import TrendItem, TrendsSnapshot
+
+
+# Puntaje mínimo para asignar una tendencia: por debajo el agente queda sin tema ("none").
+NONE_ASSIGNMENT_SCORE = 5.0
+_INELIGIBLE_SCORE = -1e6
+
+FINANCIAL_SCORE_WEIGHT = 4.0
+FINANCIAL_SCORE_CAP = 10
+PREFERRED_CATEGORY_BONUS = 15.0
+SEARCH_VOLUME_WEIGHT = 3.0
+RECENT_SIMILARITY_PENALTY = 25.0
+
+
+def _hungarian_max_assignment(scores: np.ndarray) -> List[int]:
+    """
+    Asignación uno a uno de máximo puntaje (Kuhn-Munkres con potenciales, O(n²·m)).
+
+    `scores` es filas × columnas con filas <= columnas; devuelve la columna asignada a cada fila.
+    """
+    cost = -scores
+    n_rows, n_cols = cost.shape
+    u = np.zeros(n_rows + 1)
+    v = np.zeros(n_cols + 1)
+    owner = np.zeros(n_cols + 1, dtype=int)  # owner[j] = fila (1-based) asignada a la columna j
+    way = np.zeros(n_cols + 1, dtype=int)
+
+    for row in range(1, n_rows + 1):
+        owner[0] = row
+        col0 = 0
+        min_reduced = np.full(n_cols + 1, np.inf)
+        used = np.zeros(n_cols + 1, dtype=bool)
+        while True:
+            used[col0] = True
+            row0 = owner[col0]
+            free = ~used[1:]
+            reduced = cost[row0 - 1] - u[row0] - v[1:]
+            improved = free & (reduced < min_reduced[1:])
+            min_reduced[1:][improved] = reduced[improved]
+            way[1:][improved] = col0
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            col1 = int(np.argmin(candidates)) + 1
+            delta = candidates[col1 - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[owner[used_cols]] += delta
+            v[used_cols] -= delta
+            min_reduced[1:][free] -= delta
+
+            col0 = col1
+            if owner[col0] == 0:
+                break
+
+        while col0:
+            col1 = way[col0]
+            owner[col0] = owner[col1]
+            col0 = col1
+
+    assignment = [-1] * n_rows
+    for col in range(1, n_cols + 1):
+        if owner[col]:
+            assignment[owner[col] - 1] = col - 1
+    return assignment
+
+
+def _preferred_category_hit(agent: Any, item: TrendItem) -> bool:
+    preferred = ProfilePolicyEngine._normalize_list(getattr(agent, "preferred_categories", []))
+    if not preferred:
+        return False
+    haystack = " ".join([item.title.lower()] + [category.lower() for category in item.categories])
+    return any(category in haystack for category in preferred)
+
+
+def build_score_matrix(
+    agents: List[Any],
+    snapshot: TrendsSnapshot,
+    recent_articles: List[Dict[str, Any]],
+    policy_engine: ProfilePolicyEngine,
+) -> Dict[str, Any]:
+    """
+    Matriz agentes × tendencias con los gates deterministas como restricciones duras y un puntaje
+    por relevancia financiera, score_delta del perfil, categorías preferidas, volumen y similitud.
+    """
+    items = list(snapshot.items)
+    scores = np.full((len(agents), len(items)), _INELIGIBLE_SCORE)
+    prefilter_by_agent: Dict[Any, Dict[str, Any]] = {}
+
+    # Componentes independientes del agente: se calculan una sola vez por tendencia.
+    trend_base = np.zeros(len(items))
+    for index, item in enumerate(items):
+        relevance = policy_engine.evaluate_financial_relevance(item.title, list(item.categories))
+        base = FINANCIAL_SCORE_WEIGHT * min(int(relevance.get("score", 0) or 0), FINANCIAL_SCORE_CAP)
+        try:
+            volume = float(item.search_volume or 0)
+        except (TypeError, ValueError):
+            volume = 0.0
+        base += SEARCH_VOLUME_WEIGHT * math.log10(volume + 1)
+        if recent_articles and _is_topic_similar_to_recent_articles(item.title, recent_articles):
+            base -= RECENT_SIMILARITY_PENALTY
+        trend_base[index] = base
+
+    column_by_position = {item.position: index for index, item in enumerate(items)}
+    for row, agent in enumerate(agents):
+        # La similitud con artículos recientes entra como penalización, no como gate.
+        prefilter = prefilter_trend_candidates(agent, snapshot, [], policy_engine)
+        prefilter_by_agent[agent.agent_id] = summarize_prefilter(prefilter)
+        for item in prefilter["eligible"]:
+            column = column_by_position[item.position]
+            decision = policy_engine.evaluate_topic(agent, item.title, list(item.categories))
+            if not decision.get("allowed"):
+                continue
+            score = trend_base[column] + float(decision.get("score_delta", 0) or 0)
+            if _preferred_category_hit(agent, item):
+                score += PREFERRED_CATEGORY_BONUS
+            scores[row, column] = score
+
+    return {"scores": scores, "items": items, "prefilter_by_agent": prefilter_by_agent}
+
+
+def solve_topic_assignment(
+    agents: List[Any],
+    snapshot: TrendsSnapshot,
+    recent_articles: List[Dict[str, Any]],
+    policy_engine: ProfilePolicyEngine,
+    none_score: float = NONE_ASSIGNMENT_SCORE,
+) -> Dict[str, Any]:
+    """Resuelve la asignación óptima agente→tendencia; cada agente tiene una columna "none" propia."""
+    matrix = build_score_matrix(agents, snapshot, recent_articles, policy_engine)
+    scores = matrix["scores"]
+    items: List[TrendItem] = matrix["items"]
+
+    none_block = np.full((len(agents), len(agents)), _INELIGIBLE_SCORE)
+    np.fill_diagonal(none_block, none_score)
+    augmented = np.hstack([scores, none_block]) if len(agents) else scores
+    columns = _hungarian_max_assignment(augmented) if len(agents) else []
+
+    assignments: Dict[Any, Dict[str, Any]] = {}
+    for row, agent in enumerate(agents):
+        column = columns[row]
+        prefilter_summary = matrix["prefilter_by_agent"][agent.agent_id]
+        assignment_meta = {"strategy": SELECTION_STRATEGY_SOLVER, "source": "solver"}
+        if 0 <= column < len(items) and scores[row, column] > _INELIGIBLE_SCORE:
+            item = items[column]
+            score = round(float(scores[row, column]), 2)
+            assignments[agent.agent_id] = {
+                "status": "success",
+                "selected_position": item.position,
+                "selected_title": item.title,
+                "selected_reason": f"Asignación óptima por puntaje determinista ({score})",
+                "llm_skipped": True,
+                "prefilter": prefilter_summary,
+                "assignment": {**assignment_meta, "score": score},
+            }
+        else:
+            assignments[agent.agent_id] = {
+                "status": "no_suitable_topic",
+                "message": "No se encontró ningún tema que cumpla con los criterios de calidad",
+                "reason": f"Ninguna tendencia elegible supera el umbral de asignación ({none_score})",
+                "prefilter": prefilter_summary,
+                "assignment": assignment_meta,
+            }
+    return {"assignments": assignments}
+
+
+def assign_topics_solver(
+    coordinator: Any,
+    agents: List[Any],
+    snapshot: TrendsSnapshot,
+    policy_engine: ProfilePolicyEngine,
+) -> Dict[str, Any]:
+    """Misma interfaz que `assign_topics_batched`, sin llamadas al LLM."""
+    all_recent_articles = get_all_agents_recent_articles(coordinator, limit_per_agent=2)
+    recent_articles = all_recent_articles.get("articles", []) if all_recent_articles.get("status") == "success" else []
+    solved = solve_topic_assignment(agents, snapshot, recent_articles, policy_engine)
+    return {"assignments": solved["assignments"], "llm": None}
@@ -1,20 +1,32 @@
 import hashlib
+import json
 import os
 import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from .agent_api_utils import get_recent_finguru_articles, search_google_news
 from .agent_content_utils import (
     _extract_trend_title,
     _validate_article_depth,
-    create_prompt,
+    build_prompt_bundle,
+    build_source_context,
     generate_article_content,
     process_article_data,
 )
+from .llm_client import build_request_params, create_chat_completion
+from .llm_usage import UsageTracker
+from .model_routing import resolve_model_route
 from .market_data_utils import get_market_data_snapshot
 from .policy_engine import ProfilePolicyEngine
+from .targeted_retry import QUALITY_RETRY_MODE_FULL, QUALITY_RETRY_MODE_TARGETED, TargetedRetry, read_quality_retry_mode
+
+
+def _sources_section(sources: str) -> str:
+    if not sources:
+        return ""
+    return f"FUENTES (contrasta cada cifra del borrador contra estas fuentes):\n{sources}\n\n"
 
 
 def _extract_trend_payload(trends_data: Dict[str, Any], position: Optional[int]) -> Dict[str, Any]:
@@ -39,15 +51,28 @@ class TopicSelector:
     def __init__(self, policy_engine: ProfilePolicyEngine):
         self.policy_engine = policy_engine
 
-    def select(self, agent: Any, trends_data: Dict[str, Any], topic_position: Optional[int], user_id: Optional[int]) -> Dict[str, Any]:
+    def select(
+        self,
+        agent: Any,
+        trends_data: Dict[str, Any],
+        topic_position: Optional[int],
+        user_id: Optional[int],
+        preselected: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         if topic_position is None:
-            selection_result = agent.select_trending_topic(trends_data, user_id)
+            # `preselected` llega de la asignación batched del coordinador (misma forma que select_trending_topic).
+            selection_result = preselected if preselected is not None else agent.select_trending_topic(trends_data, user_id)
             if selection_result.get("status") != "success":
                 return selection_result
 
             selected_position = selection_result.get("selected_position")
             selected_title = selection_result.get("selected_title")
             selected_reason = selection_result.get("selected_reason")
+            selection_meta = {
+                key: selection_result[key]
+                for key in ("llm_skipped", "prefilter", "assignment")
+                if key in selection_result
+            }
         else:
             selected_position = topic_position
             selected_title = _extract_trend_title(trends_data, topic_position)
@@ -57,6 +82,7 @@ class TopicSelector:
                     "message": f"No se pudo extraer título de la tendencia en posición {topic_position}",
                 }
             selected_reason = "Selección manual"
+            selection_meta = {}
 
         selected_payload = _extract_trend_payload(trends_data, selected_position)
         selected_categories = selected_payload.get("categories", []) if isinstance(selected_payload, dict) else []
@@ -81,6 +107,7 @@ class TopicSelector:
             "selected_reason": selected_reason,
             "selected_categories": selected_categories,
             "policy": policy_decision,
+            **selection_meta,
         }
 
 
@@ -88,13 +115,40 @@ class PromptBuilder:
     """Construye prompt y huella para trazabilidad."""
 
     @staticmethod
-    def build(agent: Any, trends_data: Dict[str, Any], search_results: Dict[str, Any], selected_trend: str, topic_position: int) -> Dict[str, Any]:
-        prompt = create_prompt(agent, trends_data, search_results, selected_trend, topic_position)
+    def build(
+        agent: Any,
+        trends_data: Dict[str, Any],
+        search_results: Dict[str, Any],
+        selected_trend: str,
+        topic_position: int,
+        outline_text: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        bundle = build_prompt_bundle(
+            agent,
+            trends_data,
+            search_results,
+            selected_trend,
+            topic_position,
+            outline_text=outline_text,
+        )
+        prompt = bundle["prompt"]
         fingerprint = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
         return {
             "prompt": prompt,
             "prompt_fingerprint": fingerprint,
             "prompt_length": len(prompt),
+            "skeleton": bundle.get("skeleton", {}),
+            "token_budget": bundle.get("token_budget", {}),
+        }
+
+    @staticmethod
+    def summarize(prompt_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Sección `prompt` del contrato v2."""
+        return {
+            "fingerprint": prompt_data["prompt_fingerprint"],
+            "length": prompt_data["prompt_length"],
+            "skeleton": prompt_data.get("skeleton", {}),
+            "tokens": prompt_data.get("token_budget", {}),
         }
 
 
@@ -102,19 +156,21 @@ class ContentGenerator:
     """Genera contenido y expone parámetros efectivos del LLM."""
 
     @staticmethod
-    def _effective_params(agent: Any) -> Dict[str, Any]:
+    def _effective_params(agent: Any, stage: str = "generation") -> Dict[str, Any]:
+        route = resolve_model_route(agent, stage)
         return {
-            "model": "gpt-4o-mini",
+            "model": route.model,
             "temperature": max(0.0, min(1.5, float(getattr(agent, "temperature", 0.6)))),
-            "max_tokens": max(256, int(getattr(agent, "max_tokens", 1400))),
+            "max_tokens": route.max_tokens or max(256, int(getattr(agent, "max_tokens", 1400))),
             "top_p": 0.9,
             "frequency_penalty": 0.3,
             "presence_penalty": 0.1,
+            "route": route.to_dict(),
         }
 
-    def generate(self, agent: Any, prompt: str) -> Dict[str, Any]:
-        effective_params = self._effective_params(agent)
-        content = generate_article_content(agent, prompt)
+    def generate(self, agent: Any, prompt: str, stage: str = "generation") -> Dict[str, Any]:
+        effective_params = self._effective_params(agent, stage)
+        content = generate_article_content(agent, prompt, stage=stage)
         return {
             "content": content,
             "llm_effective_params": effective_params,
@@ -134,14 +190,32 @@ class OutlineGenerator:
             "5) Escenarios y riesgos a corto/mediano plazo"
         )
 
-    def generate(self, agent: Any, selected_trend: str, search_results: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def request_params(agent: Any, selected_trend: str, stage: str = "outline") -> Dict[str, Any]:
         prompt = (
             "Arma un outline periodístico en español para un artículo financiero de FinGuru. "
             "Debe incluir 5 a 6 secciones accionables y evitar relleno. "
             f"Tema: {selected_trend}\n"
             "Devuelve solo una lista numerada."
         )
+        return build_request_params(
+            resolve_model_route(agent, stage),
+            messages=[
+                {"role": "system", "content": "Eres editor senior de economía en Argentina."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
 
+    def parse(self, raw_text: str, model_name: Optional[str], selected_trend: str) -> Dict[str, Any]:
+        outline = (raw_text or "").strip()
+        if not outline:
+            outline = self._fallback_outline(selected_trend)
+            return {"status": "fallback", "outline": outline, "reason": "outline vacío"}
+
+        return {"status": "success", "outline": outline, "model": model_name}
+
+    def generate(self, agent: Any, selected_trend: str, search_results: Dict[str, Any]) -> Dict[str, Any]:
         if not hasattr(agent, "openai_client"):
             return {
                 "status": "fallback",
@@ -150,22 +224,9 @@ class OutlineGenerator:
             }
 
         try:
-            model_name = os.getenv("OUTLINE_MODEL", "gpt-4o-mini")
-            response = agent.openai_client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "Eres editor senior de economía en Argentina."},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=320,
-                temperature=0.2,
-            )
-            outline = (response.choices[0].message.content or "").strip()
-            if not outline:
-                outline = self._fallback_outline(selected_trend)
-                return {"status": "fallback", "outline": outline, "reason": "outline vacío"}
-
-            return {"status": "success", "outline": outline, "model": model_name}
+            params = self.request_params(agent, selected_trend)
+            response = create_chat_completion(agent, "outline", **params)
+            return self.parse(response.choices[0].message.content, params["model"], selected_trend)
         except Exception as exc:
             return {
                 "status": "fallback",
@@ -177,6 +238,8 @@ class OutlineGenerator:
 class FactChecker:
     """Ejecuta chequeo de factualidad y densidad de evidencia antes de publicar."""
 
+    SYSTEM_MESSAGE = "Eres un fact-checker económico exigente."
+
     @staticmethod
     def _parse_factcheck_text(raw_text: str) -> Dict[str, Any]:
         text = (raw_text or "").strip()
@@ -193,44 +256,79 @@ class FactChecker:
             "raw": text,
         }
 
-    def check(self, agent: Any, draft: str, depth_validation: Dict[str, Any], search_results: Dict[str, Any]) -> Dict[str, Any]:
-        deterministic_issues = []
+    @staticmethod
+    def build_prompt(draft: str, sources: str = "") -> str:
+        return (
+            "Evalúa factualidad y precisión de este borrador financiero. "
+            "Responde exactamente con formato:\n"
+            "VERDICT: PASS o FAIL\n"
+            "ISSUES:\n"
+            "- issue 1\n"
+            "- issue 2\n"
+            "Si está bien, deja ISSUES vacío.\n\n"
+            f"{_sources_section(sources)}"
+            f"BORRADOR:\n{draft}"
+        )
+
+    @staticmethod
+    def deterministic_issues(depth_validation: Dict[str, Any]) -> List[str]:
+        issues = []
 
         numeric_count = int(depth_validation.get("numeric_evidence_count", 0) or 0)
         if numeric_count < 3:
-            deterministic_issues.append(f"Muy pocas cifras: {numeric_count} (mínimo recomendado 3)")
+            issues.append(f"Muy pocas cifras: {numeric_count} (mínimo recomendado 3)")
 
         forbidden_phrase_hits = depth_validation.get("forbidden_phrase_hits", []) or []
         if forbidden_phrase_hits:
-            deterministic_issues.append(
+            issues.append(
                 "Frases vagas detectadas: " + ", ".join(forbidden_phrase_hits)
             )
+        return issues
+
+    @staticmethod
+    def combine(deterministic_issues: List[str], llm_check: Dict[str, Any]) -> Dict[str, Any]:
+        combined_issues = deterministic_issues + list(llm_check.get("issues", []))
+        passed = (not deterministic_issues) and llm_check.get("verdict") == "PASS"
+
+        return {
+            "passed": passed,
+            "deterministic_issues": deterministic_issues,
+            "llm": llm_check,
+            "issues": combined_issues,
+        }
+
+    def request_params(self, agent: Any, draft: str, stage: str = "fact_check", sources: str = "") -> Dict[str, Any]:
+        return build_request_params(
+            resolve_model_route(agent, stage),
+            messages=[
+                {"role": "system", "content": self.SYSTEM_MESSAGE},
+                {"role": "user", "content": self.build_prompt(draft, sources)},
+            ],
+            temperature=0.1,
+        )
+
+    def parse(self, raw_text: str, model_name: Optional[str], depth_validation: Dict[str, Any]) -> Dict[str, Any]:
+        llm_check = self._parse_factcheck_text(raw_text or "")
+        llm_check["model"] = model_name
+        return self.combine(self.deterministic_issues(depth_validation), llm_check)
+
+    def check(
+        self,
+        agent: Any,
+        draft: str,
+        depth_validation: Dict[str, Any],
+        search_results: Dict[str, Any],
+        stage: str = "fact_check",
+        sources: str = "",
+    ) -> Dict[str, Any]:
+        deterministic_issues = self.deterministic_issues(depth_validation)
 
         llm_check = {"verdict": "PASS", "issues": [], "raw": ""}
         if hasattr(agent, "openai_client"):
             try:
-                model_name = os.getenv("FACTCHECK_MODEL", "gpt-4o-mini")
-                prompt = (
-                    "Evalúa factualidad y precisión de este borrador financiero. "
-                    "Responde exactamente con formato:\n"
-                    "VERDICT: PASS o FAIL\n"
-                    "ISSUES:\n"
-                    "- issue 1\n"
-                    "- issue 2\n"
-                    "Si está bien, deja ISSUES vacío.\n\n"
-                    f"BORRADOR:\n{draft}"
-                )
-                response = agent.openai_client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {"role": "system", "content": "Eres un fact-checker económico exigente."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    max_tokens=260,
-                    temperature=0.1,
-                )
-                llm_check = self._parse_factcheck_text(response.choices[0].message.content or "")
-                llm_check["model"] = model_name
+                params = self.request_params(agent, draft, stage, sources)
+                response = create_chat_completion(agent, stage, **params)
+                return self.parse(response.choices[0].message.content, params["model"], depth_validation)
             except Exception as exc:
                 llm_check = {
                     "verdict": "PASS",
@@ -239,21 +337,42 @@ class FactChecker:
                     "warning": str(exc),
                 }
 
-        combined_issues = deterministic_issues + list(llm_check.get("issues", []))
-        passed = (not deterministic_issues) and llm_check.get("verdict") == "PASS"
-
-        return {
-            "passed": passed,
-            "deterministic_issues": deterministic_issues,
-            "llm": llm_check,
-            "issues": combined_issues,
-        }
+        return self.combine(deterministic_issues, llm_check)
 
 
 class DevilAdvocateReviewer:
     """Critica el borrador para subir tono, contundencia y valor diferencial."""
 
-    def review(self, agent: Any, draft: str) -> Dict[str, Any]:
+    SYSTEM_MESSAGE = "Eres crítico editorial directo y técnico."
+
+    @staticmethod
+    def build_prompt(draft: str) -> str:
+        return (
+            "Actúa como abogado del diablo de un portal económico. "
+            "Critica el borrador y di cómo volverlo menos aburrido y más contundente. "
+            "Devuelve 3 bullets concretos sin reescribir todo.\n\n"
+            f"BORRADOR:\n{draft}"
+        )
+
+    def request_params(self, agent: Any, draft: str, stage: str = "devil_advocate") -> Dict[str, Any]:
+        return build_request_params(
+            resolve_model_route(agent, stage),
+            messages=[
+                {"role": "system", "content": self.SYSTEM_MESSAGE},
+                {"role": "user", "content": self.build_prompt(draft)},
+            ],
+            temperature=0.2,
+        )
+
+    @staticmethod
+    def parse(raw_text: str, model_name: Optional[str]) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "model": model_name,
+            "critique": (raw_text or "").strip(),
+        }
+
+    def review(self, agent: Any, draft: str, stage: str = "devil_advocate") -> Dict[str, Any]:
         if not hasattr(agent, "openai_client"):
             return {
                 "status": "skipped",
@@ -261,28 +380,9 @@ class DevilAdvocateReviewer:
             }
 
         try:
-            model_name = os.getenv("DEVIL_ADVOCATE_MODEL", "gpt-4o-mini")
-            prompt = (
-                "Actúa como abogado del diablo de un portal económico. "
-                "Critica el borrador y di cómo volverlo menos aburrido y más contundente. "
-                "Devuelve 3 bullets concretos sin reescribir todo.\n\n"
-                f"BORRADOR:\n{draft}"
-            )
-            response = agent.openai_client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": "Eres crítico editorial directo y técnico."},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=220,
-                temperature=0.2,
-            )
-            critique = (response.choices[0].message.content or "").strip()
-            return {
-                "status": "success",
-                "model": model_name,
-                "critique": critique,
-            }
+            params = self.request_params(agent, draft, stage)
+            response = create_chat_completion(agent, stage, **params)
+            return self.parse(response.choices[0].message.content, params["model"])
         except Exception as exc:
             return {
                 "status": "error",
@@ -291,6 +391,118 @@ class DevilAdvocateReviewer:
             }
 
 
+class CombinedReviewer:
+    """Fact-check y abogado del diablo en una sola llamada JSON (el borrador se envía una vez)."""
+
+    SYSTEM_MESSAGE = (
+        "Eres fact-checker económico exigente y a la vez crítico editorial directo y técnico. "
+        "Respondes siempre con un objeto JSON válido."
+    )
+
+    def __init__(self, fact_checker: FactChecker) -> None:
+        self.fact_checker = fact_checker
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return ProfilePolicyEngine._is_truthy_env(os.getenv("COMBINED_REVIEW_ENABLED", "false"))
+
+    @staticmethod
+    def build_prompt(draft: str, sources: str = "") -> str:
+        return (
+            "Revisa este borrador financiero en dos dimensiones y responde SOLO con JSON:\n"
+            '{"verdict": "PASS" | "FAIL", "issues": [string], "critique": [string]}\n'
+            "- verdict/issues: factualidad y precisión (issues vacío si está bien).\n"
+            "- critique: 3 bullets concretos, como abogado del diablo de un portal económico, "
+            "para volverlo menos aburrido y más contundente sin reescribir todo.\n\n"
+            f"{_sources_section(sources)}"
+            f"BORRADOR:\n{draft}"
+        )
+
+    @staticmethod
+    def _as_text_list(value: Any) -> List[str]:
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return []
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    def review(
+        self,
+        agent: Any,
+        draft: str,
+        depth_validation: Dict[str, Any],
+        stage: str = "review",
+        sources: str = "",
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Devuelve (fact_check, devil_review) con la misma forma que FactChecker y DevilAdvocateReviewer."""
+        deterministic_issues = self.fact_checker.deterministic_issues(depth_validation)
+        if not hasattr(agent, "openai_client"):
+            return (
+                self.fact_checker.combine(deterministic_issues, {"verdict": "PASS", "issues": [], "raw": ""}),
+                {"status": "skipped", "critique": "Sin cliente OpenAI para revisión crítica."},
+            )
+
+        try:
+            params = self.request_params(agent, draft, stage, sources)
+            response = create_chat_completion(agent, stage, **params)
+            return self.parse(response.choices[0].message.content, params["model"], depth_validation)
+        except Exception as exc:
+            return self.error_result(deterministic_issues, exc)
+
+    def request_params(self, agent: Any, draft: str, stage: str = "review", sources: str = "") -> Dict[str, Any]:
+        return build_request_params(
+            resolve_model_route(agent, stage),
+            messages=[
+                {"role": "system", "content": self.SYSTEM_MESSAGE},
+                {"role": "user", "content": self.build_prompt(draft, sources)},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+
+    def error_result(self, deterministic_issues: List[str], exc: Exception) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        return (
+            self.fact_checker.combine(
+                deterministic_issues,
+                {"verdict": "PASS", "issues": [], "raw": "", "warning": str(exc)},
+            ),
+            {"status": "error", "critique": "No se pudo generar crítica.", "error": str(exc)},
+        )
+
+    def parse(
+        self,
+        raw_text: str,
+        model_name: Optional[str],
+        depth_validation: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        deterministic_issues = self.fact_checker.deterministic_issues(depth_validation)
+        raw = (raw_text or "").strip()
+        try:
+            payload = json.loads(raw or "{}")
+        except ValueError as exc:
+            return self.error_result(deterministic_issues, exc)
+        if not isinstance(payload, dict):
+            return self.error_result(
+                deterministic_issues,
+                ValueError(f"La revisión combinada no devolvió un objeto JSON ({type(payload).__name__})"),
+            )
+
+        verdict = "PASS" if str(payload.get("verdict", "")).strip().upper() == "PASS" else "FAIL"
+        llm_check = {
+            "verdict": verdict,
+            "issues": self._as_text_list(payload.get("issues")),
+            "raw": raw,
+            "model": model_name,
+        }
+        critique_bullets = self._as_text_list(payload.get("critique"))
+        devil_review = {
+            "status": "success",
+            "model": model_name,
+            "critique": "\n".join(f"- {bullet.lstrip('- ').strip()}" for bullet in critique_bullets),
+        }
+        return self.fact_checker.combine(deterministic_issues, llm_check), devil_review
+
+
 class DepthValidator:
     """Valida profundidad editorial del artículo."""
 
@@ -319,8 +531,85 @@ class TrendsPipeline:
         self.depth_validator = DepthValidator()
         self.fact_checker = FactChecker()
         self.devil_advocate = DevilAdvocateReviewer()
+        self.combined_reviewer = CombinedReviewer(self.fact_checker)
+        self.targeted_retry = TargetedRetry()
         self.publisher = Publisher()
 
+    def _review_draft(
+        self,
+        agent: Any,
+        content: str,
+        depth_validation: Dict[str, Any],
+        search_results: Dict[str, Any],
+        timings: Dict[str, float],
+        stage_prefix: str = "",
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Fact-check + abogado del diablo; en una sola llamada JSON si COMBINED_REVIEW_ENABLED."""
+        if self.combined_reviewer.is_enabled():
+            review_start = time.perf_counter()
+            fact_check, devil_review = self.combined_reviewer.review(
+                agent,
+                content,
+                depth_validation,
+                stage=f"{stage_prefix}review",
+            )
+            timings[f"{stage_prefix}combined_review_ms"] = round((time.perf_counter() - review_start) * 1000, 2)
+            return fact_check, devil_review
+
+        factcheck_start = time.perf_counter()
+        fact_check = self.fact_checker.check(
+            agent,
+            content,
+            depth_validation,
+            search_results,
+            stage=f"{stage_prefix}fact_check",
+        )
+        timings[f"{stage_prefix}factcheck_ms"] = round((time.perf_counter() - factcheck_start) * 1000, 2)
+
+        devil_start = time.perf_counter()
+        devil_review = self.devil_advocate.review(agent, content, stage=f"{stage_prefix}devil_advocate")
+        timings[f"{stage_prefix}devil_advocate_ms"] = round((time.perf_counter() - devil_start) * 1000, 2)
+        return fact_check, devil_review
+
+    def _recheck_changed_sections(
+        self,
+        agent: Any,
+        changed_text: str,
+        depth_validation: Dict[str, Any],
+        search_results: Dict[str, Any],
+        timings: Dict[str, float],
+        previous_devil_review: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Fact-check solo de las secciones reescritas en el reintento dirigido.
+
+        Sin el artículo completo, el revisor recibe las mismas fuentes compactas que el prompt de sección
+        para poder contrastar las cifras nuevas.
+        """
+        recheck_start = time.perf_counter()
+        sources = build_source_context(search_results)
+        if self.combined_reviewer.is_enabled():
+            fact_check, devil_review = self.combined_reviewer.review(
+                agent,
+                changed_text,
+                depth_validation,
+                stage="quality_retry_review",
+                sources=sources,
+            )
+        else:
+            fact_check = self.fact_checker.check(
+                agent,
+                changed_text,
+                depth_validation,
+                search_results,
+                stage="quality_retry_fact_check",
+                sources=sources,
+            )
+            devil_review = previous_devil_review
+        fact_check["scope"] = "changed_sections"
+        timings["quality_retry_recheck_ms"] = round((time.perf_counter() - recheck_start) * 1000, 2)
+        return fact_check, devil_review
+
     @staticmethod
     def _build_quality_retry_prompt(
         base_prompt: str,
@@ -364,33 +653,62 @@ class TrendsPipeline:
         topic_position: Optional[int] = None,
         dry_run: bool = False,
         correlation_id: Optional[str] = None,
+        preselected_topic: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        correlation_id = correlation_id or str(uuid.uuid4())
-        execution_started = datetime.utcnow().isoformat() + "Z"
-
-        timings: Dict[str, float] = {}
-
-        select_start = time.perf_counter()
-        user_id = agent.agent_config.get("userId", 5822)
-        selection = self.topic_selector.select(agent, trends_data, topic_position, user_id)
-        timings["selection_ms"] = round((time.perf_counter() - select_start) * 1000, 2)
-
-        if selection.get("status") != "success":
-            return {
-                "status": "skipped" if selection.get("status") == "no_suitable_topic" else "error",
-                "correlation_id": correlation_id,
-                "agent": {
-                    "id": agent.agent_id,
-                    "name": agent.agent_name,
-                },
-                "selection": selection,
-                "timestamp": execution_started,
-                "timings": timings,
-            }
+        """
+        Ejecuta el pipeline para un agente y adjunta el uso de tokens/costo por etapa junto a `timings`,
+        y los reintentos/hedges de las llamadas al LLM en la sección `llm`.
+        """
+        return self._run_tracked(
+            agent,
+            lambda: self._execute(agent, trends_data, topic_position, dry_run, correlation_id, preselected_topic),
+        )
 
-        selected_trend = selection["selected_title"]
-        selected_position = selection["selected_position"]
+    def resume_from_draft(
+        self,
+        agent: Any,
+        run_state: Dict[str, Any],
+        generation: Dict[str, Any],
+        timings: Dict[str, float],
+        initial_review: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None,
+        usage_tracker: Optional[UsageTracker] = None,
+    ) -> Dict[str, Any]:
+        """
+        Completa el pipeline desde un borrador ya generado (modo batch): validación, reintento de
+        calidad, policy y publicación. `run_state` tiene la forma que arma `_execute`.
+        """
+        return self._run_tracked(
+            agent,
+            lambda: self._finalize(agent, run_state, generation, timings, initial_review),
+            usage_tracker,
+        )
 
+    @staticmethod
+    def _run_tracked(
+        agent: Any,
+        run: Callable[[], Dict[str, Any]],
+        usage_tracker: Optional[UsageTracker] = None,
+    ) -> Dict[str, Any]:
+        agent.llm_usage = usage_tracker or UsageTracker()
+        try:
+            result = run()
+        finally:
+            usage = agent.llm_usage.summary()
+            resilience = agent.llm_usage.resilience_summary()
+            agent.llm_usage = None
+        result["usage"] = usage
+        if isinstance(result.get("llm"), dict):
+            result["llm"]["resilience"] = resilience
+        return result
+
+    def gather_context(
+        self,
+        agent: Any,
+        trends_data: Dict[str, Any],
+        selected_trend: str,
+        timings: Dict[str, float],
+    ) -> Dict[str, Any]:
+        """Búsqueda y enriquecimiento (sin LLM): noticias, contexto relacionado, mercado y links internos."""
         search_start = time.perf_counter()
         search_results = search_google_news(agent, selected_trend)
         timings["search_ms"] = round((time.perf_counter() - search_start) * 1000, 2)
@@ -437,26 +755,107 @@ class TrendsPipeline:
         search_results["internal_links"] = internal_links
         timings["context_enrichment_ms"] = round((time.perf_counter() - enrichment_start) * 1000, 2)
 
-        prompt_start = time.perf_counter()
-        prompt_data = self.prompt_builder.build(agent, trends_data, search_results, selected_trend, selected_position)
-        timings["prompt_build_ms"] = round((time.perf_counter() - prompt_start) * 1000, 2)
+        return {
+            "search_results": search_results,
+            "related_context": related_context,
+            "market_data": market_data,
+            "internal_links": internal_links,
+        }
+
+    def _execute(
+        self,
+        agent: Any,
+        trends_data: Dict[str, Any],
+        topic_position: Optional[int] = None,
+        dry_run: bool = False,
+        correlation_id: Optional[str] = None,
+        preselected_topic: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        correlation_id = correlation_id or str(uuid.uuid4())
+        execution_started = datetime.utcnow().isoformat() + "Z"
+
+        timings: Dict[str, float] = {}
+
+        select_start = time.perf_counter()
+        user_id = agent.agent_config.get("userId", 5822)
+        selection = self.topic_selector.select(agent, trends_data, topic_position, user_id, preselected_topic)
+        timings["selection_ms"] = round((time.perf_counter() - select_start) * 1000, 2)
+
+        if selection.get("status") != "success":
+            return {
+                "status": "skipped" if selection.get("status") == "no_suitable_topic" else "error",
+                "correlation_id": correlation_id,
+                "agent": {
+                    "id": agent.agent_id,
+                    "name": agent.agent_name,
+                },
+                "selection": selection,
+                "timestamp": execution_started,
+                "timings": timings,
+            }
+
+        selected_trend = selection["selected_title"]
+        selected_position = selection["selected_position"]
+
+        context = self.gather_context(agent, trends_data, selected_trend, timings)
+        search_results = context["search_results"]
 
         outline_start = time.perf_counter()
         outline_data = self.outline_generator.generate(agent, selected_trend, search_results)
         outline_text = outline_data.get("outline", "")
         timings["outline_ms"] = round((time.perf_counter() - outline_start) * 1000, 2)
 
+        # El outline entra al presupuesto de tokens como bloque de máxima prioridad.
+        prompt_start = time.perf_counter()
+        prompt_data = self.prompt_builder.build(
+            agent,
+            trends_data,
+            search_results,
+            selected_trend,
+            selected_position,
+            outline_text=outline_text,
+        )
+        timings["prompt_build_ms"] = round((time.perf_counter() - prompt_start) * 1000, 2)
+
         generation_prompt = prompt_data["prompt"]
-        if outline_text:
-            generation_prompt += (
-                "\n\nOUTLINE EDITORIAL PREVIO (OBLIGATORIO RESPETAR):\n"
-                f"{outline_text}\n"
-            )
 
         generation_start = time.perf_counter()
         generation = self.content_generator.generate(agent, generation_prompt)
         timings["generation_ms"] = round((time.perf_counter() - generation_start) * 1000, 2)
 
+        run_state = {
+            "correlation_id": correlation_id,
+            "execution_started": execution_started,
+            "dry_run": dry_run,
+            "selection": selection,
+            "context": context,
+            "outline": outline_data,
+            "prompt": prompt_data,
+        }
+        return self._finalize(agent, run_state, generation, timings)
+
+    def _finalize(
+        self,
+        agent: Any,
+        run_state: Dict[str, Any],
+        generation: Dict[str, Any],
+        timings: Dict[str, float],
+        initial_review: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        correlation_id = run_state["correlation_id"]
+        execution_started = run_state["execution_started"]
+        dry_run = run_state["dry_run"]
+        selection = run_state["selection"]
+        selected_trend = selection["selected_title"]
+        selected_position = selection["selected_position"]
+        search_results = run_state["context"]["search_results"]
+        related_context = run_state["context"]["related_context"]
+        market_data = run_state["context"]["market_data"]
+        internal_links = run_state["context"]["internal_links"]
+        outline_data = run_state["outline"]
+        prompt_data = run_state["prompt"]
+        generation_prompt = prompt_data["prompt"]
+
         content = generation.get("content") or ""
         if not content.strip():
             return {
@@ -467,10 +866,7 @@ class TrendsPipeline:
                     "name": agent.agent_name,
                 },
                 "selection": selection,
-                "prompt": {
-                    "fingerprint": prompt_data["prompt_fingerprint"],
-                    "length": prompt_data["prompt_length"],
-                },
+                "prompt": self.prompt_builder.summarize(prompt_data),
                 "llm": generation.get("llm_effective_params", {}),
                 "message": "No se pudo generar contenido",
                 "timestamp": execution_started,
@@ -485,15 +881,13 @@ class TrendsPipeline:
         profile_alignment = self.policy_engine.evaluate_profile_alignment(agent, content)
         timings["profile_alignment_ms"] = round((time.perf_counter() - alignment_start) * 1000, 2)
 
-        factcheck_start = time.perf_counter()
-        fact_check = self.fact_checker.check(agent, content, depth_validation, search_results)
-        timings["factcheck_ms"] = round((time.perf_counter() - factcheck_start) * 1000, 2)
-
-        devil_start = time.perf_counter()
-        devil_review = self.devil_advocate.review(agent, content)
-        timings["devil_advocate_ms"] = round((time.perf_counter() - devil_start) * 1000, 2)
+        if initial_review is not None:
+            fact_check, devil_review = initial_review
+        else:
+            fact_check, devil_review = self._review_draft(agent, content, depth_validation, search_results, timings)
 
         retried = False
+        retry_details: Optional[Dict[str, Any]] = None
         if (
             (not depth_validation.get("is_valid"))
             or (not profile_alignment.get("aligned"))
@@ -501,22 +895,64 @@ class TrendsPipeline:
         ):
             retry_start = time.perf_counter()
             retried = True
-            retry_prompt = self._build_quality_retry_prompt(
-                generation_prompt,
-                depth_validation,
-                profile_alignment,
-                fact_check,
-                devil_review,
-            )
-            retry_generation = self.content_generator.generate(agent, retry_prompt)
-            retry_content = retry_generation.get("content") or ""
-            if retry_content.strip():
-                content = retry_content
-                generation = retry_generation
+            targeted = None
+            if read_quality_retry_mode() == QUALITY_RETRY_MODE_TARGETED:
+                targeted = self.targeted_retry.run(
+                    agent,
+                    selected_trend,
+                    content,
+                    depth_validation,
+                    profile_alignment,
+                    fact_check,
+                    devil_review,
+                    search_results,
+                )
+
+            if targeted and targeted.get("status") == "success":
+                # Profundidad y alineación son deterministas y se recalculan sobre el artículo completo;
+                # el fact-check LLM solo revisa las secciones reescritas.
+                content = targeted["content"]
                 depth_validation = self.depth_validator.validate(content)
                 profile_alignment = self.policy_engine.evaluate_profile_alignment(agent, content)
-                fact_check = self.fact_checker.check(agent, content, depth_validation, search_results)
-                devil_review = self.devil_advocate.review(agent, content)
+                fact_check, devil_review = self._recheck_changed_sections(
+                    agent,
+                    targeted["changed_text"],
+                    depth_validation,
+                    search_results,
+                    timings,
+                    devil_review,
+                )
+                retry_details = {
+                    "mode": QUALITY_RETRY_MODE_TARGETED,
+                    "sections": targeted["sections"],
+                    "sections_total": targeted["sections_total"],
+                }
+            else:
+                retry_details = {"mode": QUALITY_RETRY_MODE_FULL}
+                if targeted:
+                    retry_details["fallback_reason"] = targeted.get("reason")
+                retry_prompt = self._build_quality_retry_prompt(
+                    generation_prompt,
+                    depth_validation,
+                    profile_alignment,
+                    fact_check,
+                    devil_review,
+                )
+                retry_generation = self.content_generator.generate(agent, retry_prompt, stage="quality_retry")
+                retry_content = retry_generation.get("content") or ""
+                if retry_content.strip():
+                    content = retry_content
+                    generation = retry_generation
+                    depth_validation = self.depth_validator.validate(content)
+                    profile_alignment = self.policy_engine.evaluate_profile_alignment(agent, content)
+                    fact_check, devil_review = self._review_draft(
+                        agent,
+                        content,
+                        depth_validation,
+                        search_results,
+                        timings,
+                        stage_prefix="quality_retry_",
+                    )
             timings["quality_retry_ms"] = round((time.perf_counter() - retry_start) * 1000, 2)
 
         if (not depth_validation.get("is_valid")) or (not fact_check.get("passed")):
@@ -528,10 +964,7 @@ class TrendsPipeline:
                     "name": agent.agent_name,
                 },
                 "selection": selection,
-                "prompt": {
-                    "fingerprint": prompt_data["prompt_fingerprint"],
-                    "length": prompt_data["prompt_length"],
-                },
+                "prompt": self.prompt_builder.summarize(prompt_data),
                 "llm": generation.get("llm_effective_params", {}),
                 "validation": {
                     "depth": depth_validation,
@@ -542,6 +975,7 @@ class TrendsPipeline:
                     "devil_advocate": devil_review,
                 },
                 "retried": retried,
+                "retry": retry_details,
                 "message": "Artículo rechazado por profundidad insuficiente o fact-check fallido",
                 "timestamp": execution_started,
                 "timings": timings,
@@ -565,10 +999,7 @@ class TrendsPipeline:
                     "name": agent.agent_name,
                 },
                 "selection": selection,
-                "prompt": {
-                    "fingerprint": prompt_data["prompt_fingerprint"],
-                    "length": prompt_data["prompt_length"],
-                },
+                "prompt": self.prompt_builder.summarize(prompt_data),
                 "llm": generation.get("llm_effective_params", {}),
                 "validation": {
                     "depth": depth_validation,
@@ -617,6 +1048,8 @@ class TrendsPipeline:
                 "categories": selection.get("selected_categories", []),
                 "reason": selection.get("selected_reason"),
                 "policy": selection.get("policy"),
+                "prefilter": selection.get("prefilter"),
+                "assignment": selection.get("assignment"),
             },
             "context": {
                 "related_context_status": related_context.get("status"),
@@ -626,10 +1059,7 @@ class TrendsPipeline:
             "workflow": {
                 "outline": outline_data,
             },
-            "prompt": {
-                "fingerprint": prompt_data["prompt_fingerprint"],
-                "length": prompt_data["prompt_length"],
-            },
+            "prompt": self.prompt_builder.summarize(prompt_data),
             "llm": generation.get("llm_effective_params", {}),
             "validation": {
                 "depth": depth_validation,
@@ -641,6 +1071,7 @@ class TrendsPipeline:
                 "devil_advocate": devil_review,
             },
             "retried": retried,
+            "retry": retry_details,
             "article": {
                 "title": article_data.get("title"),
                 "category": article_data.get("category"),
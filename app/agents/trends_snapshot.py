@@ -0,0 +1,139 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+SELECTED_TREND_MARKER = "❌"
+SELECTED_TREND_SUFFIX = " - [YA SELECCIONADA - NO USAR]"
+
+
+@dataclass(frozen=True)
+class TrendItem:
+    """Tendencia ya normalizada (título, categorías y volumen) con su posición 1-based."""
+    position: int
+    title: str
+    categories: Tuple[str, ...]
+    search_volume: Any
+
+    @property
+    def details_text(self) -> str:
+        details = ""
+        if self.categories:
+            details += f" [Categorías: {', '.join(self.categories)} ]"
+        if self.search_volume:
+            try:
+                details += f" (Vol: {self.search_volume:,})"
+            except (TypeError, ValueError):
+                details += f" (Vol: {self.search_volume})"
+        return details
+
+    @property
+    def line(self) -> str:
+        return f"{self.position}. {self.title}{self.details_text}"
+
+    @property
+    def selected_line(self) -> str:
+        return f"{self.position}. {SELECTED_TREND_MARKER} {self.title}{self.details_text}{SELECTED_TREND_SUFFIX}"
+
+
+def _parse_trend_item(position: int, topic: Any) -> Optional[TrendItem]:
+    title: Any = ""
+    categories: Tuple[str, ...] = ()
+    search_volume = None
+
+    if isinstance(topic, dict):
+        title = topic.get('title', '')
+        if isinstance(title, dict):
+            title = title.get('query', str(title))
+
+        raw_categories = topic.get('categories', [])
+        if isinstance(raw_categories, list):
+            category_names = []
+            for cat in raw_categories:
+                if isinstance(cat, dict):
+                    cat_name = cat.get('name', '')
+                    if cat_name:
+                        category_names.append(cat_name)
+                elif isinstance(cat, str):
+                    category_names.append(cat)
+            categories = tuple(category_names)
+
+        search_volume = topic.get('search_volume')
+    elif isinstance(topic, str):
+        title = topic
+
+    if not title:
+        return None
+    return TrendItem(position=position, title=str(title), categories=categories, search_volume=search_volume)
+
+
+class TrendsSnapshot:
+    """Listado de tendencias de una ejecución, parseado una vez y renderizado con overlay por agente."""
+
+    def __init__(self, items: Iterable[TrendItem]):
+        self.items: Tuple[TrendItem, ...] = tuple(items)
+        self._by_position: Dict[int, TrendItem] = {item.position: item for item in self.items}
+        self.base_lines: Tuple[str, ...] = tuple(item.line for item in self.items)
+        self.base_text = "".join(f"{line}\n" for line in self.base_lines)
+
+    @classmethod
+    def from_trends_data(cls, trends_data: Dict[str, Any]) -> "TrendsSnapshot":
+        trending_topics = trends_data.get("trending_topics", []) if isinstance(trends_data, dict) else []
+        if not isinstance(trending_topics, list):
+            trending_topics = []
+        items = []
+        for position, topic in enumerate(trending_topics, 1):
+            item = _parse_trend_item(position, topic)
+            if item is not None:
+                items.append(item)
+        return cls(items)
+
+    def get(self, position: int) -> Optional[TrendItem]:
+        return self._by_position.get(position)
+
+    def is_selected(self, item: TrendItem, selected_positions: Iterable[int], selected_titles: Iterable[str]) -> bool:
+        return item.position in selected_positions or item.title in selected_titles
+
+    def render(self, selected_positions: Iterable[int] = (), selected_titles: Iterable[str] = ()) -> str:
+        """Bloque TENDENCIAS; solo las tendencias ya elegidas se re-renderizan con la marca ❌."""
+        if not selected_positions and not selected_titles:
+            return self.base_text
+
+        lines = list(self.base_lines)
+        for index, item in enumerate(self.items):
+            if self.is_selected(item, selected_positions, selected_titles):
+                lines[index] = item.selected_line
+        return "".join(f"{line}\n" for line in lines)
+
+
+_SNAPSHOT_LOCK = threading.Lock()
+_SNAPSHOT_CACHE: Dict[str, Any] = {}
+
+
+def get_trends_snapshot(trends_data: Dict[str, Any]) -> TrendsSnapshot:
+    """
+    Devuelve el snapshot del `trends_data` compartido de la ejecución.
+
+    Todos los agentes de una corrida reciben el mismo objeto, así que se cachea por identidad
+    (una sola entrada); un `trends_data` nuevo reemplaza al anterior.
+    """
+    trending_topics = trends_data.get("trending_topics") if isinstance(trends_data, dict) else None
+    with _SNAPSHOT_LOCK:
+        cached = _SNAPSHOT_CACHE.get("entry")
+        if (
+            cached
+            and cached["source"] is trends_data
+            and cached["topics"] is trending_topics
+            and cached["count"] == (len(trending_topics) if isinstance(trending_topics, list) else 0)
+        ):
+            return cached["snapshot"]
+
+    snapshot = TrendsSnapshot.from_trends_data(trends_data)
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT_CACHE["entry"] = {
+            "source": trends_data,
+            "topics": trending_topics,
+            "count": len(trending_topics) if isinstance(trending_topics, list) else 0,
+            "snapshot": snapshot,
+        }
+    return snapshot
@@ -1,19 +1,45 @@
 import os
-from fastapi import FastAPI, UploadFile, Response, HTTPException, Depends, Query
+from fastapi import FastAPI, UploadFile, Response, HTTPException, Depends, Query, Form
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from openai import OpenAI
 from pydantic import BaseModel
-from agents.agents import iterate_agents
+from agents.fast_path import resolve_editorial_engine, run_editorial_engine, stream_editorial_engine
 from utils.clean import clean_message
 from utils.auth import validate_token
 from load_env import load_env_files
 from utils.middleware import check_subscription, check_sudo_api_key
 from typing import Annotated, List, Optional
 from utils.trends_functions import TrendsAPI
+from utils.audio import (
+    SpooledAudio,
+    audio_report_headers,
+    exceeds_upload_limit,
+    new_audio_report,
+    read_max_audio_upload_bytes,
+    spool_upload,
+    transcribe_spooled,
+)
+from utils.request_cache import (
+    get_article_cache,
+    get_article_flights,
+    get_text_article_cache,
+    get_text_article_flights,
+    get_transcript_cache,
+    normalize_text,
+    text_sha256,
+)
+from utils.voice_jobs import VoiceJobManager, VoiceJobQueueFull, is_valid_webhook_url, owner_key
+from utils.streaming import event_stream_response, resolve_stream_format
+from agents.rate_limiter import get_openai_rate_limiter
+from agents.batch_mode import check_batch_storage
+from agents.llm_resilience import call_with_resilience, new_resilience_report
 from agents.automated_trends_agent import (
     run_multi_trends_agents,
     run_multi_trends_agents_v2,
+    resume_multi_trends_agents_v2_batch,
     clear_trends_cache_standalone,
     get_cache_status_standalone,
     get_trending_topics_cached,
@@ -86,7 +112,20 @@ app.add_middleware(
     expose_headers=["*"]     
 )
 
-from onlygpt import iterate_many_times
+AUDIO_UPLOAD_PATHS = {"/convert_audio", "/convert_audio_v2", "/convert_audio_v2/stream", "/v2/voice/jobs"}
+
+@app.middleware("http")
+async def reject_oversized_audio_uploads(request: Request, call_next):
+    """413 antes de recibir el cuerpo si el Content-Length de un audio ya supera MAX_AUDIO_UPLOAD_BYTES."""
+    if request.method == "POST" and request.url.path in AUDIO_UPLOAD_PATHS:
+        if exceeds_upload_limit(request.headers.get("content-length")):
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"El audio supera el máximo de {read_max_audio_upload_bytes()} bytes"},
+            )
+    return await call_next(request)
+
+from onlygpt import convergence_enabled, iterate_many_times, iterate_until_converged
 
 @app.get("/")
 async def test():
@@ -103,41 +142,179 @@ async def health_check():
         "version": "0.1"
     }
 
+TRANSCRIPTION_MODEL = "gpt-4o-mini-transcribe"
+
+def transcribe_file(upload) -> str:
+    """
+    Transcripción de `(nombre, archivo)`. Cada intento pasa por el limitador compartido y los errores
+    transitorios se reintentan con `call_with_resilience` (sin los reintentos propios del SDK, que
+    ocultarían los 429 al limitador).
+    """
+    name, handle = upload
+    client = openai.with_options(max_retries=0)
+
+    def attempt(timeout):
+        handle.seek(0)
+        with get_openai_rate_limiter().reserve():
+            return client.audio.transcriptions.create(
+                model=TRANSCRIPTION_MODEL,
+                file=(name, handle),
+                response_format='text',
+                **({"timeout": timeout} if timeout else {})
+            )
+
+    return call_with_resilience(attempt, new_resilience_report())
+
+def transcribe_audio(audio: SpooledAudio, report: dict, on_partial=None) -> str:
+    """Transcribe el audio spooleado (pre-compresión y chunks paralelos opcionales, ver `utils.audio`)."""
+    transcript = transcribe_spooled(audio, transcribe_file, report, on_partial)
+    print(
+        f"🎧 Audio transcrito: {report['original_bytes']} → {report['uploaded_bytes']} bytes subidos, "
+        f"{report['chunks']} chunk(s), {report['transcription_ms']} ms"
+    )
+    return transcript
+
+def transcribe_audio_cached(audio: SpooledAudio, report: dict, on_partial=None):
+    """
+    Transcripción cacheada por SHA-256 del audio (un reintento del mismo archivo no vuelve a
+    transcribir). Devuelve `(transcripción, cache_hit)`.
+    """
+    cache_key = f"{TRANSCRIPTION_MODEL}:{audio.sha256}"
+    transcript = get_transcript_cache().get(cache_key)
+    if transcript is not None:
+        return transcript, True
+    transcript = transcribe_audio(audio, report, on_partial)
+    get_transcript_cache().set(cache_key, transcript)
+    return transcript, False
+
+def generate_article_cached(transcript: str):
+    """
+    Artículo de la cadena editorial (CrewAI o camino rápido según EDITORIAL_ENGINE) cacheado por
+    motor y hash de la transcripción; un reintento que llega mientras la primera ejecución sigue
+    en curso se une a ella. Bloquea: llamarla desde el threadpool. Devuelve `(artículo, estado)` con
+    estado "hit", "coalesced" o "miss".
+    """
+    engine = resolve_editorial_engine()
+    article_key = f"{engine}:{text_sha256(transcript)}"
+    article = get_article_cache().get(article_key)
+    if article is not None:
+        return article, "hit"
+
+    def generate():
+        print(transcript)
+        article = clean_message(run_editorial_engine(f"Hecho, nota o tema: {transcript}", openai, engine))
+        get_article_cache().set(article_key, article)
+        return article
+
+    article, shared = get_article_flights().do(article_key, generate)
+    return article, "coalesced" if shared else "miss"
+
+def generate_text_article(text: str):
+    """
+    Artículo de /convert_text_v2 deduplicado por motor y hash del texto normalizado: envíos idénticos
+    en curso comparten una sola ejecución y los ya resueltos salen de una caché de TTL corto.
+    Devuelve `(artículo, estado)` con estado "hit", "coalesced" o "miss".
+    """
+    engine = resolve_editorial_engine()
+    # La normalización solo define la clave: la cadena recibe el texto original con sus párrafos.
+    article_key = f"{engine}:{text_sha256(normalize_text(text))}"
+    article = get_text_article_cache().get(article_key)
+    if article is not None:
+        return article, "hit"
+
+    def generate():
+        # Se cachea antes de liberar el vuelo: un reenvío que llega justo después ya encuentra el hit.
+        article = clean_message(run_editorial_engine(f"Hecho, nota o tema: {text}", openai, engine))
+        get_text_article_cache().set(article_key, article)
+        return article
+
+    article, shared = get_text_article_flights().do(article_key, generate)
+    return article, "coalesced" if shared else "miss"
+
+def stream_article(transcript: str, use_cache: bool = False):
+    """
+    Eventos de la cadena editorial para `transcript`: `stage` por rol, `delta` con los tokens del rol
+    final (camino rápido) y `final` con el artículo limpio. Con `use_cache`, comparte la caché de
+    `generate_article_cached` y un hit emite `final` directamente.
+    """
+    engine = resolve_editorial_engine()
+    article_key = f"{engine}:{text_sha256(transcript)}"
+    if use_cache:
+        article = get_article_cache().get(article_key)
+        if article is not None:
+            yield {"event": "final", "content": article, "cache": "hit"}
+            return
+    for event in stream_editorial_engine(f"Hecho, nota o tema: {transcript}", openai, engine):
+        if event["event"] != "result":
+            yield event
+            continue
+        article = clean_message(event["content"])
+        if use_cache:
+            get_article_cache().set(article_key, article)
+        final = {"event": "final", "content": article}
+        if use_cache:
+            final["cache"] = "miss"
+        final.update({key: event[key] for key in ("steps", "total_ms", "usage") if key in event})
+        yield final
+
+def stream_audio_article(audio: SpooledAudio):
+    """`transcript` (con el reporte de audio) y luego los eventos de `stream_article`."""
+    try:
+        report = new_audio_report(audio)
+        transcript, cache_hit = transcribe_audio_cached(audio, report)
+    finally:
+        audio.close()
+    yield {
+        "event": "transcript",
+        "content": transcript,
+        "cache": "hit" if cache_hit else "miss",
+        "audio": None if cache_hit else report,
+    }
+    yield from stream_article(transcript, use_cache=True)
+
+async def transcribe_upload(file: UploadFile, response: Response) -> str:
+    """
+    Spoolea el upload y lo transcribe (con caché). Agrega los headers `X-Audio-*` y
+    `X-Transcript-Cache` a `response`.
+    """
+    audio = await spool_upload(file)
+    audio_report = new_audio_report(audio)
+    try:
+        transcript, cache_hit = await run_in_threadpool(transcribe_audio_cached, audio, audio_report)
+    finally:
+        audio.close()
+    if not cache_hit:
+        response.headers.update(audio_report_headers(audio_report))
+    response.headers["X-Transcript-Cache"] = "hit" if cache_hit else "miss"
+    return transcript
+
+voice_jobs = VoiceJobManager(transcribe_audio_cached, generate_article_cached, new_audio_report)
+
 @app.post("/convert_audio")
-async def convert_audio(file: UploadFile):
+async def convert_audio(file: UploadFile, response: Response):
     """
     Convert WAV file audio to text using Whisper
     """
     #print(file.content_type)
-    save_path = os.path.join("app", file.filename)
-    try:
-        #listFormats = ["audio/wav","audio/mpeg","video/mp4", "audio/x-m4a"]
-        #if (file.content_type not in listFormats):
-        #   return Response("Error, el audio no tiene un formato valido", 400)
-        
-        # Guardar el archivo de audio con su nombre original
-        with open(save_path, "wb") as uploaded_file:
-            uploaded_file.write(file.file.read())
-
-        # Abrir el archivo de audio guardado
-        with open(save_path, "rb") as audio_file:
-            transcript = openai.audio.transcriptions.create(
-                model="gpt-4o-mini-transcribe",
-                file=audio_file,
-                response_format='text'
-            )
+    #listFormats = ["audio/wav","audio/mpeg","video/mp4", "audio/x-m4a"]
+    #if (file.content_type not in listFormats):
+    #   return Response("Error, el audio no tiene un formato valido", 400)
 
+    # El upload se copia por bloques a un spool temporal con nombre único (413 si supera el máximo).
+    try:
+        transcript = await transcribe_upload(file, response)
+    except HTTPException:
+        raise
     except Exception as e:
-        if os.path.exists(save_path):
-            os.remove(save_path)
         return Response(str(e), 400)
-
-    finally:
-        # Eliminar el archivo de audio
-        if os.path.exists(save_path):
-            os.remove(save_path)
-    try:        
-        new_message = iterate_many_times(transcript, 1)
+    try:
+        if convergence_enabled():
+            refinement = await run_in_threadpool(iterate_until_converged, transcript)
+            response.headers["X-Refinement-Rounds"] = str(refinement["rounds_used"])
+            response.headers["X-Refinement-Stop-Reason"] = refinement["stop_reason"]
+            response.headers["X-Refinement-Tokens"] = str(refinement["tokens_used"])
+            return refinement["content"]
+        new_message = await run_in_threadpool(iterate_many_times, transcript, 1)
     except Exception as e:
         return e
     return new_message
@@ -156,6 +333,10 @@ except Exception as e:
     print(f"[WARN] MongoDB no disponible en arranque: {str(e)}")
     print("[WARN] El endpoint /views quedara deshabilitado hasta que Mongo este accesible")
 
+# Con AGENT_EXECUTION_MODE=batch el arranque falla si los jobs no tienen un store durable y
+# compartido (Mongo o BATCH_JOBS_DIR persistente): un job espera hasta 24 h entre instancias.
+check_batch_storage()
+
 class ParamsToClaimTokens(BaseModel):
     id: int
     viewsAmount: int
@@ -204,33 +385,54 @@ class MultiAgentV2Request(BaseModel):
     dry_run: bool = False
     correlation_id: Optional[str] = None
     agent_ids: Optional[List[int]] = None
+    selection_strategy: Optional[str] = None
+    execution_mode: Optional[str] = None
 
 @app.post("/convert_text_v2")
-async def convert_text(data: TextInput, user: dict = Depends(check_subscription)):
+async def convert_text(data: TextInput, response: Response, user: dict = Depends(check_subscription)):
     """
     Convierte texto de entrada en un nuevo mensaje procesado por múltiples agentes.
 
     Esta función toma un texto de entrada, lo procesa a través de una serie de agentes
+    (Crew de CrewAI o camino rápido de llamadas directas, según EDITORIAL_ENGINE)
     y devuelve un mensaje limpio y formateado.
 
     Args:
         data (TextInput): Un objeto que contiene el texto a procesar.
+        response (Response): Respuesta a la que se agrega `X-Article-Cache` (hit, coalesced o miss).
         user (dict): Información del usuario autenticado (inyectada por validate_token).
 
     Returns:
-        str: El mensaje procesado y limpio.
+        str: El mensaje procesado y limpio. Envíos idénticos (salvo espacios) en curso comparten
+            una ejecución y se repiten desde caché durante TEXT_ARTICLE_CACHE_TTL_SECONDS.
 
     Raises:
         HTTPException: Si ocurre un error durante el procesamiento.
     """
     try:
-        new_message = iterate_agents(f"Hecho, nota o tema: {data.text}")
+        new_message, cache_status = await run_in_threadpool(generate_text_article, data.text)
     except Exception as e:
         return HTTPException(status_code=400, detail=str(e))
-    return clean_message(new_message)
+    response.headers["X-Article-Cache"] = cache_status
+    return new_message
+
+@app.post("/convert_text_v2/stream")
+async def convert_text_stream(
+    request: Request,
+    data: TextInput,
+    format: Optional[str] = Query(None, description="ndjson (por defecto) o sse"),
+    user: dict = Depends(check_subscription),
+):
+    """
+    Variante progresiva de /convert_text_v2: NDJSON o SSE (por `format` o `Accept: text/event-stream`)
+    con un evento `stage` por rol editorial, `delta` con los tokens del rol final cuando el motor es
+    el camino rápido, y `final` con el mismo mensaje limpio que devuelve /convert_text_v2. Un error
+    a mitad del stream llega como evento `error`.
+    """
+    return event_stream_response(stream_article(data.text), resolve_stream_format(request, format))
 
 @app.post("/convert_audio_v2")
-async def convert_audio(file: UploadFile, user: dict = Depends(check_subscription)):
+async def convert_audio(file: UploadFile, response: Response, user: dict = Depends(check_subscription)):
     """
     Convierte un archivo de audio en texto y luego lo procesa con múltiples agentes.
 
@@ -239,6 +441,8 @@ async def convert_audio(file: UploadFile, user: dict = Depends(check_subscriptio
 
     Args:
         file (UploadFile): El archivo de audio a procesar.
+        response (Response): Respuesta a la que se agregan los headers `X-Audio-*` (bytes ahorrados y tiempos)
+            y `X-Transcript-Cache` (hit o miss) / `X-Article-Cache` (hit, coalesced o miss).
         user (dict): Información del usuario autenticado (inyectada por validate_token).
 
     Returns:
@@ -247,37 +451,83 @@ async def convert_audio(file: UploadFile, user: dict = Depends(check_subscriptio
     Raises:
         HTTPException: Si ocurre un error durante el procesamiento del audio o la transcripción.
     """
-    save_path = os.path.join("app", file.filename)
     try:
-        # Guardar el archivo de audio con su nombre original
-        with open(save_path, "wb") as uploaded_file:
-            uploaded_file.write(file.file.read())
-
-        # Abrir el archivo de audio guardado
-        with open(save_path, "rb") as audio_file:
-            transcript = openai.audio.transcriptions.create(
-                model="gpt-4o-mini-transcribe",
-                file=audio_file,
-                response_format='text'
-            )
-
+        transcript = await transcribe_upload(file, response)
+    except HTTPException:
+        raise
     except Exception as e:
-        if os.path.exists(save_path):
-            os.remove(save_path)
         return Response(str(e), 400)
 
-    finally:
-        # Eliminar el archivo de audio
-        if os.path.exists(save_path):
-            os.remove(save_path)
-
     try:
-        transcript_text = transcript
-        print(transcript_text)
-        new_message = iterate_agents(f"Hecho, nota o tema: {transcript_text}")
-        return clean_message(new_message)
+        article, cache_status = await run_in_threadpool(generate_article_cached, transcript)
     except Exception as e:
         return Response(str(e), 400)
+    response.headers["X-Article-Cache"] = cache_status
+    return article
+
+@app.post("/convert_audio_v2/stream")
+async def convert_audio_stream(
+    request: Request,
+    file: UploadFile,
+    format: Optional[str] = Query(None, description="ndjson (por defecto) o sse"),
+    user: dict = Depends(check_subscription),
+):
+    """
+    Variante progresiva de /convert_audio_v2: primero un evento `transcript` (con el reporte de
+    audio) y luego los mismos eventos que /convert_text_v2/stream. Usa las cachés de transcripción
+    y artículo de /convert_audio_v2.
+
+    Raises:
+        HTTPException: 413 si el audio supera el máximo (antes de empezar el stream).
+    """
+    audio = await spool_upload(file)
+    return event_stream_response(stream_audio_article(audio), resolve_stream_format(request, format))
+
+@app.post("/v2/voice/jobs", status_code=202)
+async def submit_voice_job(
+    file: UploadFile,
+    webhook_url: Optional[str] = Form(None),
+    user: dict = Depends(check_subscription),
+):
+    """
+    Variante asíncrona de /convert_audio_v2: recibe el audio y devuelve un job_id al instante.
+
+    La transcripción y la generación del artículo corren en un pool acotado de workers
+    (VOICE_JOB_WORKERS); el estado se consulta en GET /v2/voice/jobs/{job_id} con el mismo token.
+    Si se envía `webhook_url`, al terminar se hace POST con el mismo JSON del estado.
+
+    Los jobs viven en memoria del proceso que los recibió: requiere una sola instancia de Cloud Run
+    (max-instances=1) con CPU siempre asignada (sin throttling fuera de requests); con más instancias
+    el GET puede caer en otra y devolver 404.
+
+    Raises:
+        HTTPException: 400 si el webhook no es http(s) o apunta a una red privada, 413 si el audio supera el máximo y 503 si
+            la cola de jobs está llena.
+    """
+    if not await run_in_threadpool(is_valid_webhook_url, webhook_url):
+        raise HTTPException(
+            status_code=400,
+            detail="webhook_url debe ser una URL http(s) a un host público permitido",
+        )
+    audio = await spool_upload(file)
+    try:
+        job = voice_jobs.submit(audio, owner_key(user.get("token")), webhook_url)
+    except VoiceJobQueueFull as e:
+        audio.close()
+        raise HTTPException(status_code=503, detail=str(e))
+    return {**job, "status_url": f"/v2/voice/jobs/{job['job_id']}"}
+
+@app.get("/v2/voice/jobs/{job_id}")
+async def get_voice_job(job_id: str, user: dict = Depends(check_subscription)):
+    """
+    Estado de un job de voz: `stage` (queued, transcribing, generating, done), transcripción
+    parcial, transcripción final y artículo limpio cuando `status` es "completed".
+    Solo ve los jobs de esta instancia (ver POST /v2/voice/jobs).
+    """
+    job = voice_jobs.get(job_id, owner_key(user.get("token")))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de voz no encontrado o expirado")
+    return job
 
 trends_api = TrendsAPI()
 
@@ -325,6 +575,7 @@ async def execute_multi_trends_agents(
             description="Igual que en POST /v2/trends/agents/run. Ej.: ?agent_ids=5 o ?agent_ids=1&agent_ids=2",
         ),
     ] = None,
+    execution_mode: Optional[str] = None,
     sudo_check: dict = Depends(check_sudo_api_key),
 ):
     """
@@ -346,6 +597,7 @@ async def execute_multi_trends_agents(
         topic_position: Posición específica de tendencia (1-10) o None para auto-selección por ChatGPT
         agent_id: Un solo agente (legacy). Equivalente a ?agent_ids=ID
         agent_ids: Lista de IDs (nombre alineado con POST). Tiene precedencia sobre agent_id si ambos se envían
+        execution_mode: "interactive" o "batch" (por defecto AGENT_EXECUTION_MODE). En batch se devuelve el job enviado
         sudo_check: Verificación de SUDO_API_KEY (inyectada automáticamente)
         
     Returns:
@@ -358,8 +610,13 @@ async def execute_multi_trends_agents(
             topic_position=topic_position,
             dry_run=False,
             agent_ids=resolved_ids,
+            execution_mode=execution_mode,
         )
 
+        # Job batch enviado: se completa con POST /v2/trends/agents/batch/{job_id}/resume.
+        if v2_result.get("status") == "submitted":
+            return v2_result
+
         if v2_result.get("status") == "success":
             execution = v2_result.get("execution", {})
             return {
@@ -414,6 +671,10 @@ async def execute_multi_trends_agents_v2(
     - score de profundidad y policy checks
     - resultado de publicación
     - agent_ids opcional: lista de IDs para ejecutar solo esos agentes (omitir = todos)
+    - selection_strategy opcional: "per_agent", "batched" (una sola asignación de temas por LLM y agentes
+      en paralelo) o "solver" (asignación determinista sin LLM)
+    - execution_mode opcional: "interactive" (por defecto, o AGENT_EXECUTION_MODE) o "batch", que envía las
+      llamadas LLM a la API batch y devuelve status "submitted" con el job_id
     """
     try:
         result = run_multi_trends_agents_v2(
@@ -421,11 +682,36 @@ async def execute_multi_trends_agents_v2(
             dry_run=payload.dry_run,
             correlation_id=payload.correlation_id,
             agent_ids=payload.agent_ids,
+            selection_strategy=payload.selection_strategy,
+            execution_mode=payload.execution_mode,
         )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error ejecutando multi-agentes v2: {str(e)}")
 
+
+@app.post("/v2/trends/agents/batch/{job_id}/resume")
+async def resume_multi_trends_agents_v2_batch_endpoint(
+    job_id: str,
+    sudo_check: dict = Depends(check_sudo_api_key)
+):
+    """
+    Reanuda un job del modo batch: si la ronda en curso terminó, aplica sus respuestas y envía la
+    siguiente. Devuelve status "submitted" mientras queden rondas y el contrato v2 completo al terminar.
+    Responde 409 si otra reanudación del mismo job sigue en curso.
+    """
+    try:
+        result = resume_multi_trends_agents_v2_batch(job_id)
+        if result.get("status") == "error" and str(result.get("message", "")).startswith("No existe el job"):
+            raise HTTPException(status_code=404, detail=result["message"])
+        if result.get("status") == "busy":
+            raise HTTPException(status_code=409, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reanudando job batch v2: {str(e)}")
+
 @app.get("/cache/status")
 async def get_cache_status_endpoint(user: dict = Depends(check_subscription)):
     """
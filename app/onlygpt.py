@@ -1,7 +1,10 @@
 from openai import OpenAI
 import json
+from difflib import SequenceMatcher
 from os import getenv
 from load_env import load_env_files
+from agents.llm_resilience import call_with_resilience, new_resilience_report
+from agents.rate_limiter import estimate_request_tokens, get_openai_rate_limiter
 
 load_env_files()
 openai = OpenAI(
@@ -21,19 +24,62 @@ def chat_gpt(message,rol):
     message = response.choices[0].text.strip()
     return message
 
+DEFAULT_MAX_ROUNDS = 3
+DEFAULT_CONVERGENCE_THRESHOLD = 0.05
+DEFAULT_TOKEN_BUDGET = 30000
+
+def _read_positive_int_env(name, default):
+    try:
+        value = int(getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+def _read_positive_float_env(name, default):
+    try:
+        value = float(getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+def convergence_enabled():
+    """ONLYGPT_CONVERGENCE_ENABLED: /convert_audio corta las rondas al converger (desactivado por defecto)."""
+    return getenv("ONLYGPT_CONVERGENCE_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+
 def chat(message, rol):
-    print(getenv("OPENAI_API_KEY"))
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    return chat_with_usage(message, rol)[0]
+
+def chat_with_usage(message, rol):
+    """Como `chat`, pero devuelve `(respuesta, tokens_totales)` para llevar el presupuesto."""
+    params = {
+        "model": "gpt-4o-mini",
+        "messages": [
             {"role": "system", "content": rol},
             {"role": "user", "content": message}
         ],
-        temperature=0.2,
-        max_tokens=2000,
-    )
-    response = response["choices"][0]["message"]["content"]
-    return response
+        "temperature": 0.2,
+        "max_tokens": 2000,
+    }
+    # Sin reintentos del SDK: cada 429 llega al limitador y `call_with_resilience` decide el reintento.
+    client = openai.with_options(max_retries=0)
+
+    def attempt(timeout):
+        with get_openai_rate_limiter().reserve(estimate_request_tokens(params)) as ticket:
+            response = client.chat.completions.create(**(dict(params, timeout=timeout) if timeout else params))
+            usage = getattr(response, "usage", None)
+            ticket.actual_tokens = getattr(usage, "total_tokens", None) or estimate_request_tokens(params)
+        return response, ticket.actual_tokens
+
+    response, total_tokens = call_with_resilience(attempt, new_resilience_report())
+    return response.choices[0].message.content, total_tokens
+
+def change_ratio(previous, current):
+    """Fracción de palabras que cambió entre dos versiones (0 = idénticas, 1 = nada en común)."""
+    previous_words = (previous or "").split()
+    current_words = (current or "").split()
+    if not previous_words and not current_words:
+        return 0.0
+    return 1 - SequenceMatcher(None, previous_words, current_words, autojunk=False).ratio()
 
 from prompts import *
 
@@ -51,4 +97,47 @@ def iterate_many_times(message, times):
     
     return new_message
 
+def iterate_until_converged(message, max_rounds=None, threshold=None, token_budget=None):
+    """
+    Rondas de asistente/marketing/editor/director como `iterate_many_times`, pero se detiene cuando
+    una ronda cambia menos de `threshold` (fracción de palabras, ver `change_ratio`) respecto de la
+    anterior, al llegar a `max_rounds` o cuando otra ronda como la última excedería `token_budget`.
+    Por defecto: ONLYGPT_MAX_ROUNDS (3), ONLYGPT_CONVERGENCE_THRESHOLD (0.05) y ONLYGPT_TOKEN_BUDGET (30000).
+    """
+    max_rounds = max_rounds or _read_positive_int_env("ONLYGPT_MAX_ROUNDS", DEFAULT_MAX_ROUNDS)
+    if threshold is None:
+        threshold = _read_positive_float_env("ONLYGPT_CONVERGENCE_THRESHOLD", DEFAULT_CONVERGENCE_THRESHOLD)
+    token_budget = token_budget or _read_positive_int_env("ONLYGPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+
+    agents = [asistente, marketing, editor, director]
+    new_message = message
+    tokens_used = 0
+    rounds = []
+    stop_reason = "max_rounds"
+    for i in range(max_rounds):
+        previous = new_message
+        round_tokens = 0
+        for agent in agents:
+            new_message, tokens = chat_with_usage(new_message, agent)
+            round_tokens += tokens
+        tokens_used += round_tokens
+        change = change_ratio(previous, new_message)
+        rounds.append({"round": i + 1, "change_ratio": round(change, 4), "tokens": round_tokens})
+        print(f"🔁 Ronda {i + 1}: {change:.1%} de cambio, {round_tokens} tokens ({tokens_used}/{token_budget})")
+        # La primera ronda compara contra el texto original: siempre se aplica al menos una completa.
+        if i > 0 and change < threshold:
+            stop_reason = "converged"
+            break
+        if i + 1 < max_rounds and tokens_used + round_tokens > token_budget:
+            stop_reason = "token_budget"
+            break
+
+    return {
+        "content": new_message,
+        "rounds_used": len(rounds),
+        "stop_reason": stop_reason,
+        "tokens_used": tokens_used,
+        "rounds": rounds,
+    }
+
 #print(iterate_many_times("Hubo un choque en callao y santa fe, creo que el conductor estaba ebrio, no hubo muertos, ni heridos", 1))
\ No newline at end of file
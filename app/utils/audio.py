@@ -0,0 +1,444 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from difflib import SequenceMatcher
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+
+# Límite de la API de transcripción de OpenAI por archivo; por encima solo se puede por chunks.
+OPENAI_TRANSCRIPTION_MAX_BYTES = 25 * 1024 * 1024
+DEFAULT_MAX_AUDIO_UPLOAD_BYTES = 100 * 1024 * 1024
+AUDIO_UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Margen para los headers del multipart al comparar Content-Length con el máximo del audio.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Modo audio largo: por encima del umbral se parte en chunks que se transcriben en paralelo.
+DEFAULT_LONG_AUDIO_THRESHOLD_SECONDS = 120
+DEFAULT_AUDIO_CHUNK_SECONDS = 60
+DEFAULT_AUDIO_CHUNK_OVERLAP_SECONDS = 1.5
+DEFAULT_TRANSCRIPTION_CONCURRENCY = 4
+# Por debajo de este tamaño el audio va directo a la API, sin copia a disco ni ffprobe: entra en
+# el límite por archivo y, a ~64 kbps de una nota de voz, dura menos que el umbral de audio largo.
+DEFAULT_AUDIO_PROBE_MIN_BYTES = 1024 * 1024
+# Ventana alrededor de cada corte donde se busca un silencio para cortar sin partir palabras.
+SILENCE_SEARCH_SECONDS = 8.0
+SILENCE_NOISE_DB = -30
+SILENCE_MIN_SECONDS = 0.4
+FFMPEG_TIMEOUT_SECONDS = 120
+# Pre-compresión opcional: mono 16 kHz en Opus (códec de voz, ~24 kbps) antes de subir.
+DEFAULT_AUDIO_PRECOMPRESSION_BITRATE = "24k"
+
+# Códecs de salida de ffmpeg: FLAC sin pérdida por defecto, Opus cuando hay pre-compresión.
+_ENCODINGS = {
+    "flac": (["-c:a", "flac"], ".flac"),
+    "opus": (["-c:a", "libopus", "-application", "voip"], ".ogg"),
+}
+
+# Dedupe de overlap: se comparan las últimas/primeras N palabras de chunks contiguos.
+OVERLAP_DEDUPE_WINDOW_WORDS = 25
+OVERLAP_DEDUPE_MIN_WORDS = 3
+
+_SILENCE_START_PATTERN = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+_SILENCE_END_PATTERN = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+
+
+def _read_positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def _read_positive_float_env(name: str, default: float) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def precompression_enabled() -> bool:
+    """AUDIO_PRECOMPRESSION_ENABLED: pre-compresión local antes de transcribir (desactivada por defecto)."""
+    return os.getenv("AUDIO_PRECOMPRESSION_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def read_max_audio_upload_bytes() -> int:
+    """MAX_AUDIO_UPLOAD_BYTES: tamaño máximo aceptado para un audio subido (100 MB por defecto)."""
+    return _read_positive_int_env("MAX_AUDIO_UPLOAD_BYTES", DEFAULT_MAX_AUDIO_UPLOAD_BYTES)
+
+
+def _safe_extension(filename: Optional[str]) -> str:
+    """Extensión del nombre original (la API la usa para detectar el formato); nunca el nombre."""
+    extension = os.path.splitext(os.path.basename(filename or ""))[1].lower()
+    if not extension or len(extension) > 8 or not extension[1:].isalnum():
+        return ""
+    return extension
+
+
+def exceeds_upload_limit(content_length: Optional[str], max_bytes: Optional[int] = None) -> bool:
+    """
+    True si el Content-Length declarado ya supera MAX_AUDIO_UPLOAD_BYTES (más el margen del
+    multipart): la request se puede rechazar antes de recibir el cuerpo.
+    """
+    try:
+        declared = int(content_length or 0)
+    except ValueError:
+        return False
+    return declared > (max_bytes or read_max_audio_upload_bytes()) + MULTIPART_OVERHEAD_BYTES
+
+
+class SpooledAudio:
+    """
+    Audio subido en un spool temporal con nombre único; se cierra (y borra) al salir.
+    `sha256` es el hash del contenido.
+    """
+
+    def __init__(self, spool: IO[bytes], filename: str, size: int, sha256: str = ""):
+        self.file = spool
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+
+    def as_upload(self) -> Tuple[str, IO[bytes]]:
+        """Tupla `(nombre, archivo)` para `audio.transcriptions.create(file=...)` sin copiar el contenido."""
+        self.file.seek(0)
+        return self.filename, self.file
+
+    def materialize(self, directory: str) -> str:
+        """Copia el spool por bloques a un archivo con nombre en `directory` (ffmpeg necesita una ruta)."""
+        path = os.path.join(directory, self.filename)
+        self.file.seek(0)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(self.file, target, AUDIO_UPLOAD_CHUNK_BYTES)
+        self.file.seek(0)
+        return path
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "SpooledAudio":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None) -> SpooledAudio:
+    """
+    Toma el spool que Starlette ya armó al parsear el multipart, sin copiarlo, y calcula su
+    SHA-256 leyéndolo por bloques.
+
+    El máximo se verifica con el tamaño del upload antes de leerlo (413 si lo supera); las requests
+    cuyo Content-Length ya lo excede se rechazan antes de recibir el cuerpo (ver `exceeds_upload_limit`).
+    """
+    max_bytes = max_bytes or read_max_audio_upload_bytes()
+    try:
+        size = getattr(file, "size", None)
+        if size is None:
+            file.file.seek(0, os.SEEK_END)
+            size = file.file.tell()
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"El audio supera el máximo de {max_bytes} bytes")
+
+        digest = hashlib.sha256()
+        await file.seek(0)
+        while True:
+            chunk = await file.read(AUDIO_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+        await file.seek(0)
+    except BaseException:
+        await file.close()
+        raise
+
+    # El SpooledAudio pasa a ser dueño del spool: el cierre automático del form al terminar el
+    # request cierra el buffer vacío, y el audio sigue disponible para jobs y streams.
+    spool = file.file
+    file.file = io.BytesIO()
+    return SpooledAudio(spool, f"{uuid.uuid4().hex}{_safe_extension(file.filename)}", size, digest.hexdigest())
+
+
+def ffmpeg_available() -> bool:
+    return bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Duración en segundos según ffprobe; None si no se pudo leer."""
+    try:
+        completed = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+            capture_output=True,
+            text=True,
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+            check=True,
+        )
+        return float(completed.stdout.strip())
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return None
+
+
+def detect_silences(path: str) -> List[Tuple[float, float]]:
+    """Intervalos de silencio (inicio, fin) detectados con `silencedetect`; vacío si falla."""
+    try:
+        completed = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+                "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+                "-f", "null", "-",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+        )
+    except (subprocess.SubprocessError, OSError):
+        return []
+    starts = [float(value) for value in _SILENCE_START_PATTERN.findall(completed.stderr)]
+    ends = [float(value) for value in _SILENCE_END_PATTERN.findall(completed.stderr)]
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
+
+
+def plan_chunks(
+    duration: float,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    silences: Optional[List[Tuple[float, float]]] = None,
+) -> List[Tuple[float, float]]:
+    """
+    Tramos (inicio, fin) de ~`chunk_seconds`. Cada corte se mueve al silencio más cercano dentro de
+    SILENCE_SEARCH_SECONDS; si no hay, el corte es fijo y el tramo siguiente empieza `overlap_seconds`
+    antes para no perder la palabra partida (se deduplica al unir).
+    """
+    midpoints = [(start + end) / 2 for start, end in (silences or [])]
+    chunks: List[Tuple[float, float]] = []
+    cursor = 0.0
+    start = 0.0
+    while cursor < duration:
+        target = cursor + chunk_seconds
+        # Un resto corto se suma al último tramo en lugar de quedar como chunk aislado.
+        if target >= duration - chunk_seconds * 0.25:
+            chunks.append((start, duration))
+            break
+        nearby = [point for point in midpoints if abs(point - target) <= SILENCE_SEARCH_SECONDS and point > cursor]
+        cut = min(nearby, key=lambda point: abs(point - target)) if nearby else target
+        chunks.append((start, cut))
+        start = cut if nearby else max(0.0, cut - overlap_seconds)
+        cursor = cut
+    return chunks
+
+
+def _encoding_args(encoding: str) -> List[str]:
+    codec_args, _ = _ENCODINGS[encoding]
+    if encoding == "opus":
+        return codec_args + ["-b:a", os.getenv("AUDIO_PRECOMPRESSION_BITRATE", DEFAULT_AUDIO_PRECOMPRESSION_BITRATE)]
+    return codec_args
+
+
+def extract_chunk(path: str, start: float, end: float, output_path: str, encoding: str = "flac") -> None:
+    """Recorta [start, end) a mono 16 kHz (FLAC sin pérdida, u Opus si hay pre-compresión)."""
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+            "-vn", "-ac", "1", "-ar", "16000", *_encoding_args(encoding), output_path,
+        ],
+        capture_output=True,
+        timeout=FFMPEG_TIMEOUT_SECONDS,
+        check=True,
+    )
+
+
+def precompress_audio(path: str, work_dir: str, report: Dict[str, Any]) -> str:
+    """
+    Downmix a mono, resampleo a 16 kHz y Opus con el ffmpeg local. Devuelve la ruta a subir: la
+    comprimida, o la original si falla o no resulta más chica. Registra bytes y tiempo en `report`.
+    """
+    output_path = os.path.join(work_dir, f"precompressed{_ENCODINGS['opus'][1]}")
+    started = time.perf_counter()
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", path,
+                "-vn", "-ac", "1", "-ar", "16000", *_encoding_args("opus"), output_path,
+            ],
+            capture_output=True,
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+            check=True,
+        )
+        compressed_bytes = os.path.getsize(output_path)
+    except (subprocess.SubprocessError, OSError) as exc:
+        print(f"⚠️ No se pudo pre-comprimir el audio ({str(exc)}), subiendo el original")
+        return path
+    finally:
+        report["precompression_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    if compressed_bytes >= os.path.getsize(path):
+        return path
+    report["precompressed"] = True
+    report["uploaded_bytes"] = compressed_bytes
+    return output_path
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_overlap(left: str, right: str) -> str:
+    """Une dos transcripciones contiguas quitando las palabras repetidas por el overlap."""
+    left_words = left.split()
+    right_words = right.split()
+    if not left_words or not right_words:
+        return " ".join(left_words + right_words)
+
+    tail = [_normalize_word(word) for word in left_words[-OVERLAP_DEDUPE_WINDOW_WORDS:]]
+    head = [_normalize_word(word) for word in right_words[:OVERLAP_DEDUPE_WINDOW_WORDS]]
+    match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+    # Solo cuenta como overlap si la coincidencia toca el final de un tramo y el inicio del otro
+    # (con margen para palabras cortadas); una frase repetida en medio no se recorta.
+    at_boundary = match.a + match.size >= len(tail) - OVERLAP_DEDUPE_MIN_WORDS and match.b <= OVERLAP_DEDUPE_MIN_WORDS
+    if match.size < OVERLAP_DEDUPE_MIN_WORDS or not at_boundary:
+        return " ".join(left_words + right_words)
+
+    keep_left = len(left_words) - len(tail) + match.a + match.size
+    return " ".join(left_words[:keep_left] + right_words[match.b + match.size:])
+
+
+def stitch_transcripts(texts: List[str]) -> str:
+    merged = ""
+    for text in texts:
+        merged = merge_overlap(merged, str(text or "").strip())
+    return merged
+
+
+def new_audio_report(audio: SpooledAudio) -> Dict[str, Any]:
+    return {
+        "original_bytes": audio.size,
+        "uploaded_bytes": audio.size,
+        "precompressed": False,
+        "precompression_ms": 0.0,
+        "chunks": 1,
+        "transcription_ms": 0.0,
+    }
+
+
+def audio_report_headers(report: Dict[str, Any]) -> Dict[str, str]:
+    """Headers `X-Audio-*` con el ahorro de bytes y los tiempos de la transcripción."""
+    return {
+        "X-Audio-Original-Bytes": str(report.get("original_bytes", 0)),
+        "X-Audio-Uploaded-Bytes": str(report.get("uploaded_bytes", 0)),
+        "X-Audio-Bytes-Saved": str(report.get("original_bytes", 0) - report.get("uploaded_bytes", 0)),
+        "X-Audio-Precompressed": str(bool(report.get("precompressed"))).lower(),
+        "X-Audio-Precompression-Ms": str(report.get("precompression_ms", 0.0)),
+        "X-Audio-Chunks": str(report.get("chunks", 1)),
+        "X-Audio-Transcription-Ms": str(report.get("transcription_ms", 0.0)),
+    }
+
+
+def transcribe_spooled(
+    audio: SpooledAudio,
+    transcribe: Callable[[Tuple[str, IO[bytes]]], str],
+    report: Optional[Dict[str, Any]] = None,
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Transcribe el audio con `transcribe((nombre, archivo))`.
+
+    Con AUDIO_PRECOMPRESSION_ENABLED el audio se pasa antes a mono 16 kHz en Opus con el ffmpeg
+    local. Si dura más de LONG_AUDIO_THRESHOLD_SECONDS se parte en chunks (AUDIO_CHUNK_SECONDS, con
+    AUDIO_CHUNK_OVERLAP_SECONDS de overlap en cortes sin silencio) que se transcriben en paralelo
+    hasta TRANSCRIPTION_CONCURRENCY a la vez y se unen deduplicando el overlap. Sin ffmpeg, o si
+    el corte falla, se transcribe en una sola llamada; también los audios de menos de
+    AUDIO_PROBE_MIN_BYTES (1 MiB), que no se copian a disco ni pasan por ffprobe. `report` (ver
+    `new_audio_report`) recibe los bytes subidos, la pre-compresión y el tiempo total;
+    `on_partial` recibe el texto unido de los chunks consecutivos ya transcritos a medida que avanza.
+    """
+    report = report if report is not None else new_audio_report(audio)
+    started = time.perf_counter()
+    try:
+        return _transcribe_spooled(audio, transcribe, report, on_partial)
+    finally:
+        report["transcription_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def _transcribe_spooled(
+    audio: SpooledAudio,
+    transcribe: Callable[[Tuple[str, IO[bytes]]], str],
+    report: Dict[str, Any],
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    threshold = _read_positive_float_env("LONG_AUDIO_THRESHOLD_SECONDS", DEFAULT_LONG_AUDIO_THRESHOLD_SECONDS)
+    probe_min_bytes = _read_positive_int_env("AUDIO_PROBE_MIN_BYTES", DEFAULT_AUDIO_PROBE_MIN_BYTES)
+    if audio.size >= probe_min_bytes and ffmpeg_available():
+        with tempfile.TemporaryDirectory(prefix="finguru_audio_") as work_dir:
+            try:
+                source_path = audio.materialize(work_dir)
+                if precompression_enabled():
+                    source_path = precompress_audio(source_path, work_dir, report)
+                duration = probe_duration(source_path)
+                if duration is not None and duration > threshold:
+                    return _transcribe_chunked(source_path, duration, work_dir, transcribe, report, on_partial)
+                if report["precompressed"] and report["uploaded_bytes"] <= OPENAI_TRANSCRIPTION_MAX_BYTES:
+                    with open(source_path, "rb") as compressed_file:
+                        return transcribe((os.path.basename(source_path), compressed_file))
+            except (subprocess.SubprocessError, OSError) as exc:
+                print(f"⚠️ No se pudo partir el audio ({str(exc)}), transcribiendo en una sola llamada")
+
+    report["precompressed"] = False
+    report["uploaded_bytes"] = audio.size
+    report["chunks"] = 1
+    if audio.size > OPENAI_TRANSCRIPTION_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El audio supera los {OPENAI_TRANSCRIPTION_MAX_BYTES} bytes y no se pudo partir en chunks",
+        )
+    return transcribe(audio.as_upload())
+
+
+def _transcribe_chunked(
+    source_path: str,
+    duration: float,
+    work_dir: str,
+    transcribe: Callable[[Tuple[str, IO[bytes]]], str],
+    report: Dict[str, Any],
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    chunk_seconds = _read_positive_float_env("AUDIO_CHUNK_SECONDS", DEFAULT_AUDIO_CHUNK_SECONDS) or DEFAULT_AUDIO_CHUNK_SECONDS
+    overlap_seconds = _read_positive_float_env("AUDIO_CHUNK_OVERLAP_SECONDS", DEFAULT_AUDIO_CHUNK_OVERLAP_SECONDS)
+    chunks = plan_chunks(duration, chunk_seconds, overlap_seconds, detect_silences(source_path))
+
+    encoding = "opus" if report["precompressed"] else "flac"
+    chunk_paths = []
+    for index, (start, end) in enumerate(chunks):
+        chunk_path = os.path.join(work_dir, f"chunk_{index:03d}{_ENCODINGS[encoding][1]}")
+        extract_chunk(source_path, start, end, chunk_path, encoding)
+        chunk_paths.append(chunk_path)
+    report["chunks"] = len(chunk_paths)
+    report["uploaded_bytes"] = sum(os.path.getsize(chunk_path) for chunk_path in chunk_paths)
+
+    def transcribe_chunk(chunk_path: str) -> str:
+        with open(chunk_path, "rb") as chunk_file:
+            return transcribe((os.path.basename(chunk_path), chunk_file))
+
+    concurrency = _read_positive_int_env("TRANSCRIPTION_CONCURRENCY", DEFAULT_TRANSCRIPTION_CONCURRENCY)
+    print(f"🎧 Audio de {duration:.0f}s partido en {len(chunks)} chunks (concurrencia {concurrency})")
+    texts: List[Optional[str]] = [None] * len(chunk_paths)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunk_paths)))) as executor:
+        futures = {executor.submit(transcribe_chunk, chunk_path): index for index, chunk_path in enumerate(chunk_paths)}
+        for future in as_completed(futures):
+            texts[futures[future]] = future.result()
+            if on_partial is not None:
+                ready = 0
+                while ready < len(texts) and texts[ready] is not None:
+                    ready += 1
+                on_partial(stitch_transcripts(texts[:ready]))
+    return stitch_transcripts(texts)
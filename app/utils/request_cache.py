@@ -0,0 +1,165 @@
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+
+
+DEFAULT_TRANSCRIPT_CACHE_TTL_SECONDS = 3600
+DEFAULT_TRANSCRIPT_CACHE_MAX_ENTRIES = 256
+DEFAULT_ARTICLE_CACHE_TTL_SECONDS = 3600
+DEFAULT_ARTICLE_CACHE_MAX_ENTRIES = 256
+DEFAULT_TEXT_ARTICLE_CACHE_TTL_SECONDS = 300
+DEFAULT_TEXT_ARTICLE_CACHE_MAX_ENTRIES = 256
+
+
+def _read_positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(str(text or "").encode("utf-8")).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Texto sin espacios sobrantes: reenvíos que solo difieren en espacios o saltos comparten clave."""
+    return " ".join(str(text or "").split())
+
+
+class RequestCache:
+    """`TTLCache` acotado y thread-safe con contadores de hits/misses para respuestas repetidas."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: int):
+        self.name = name
+        self._cache: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            self._stats["hits" if value is not None else "misses"] += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        # Resultados vacíos no se cachean: un reintento debe volver a intentarlo.
+        if value is None or value == "":
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._cache),
+                "max_entries": int(self._cache.maxsize),
+                "ttl_seconds": self._cache.ttl,
+                **self._stats,
+            }
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce llamadas concurrentes con la misma clave: la primera ejecuta `fn` y las que llegan
+    mientras tanto esperan y reciben su resultado (o su excepción), sin ejecutar de nuevo.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Devuelve `(resultado, compartido)`; `compartido` es True si otra llamada hizo el trabajo."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlight()
+                self._stats["executions"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"name": self.name, "in_flight": len(self._calls), **self._stats}
+
+
+# Transcripciones por SHA-256 del audio subido (TRANSCRIPT_CACHE_TTL_SECONDS / _MAX_ENTRIES).
+_TRANSCRIPT_CACHE = RequestCache(
+    "transcripts",
+    _read_positive_int_env("TRANSCRIPT_CACHE_MAX_ENTRIES", DEFAULT_TRANSCRIPT_CACHE_MAX_ENTRIES),
+    _read_positive_int_env("TRANSCRIPT_CACHE_TTL_SECONDS", DEFAULT_TRANSCRIPT_CACHE_TTL_SECONDS),
+)
+# Artículos generados por SHA-256 de la transcripción (ARTICLE_CACHE_TTL_SECONDS / _MAX_ENTRIES).
+_ARTICLE_CACHE = RequestCache(
+    "articles",
+    _read_positive_int_env("ARTICLE_CACHE_MAX_ENTRIES", DEFAULT_ARTICLE_CACHE_MAX_ENTRIES),
+    _read_positive_int_env("ARTICLE_CACHE_TTL_SECONDS", DEFAULT_ARTICLE_CACHE_TTL_SECONDS),
+)
+
+
+# Artículos de /convert_text_v2 por hash del texto normalizado, con TTL corto
+# (TEXT_ARTICLE_CACHE_TTL_SECONDS / _MAX_ENTRIES) para absorber dobles clicks y reintentos.
+_TEXT_ARTICLE_CACHE = RequestCache(
+    "text_articles",
+    _read_positive_int_env("TEXT_ARTICLE_CACHE_MAX_ENTRIES", DEFAULT_TEXT_ARTICLE_CACHE_MAX_ENTRIES),
+    _read_positive_int_env("TEXT_ARTICLE_CACHE_TTL_SECONDS", DEFAULT_TEXT_ARTICLE_CACHE_TTL_SECONDS),
+)
+_TEXT_ARTICLE_FLIGHTS = SingleFlight("text_articles")
+_ARTICLE_FLIGHTS = SingleFlight("articles")
+
+
+def get_transcript_cache() -> RequestCache:
+    return _TRANSCRIPT_CACHE
+
+
+def get_article_cache() -> RequestCache:
+    return _ARTICLE_CACHE
+
+
+def get_article_flights() -> SingleFlight:
+    return _ARTICLE_FLIGHTS
+
+
+def get_text_article_cache() -> RequestCache:
+    return _TEXT_ARTICLE_CACHE
+
+
+def get_text_article_flights() -> SingleFlight:
+    return _TEXT_ARTICLE_FLIGHTS
@@ -0,0 +1,52 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
+
+
+STREAM_FORMAT_NDJSON = "ndjson"
+STREAM_FORMAT_SSE = "sse"
+STREAM_MEDIA_TYPES = {
+    STREAM_FORMAT_NDJSON: "application/x-ndjson",
+    STREAM_FORMAT_SSE: "text/event-stream",
+}
+
+
+def resolve_stream_format(request: Request, stream_format: Optional[str] = None) -> str:
+    """`format` explícito (ndjson o sse) o, si no, SSE cuando el cliente acepta `text/event-stream`."""
+    candidate = (stream_format or "").strip().lower()
+    if candidate in STREAM_MEDIA_TYPES:
+        return candidate
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return STREAM_FORMAT_SSE
+    return STREAM_FORMAT_NDJSON
+
+
+def encode_event(event: Dict[str, Any], stream_format: str) -> str:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    if stream_format == STREAM_FORMAT_SSE:
+        return f"event: {event.get('event', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def _encoded(events: Iterable[Dict[str, Any]], stream_format: str) -> Iterator[str]:
+    # Con el status 200 ya enviado, un error a mitad de camino solo puede viajar como evento.
+    try:
+        for event in events:
+            yield encode_event(event, stream_format)
+    except Exception as e:
+        print(f"❌ Error en stream editorial: {str(e)}")
+        yield encode_event({"event": "error", "detail": str(getattr(e, "detail", None) or e)}, stream_format)
+
+
+def event_stream_response(events: Iterable[Dict[str, Any]], stream_format: str) -> StreamingResponse:
+    """
+    Respuesta NDJSON (un objeto JSON por línea) o SSE para un iterable de eventos con clave `event`.
+    Un iterable síncrono se consume en el threadpool de Starlette, así que puede bloquear.
+    """
+    return StreamingResponse(
+        _encoded(events, stream_format),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
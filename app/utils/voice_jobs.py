@@ -0,0 +1,249 @@
+import hashlib
+import ipaddress
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+import httpx
+from cachetools import TTLCache
+
+from utils.audio import SpooledAudio
+
+
+DEFAULT_VOICE_JOB_WORKERS = 2
+DEFAULT_VOICE_JOB_MAX_PENDING = 20
+DEFAULT_VOICE_JOB_TTL_SECONDS = 3600
+VOICE_JOB_MAX_ENTRIES = 1000
+WEBHOOK_TIMEOUT_SECONDS = 10.0
+WEBHOOK_ATTEMPTS = 3
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+STAGE_QUEUED = "queued"
+STAGE_TRANSCRIBING = "transcribing"
+STAGE_GENERATING = "generating"
+STAGE_DONE = "done"
+
+
+def _read_positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def owner_key(token: str) -> str:
+    """Hash del token del usuario: el job solo se consulta con el mismo token, sin guardarlo."""
+    return hashlib.sha256(str(token or "").encode("utf-8")).hexdigest()
+
+
+def _allowed_webhook_hosts() -> Set[str]:
+    """VOICE_WEBHOOK_ALLOWED_HOSTS: hosts permitidos separados por coma (vacío = cualquier host público)."""
+    raw = os.getenv("VOICE_WEBHOOK_ALLOWED_HOSTS", "")
+    return {host.strip().lower() for host in raw.split(",") if host.strip()}
+
+
+def _resolves_to_public_addresses(host: str, port: int) -> bool:
+    """True si todas las IPs de `host` son públicas (ni loopback, privadas, link-local ni reservadas)."""
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return False
+    if not infos:
+        return False
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            return False
+    return True
+
+
+def is_valid_webhook_url(url: Optional[str]) -> bool:
+    """
+    URL http(s) cuyo host está en VOICE_WEBHOOK_ALLOWED_HOSTS (si se configuró) y resuelve solo a
+    direcciones públicas, para que un webhook no sirva para llegar a la red interna (SSRF).
+    Resuelve DNS: llamarla fuera del event loop.
+    """
+    if not url:
+        return True
+    parsed = urlparse(url)
+    if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+        return False
+    allowed_hosts = _allowed_webhook_hosts()
+    if allowed_hosts and parsed.hostname.lower() not in allowed_hosts:
+        return False
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    except ValueError:
+        return False
+    return _resolves_to_public_addresses(parsed.hostname, port)
+
+
+class VoiceJobQueueFull(RuntimeError):
+    """Hay VOICE_JOB_MAX_PENDING jobs en cola o en curso; el cliente debe reintentar más tarde."""
+
+
+class VoiceJobManager:
+    """
+    Jobs de voz a artículo en un pool acotado de workers (VOICE_JOB_WORKERS).
+
+    `transcribe(audio, report, on_partial)` y `generate(transcript)` los provee el endpoint:
+    devuelven `(transcripción, cache_hit)` y `(artículo, estado de caché)` respectivamente. El estado (etapa, transcripción parcial, artículo final)
+    queda en memoria hasta VOICE_JOB_TTL_SECONDS y, si se indicó `webhook_url`, se envía por POST al
+    terminar.
+
+    El estado y los workers viven en el proceso: el despliegue necesita una sola instancia (en Cloud Run,
+    max-instances=1) con CPU siempre asignada, o el polling puede caer en otra instancia (404) y el job
+    quedar sin CPU después de responder el 202.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[SpooledAudio, Dict[str, Any], Callable[[str], None]], Any],
+        generate: Callable[[str], Any],
+        new_report: Callable[[SpooledAudio], Dict[str, Any]],
+    ):
+        self.transcribe = transcribe
+        self.generate = generate
+        self.new_report = new_report
+        self.max_pending = _read_positive_int_env("VOICE_JOB_MAX_PENDING", DEFAULT_VOICE_JOB_MAX_PENDING)
+        self._executor = ThreadPoolExecutor(
+            max_workers=_read_positive_int_env("VOICE_JOB_WORKERS", DEFAULT_VOICE_JOB_WORKERS),
+            thread_name_prefix="voice-job",
+        )
+        self._jobs: TTLCache = TTLCache(
+            maxsize=VOICE_JOB_MAX_ENTRIES,
+            ttl=_read_positive_int_env("VOICE_JOB_TTL_SECONDS", DEFAULT_VOICE_JOB_TTL_SECONDS),
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, audio: SpooledAudio, owner: str, webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """Encola el audio ya spooleado; el job pasa a ser dueño de `audio` y lo cierra al terminar."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise VoiceJobQueueFull(f"Hay {self._pending} jobs de voz en curso; reintentá más tarde")
+            self._pending += 1
+            now = datetime.utcnow().isoformat() + "Z"
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "status": STATUS_QUEUED,
+                "stage": STAGE_QUEUED,
+                "created_at": now,
+                "updated_at": now,
+                "partial_transcript": "",
+                "transcript": None,
+                "article": None,
+                "error": None,
+                "cache": {"transcript": None, "article": None},
+                "audio": None,
+                "timings": {},
+                "webhook": {"url": webhook_url, "delivered": None} if webhook_url else None,
+                "_owner": owner,
+            }
+            self._jobs[job["job_id"]] = job
+        self._executor.submit(self._run, job["job_id"], audio)
+        return self._public(job)
+
+    def get(self, job_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["_owner"] != owner:
+                return None
+            return self._public(job)
+
+    def _update(self, job_id: str, **changes: Any) -> Dict[str, Any]:
+        """Aplica `changes` al job y devuelve una copia (vacía salvo `job_id` si ya expiró por TTL)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"job_id": job_id, **changes}
+            job.update(changes)
+            job["updated_at"] = datetime.utcnow().isoformat() + "Z"
+            return dict(job)
+
+    def _run(self, job_id: str, audio: SpooledAudio) -> None:
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        cache: Dict[str, Optional[str]] = {"transcript": None, "article": None}
+        try:
+            self._update(job_id, status=STATUS_RUNNING, stage=STAGE_TRANSCRIBING)
+            report = self.new_report(audio)
+            transcribe_start = time.perf_counter()
+            transcript, transcript_hit = self.transcribe(
+                audio,
+                report,
+                lambda partial: self._update(job_id, partial_transcript=partial),
+            )
+            audio.close()
+            timings["transcription_ms"] = round((time.perf_counter() - transcribe_start) * 1000, 2)
+            cache["transcript"] = "hit" if transcript_hit else "miss"
+            self._update(
+                job_id,
+                stage=STAGE_GENERATING,
+                partial_transcript=transcript,
+                transcript=transcript,
+                audio=None if transcript_hit else report,
+                cache=dict(cache),
+                timings=dict(timings),
+            )
+
+            generate_start = time.perf_counter()
+            article, article_status = self.generate(transcript)
+            timings["generation_ms"] = round((time.perf_counter() - generate_start) * 1000, 2)
+            cache["article"] = article_status
+            self._update(job_id, status=STATUS_COMPLETED, stage=STAGE_DONE, article=article, cache=dict(cache))
+        except Exception as e:
+            print(f"❌ Job de voz {job_id} falló: {str(e)}")
+            self._update(job_id, status=STATUS_FAILED, error=str(getattr(e, "detail", None) or e))
+        finally:
+            audio.close()
+            with self._lock:
+                self._pending = max(0, self._pending - 1)
+            timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            job = self._update(job_id, timings=dict(timings))
+
+        if job.get("webhook"):
+            self._deliver_webhook(job)
+
+    def _deliver_webhook(self, job: Dict[str, Any]) -> None:
+        payload = self._public(job)
+        delivered = False
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            # Se revalida en cada intento: el DNS del host pudo cambiar desde que se aceptó el job.
+            if not is_valid_webhook_url(job["webhook"]["url"]):
+                print(f"⚠️ Webhook del job {job['job_id']} ya no apunta a una dirección pública, no se envía")
+                break
+            try:
+                response = httpx.post(
+                    job["webhook"]["url"],
+                    json=payload,
+                    timeout=WEBHOOK_TIMEOUT_SECONDS,
+                    follow_redirects=False,
+                )
+                if 200 <= response.status_code < 300:
+                    delivered = True
+                    break
+                print(f"⚠️ Webhook del job {job['job_id']} respondió {response.status_code}")
+            except httpx.HTTPError as e:
+                print(f"⚠️ Error enviando webhook del job {job['job_id']}: {str(e)}")
+            if attempt < WEBHOOK_ATTEMPTS - 1:
+                time.sleep(2 ** attempt)
+        self._update(job["job_id"], webhook={**job["webhook"], "delivered": delivered})
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        public = {key: value for key, value in job.items() if not key.startswith("_")}
+        public["cache"] = dict(job.get("cache") or {})
+        public["timings"] = dict(job.get("timings") or {})
+        return public